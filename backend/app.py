@@ -1,5 +1,6 @@
 #!/usr/bin/env python
 import os
+import click
 from flask_migrate import Migrate, upgrade
 from app import create_app, db
 from app.models import User, Author, Category, Tag, Article
@@ -20,6 +21,14 @@ def deploy():
     # Create some sample data
     create_sample_data()
 
+    # Seed the published-article counters from existing rows
+    from app.counters import reconcile_counters as rebuild
+    rebuild()
+
+    # Build the related-articles neighbor lists
+    from app.related import rebuild_related
+    rebuild_related(app.config['RELATED_TOP_N'])
+
 def create_sample_data():
     """Create sample data for testing"""
     # Create sample author
@@ -58,5 +67,37 @@ def create_sample_data():
     db.session.commit()
     print("Sample data created successfully!")
 
+@app.cli.command('reconcile-counters')
+def reconcile_counters():
+    """Rebuild the published-article counters from the articles table."""
+    from app.counters import reconcile_counters as rebuild
+    print(f"Reconciled {rebuild()} counters")
+
+@app.cli.command('rebuild-related')
+def rebuild_related():
+    """Recompute every related-articles neighbor list."""
+    from app.related import rebuild_related as rebuild
+    print(f"Indexed {rebuild(app.config['RELATED_TOP_N'])} articles")
+
+@app.cli.command('simulate-quotes')
+@click.option('--interval', default=1.0, help='Seconds between ticks.')
+@click.option('--count', default=0, help='Ticks to send; 0 runs until interrupted.')
+def simulate_quotes(interval, count):
+    """Random-walk the stored quotes, as a local stand-in for a market feed."""
+    import time
+    from app.cache import response_cache
+    from app.market_data import simulated_quotes, upsert_quotes
+    from app.models import StockQuote
+
+    sent = 0
+    while not count or sent < count:
+        quotes = simulated_quotes(StockQuote.query.all())
+        upsert_quotes(quotes)
+        db.session.commit()
+        response_cache.invalidate('stocks')
+        sent += 1
+        print(f"Tick {sent}: {len(quotes)} quotes")
+        time.sleep(interval)
+
 if __name__ == '__main__':
     app.run()
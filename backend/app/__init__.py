@@ -23,6 +23,40 @@ def create_app(config_name=None):
     CORS(app)
     jwt.init_app(app)
     
+    from app.json_provider import init_json
+    from app.compression import compressor
+    from app.coalesce import request_coalescer
+    init_json(app)
+    compressor.init_app(app)
+    request_coalescer.init_app(app)
+    
+    from app.view_counter import view_counter
+    from app.trending import trending_engine
+    from app.cache import response_cache
+    from app.invalidation import invalidation_bus
+    from app.http_cache import http_cache
+    from app.counters import counter_seeder
+    from app.homepage_snapshot import homepage_snapshots
+    from app.related import related_index
+    from app.sitemap import sitemaps
+    from app.quote_book import quote_book
+    from app.price_history import price_history
+    from app.quote_stream import quote_stream
+    from app.analytics import stock_analytics
+    view_counter.init_app(app)
+    trending_engine.init_app(app)
+    response_cache.init_app(app)
+    invalidation_bus.init_app(app)
+    http_cache.init_app(app)
+    counter_seeder.init_app(app)
+    homepage_snapshots.init_app(app)
+    related_index.init_app(app)
+    sitemaps.init_app(app)
+    quote_book.init_app(app)
+    price_history.init_app(app)
+    quote_stream.init_app(app)
+    stock_analytics.init_app(app)
+    
     # Register blueprints
     from app.routes.articles import articles_bp
     from app.routes.categories import categories_bp
@@ -35,6 +69,8 @@ def create_app(config_name=None):
     from app.routes.settings import settings_bp
     from app.routes.db_admin import db_admin_bp
     from app.routes.homepage import homepage_bp
+    from app.routes.feeds import feeds_bp
+    from app.routes.changes import changes_bp
     
     app.register_blueprint(articles_bp, url_prefix='/api/articles')
     app.register_blueprint(categories_bp, url_prefix='/api/categories')
@@ -45,11 +81,29 @@ def create_app(config_name=None):
     app.register_blueprint(menu_bp, url_prefix='/api/menu')
     app.register_blueprint(stocks_bp, url_prefix='/api/stocks')
     app.register_blueprint(settings_bp, url_prefix='/api/settings')
+    app.register_blueprint(changes_bp, url_prefix='/api/changes')
     app.register_blueprint(db_admin_bp)
     app.register_blueprint(homepage_bp)
+    app.register_blueprint(feeds_bp)
     
     @app.route('/api/health')
     def health_check():
         return {'status': 'healthy', 'message': 'Flask backend is running'}
     
+    @app.route('/api/metrics')
+    def metrics():
+        return {
+            'view_counter': view_counter.stats(),
+            'response_cache': response_cache.stats(),
+            'invalidation_bus': invalidation_bus.stats(),
+            'coalescer': request_coalescer.stats(),
+            'http_cache': http_cache.stats(),
+            'homepage_snapshots': homepage_snapshots.stats(),
+            'compression': compressor.stats(),
+            'sitemaps': sitemaps.stats(),
+            'quote_book': quote_book.stats(),
+            'quote_stream': quote_stream.stats(),
+            'stock_analytics': stock_analytics.stats()
+        }
+    
     return app
@@ -0,0 +1,226 @@
+import threading
+import time
+from datetime import datetime, timedelta
+import numpy as np
+from sqlalchemy import Float, cast, select
+from app import db
+from app.cache import LRUCacheBackend
+from app.coalesce import request_coalescer
+from app.dialects import epoch_days
+from app.models import PriceBar
+from app.price_history import bucket_start
+
+TRADING_DAYS = 252
+
+# Per-symbol series an analysis holds, as named in responses
+INDICATORS = ('close', 'return', 'sma', 'ema', 'volatility')
+
+def load_closes(symbols, start, end):
+    """Daily closes for ``symbols`` over ``[start, end)`` as ``(dates, closes)``.
+
+    ``closes`` is a C-ordered symbols x days float64 matrix, so each
+    symbol's series is one contiguous row; days a symbol has no bar for
+    are NaN. ``dates`` is the shared ``datetime64[D]`` axis. One query
+    reads every bar, with the database turning days into integers and
+    closes into floats so no row goes through datetime or Decimal.
+    """
+    bars = PriceBar.__table__
+    connection = db.session.connection()
+    rows = connection.execute(
+        select(bars.c.symbol, epoch_days(connection, bars.c.bucket_start), cast(bars.c.close, Float))
+        .where(bars.c.period == '1d', bars.c.symbol.in_(symbols),
+               bars.c.bucket_start >= start, bars.c.bucket_start < end)
+        .order_by(bars.c.symbol, bars.c.bucket_start)
+    ).all()
+    if not rows:
+        return np.array([], dtype='datetime64[D]'), np.full((len(symbols), 0), np.nan)
+
+    positions = {symbol: index for index, symbol in enumerate(symbols)}
+    symbol_column, day_column, close_column = zip(*rows)
+    days, day_index = np.unique(np.array(day_column, dtype=np.int64), return_inverse=True)
+    dates = days.astype('datetime64[D]')
+    closes = np.full((len(symbols), len(dates)), np.nan)
+    closes[np.fromiter((positions[symbol] for symbol in symbol_column), np.int64, len(rows)), day_index] = \
+        np.array(close_column, dtype=np.float64)
+    return dates, closes
+
+def forward_fill(values):
+    """Carry each row's last value over NaN gaps; leading NaNs stay"""
+    columns = np.arange(values.shape[1])
+    last = np.maximum.accumulate(np.where(np.isnan(values), 0, columns), axis=1)
+    return values[np.arange(values.shape[0])[:, None], last]
+
+def _rolling_sums(values, window):
+    """Sums over each trailing ``window``, and how many of its values were not NaN"""
+    valid = ~np.isnan(values)
+    padded = np.zeros((values.shape[0], values.shape[1] + 1))
+    np.cumsum(np.where(valid, values, 0), axis=1, out=padded[:, 1:])
+    counts = np.zeros(padded.shape, dtype=np.int64)
+    np.cumsum(valid, axis=1, out=counts[:, 1:])
+    return padded[:, window:] - padded[:, :-window], counts[:, window:] - counts[:, :-window]
+
+def _trailing(values, window, windowed):
+    """Align a per-window result to ``values``; the first ``window - 1`` columns are NaN"""
+    result = np.full(values.shape, np.nan)
+    result[:, window - 1:] = windowed
+    return result
+
+def simple_returns(closes):
+    """Day-over-day returns; column 0 is NaN"""
+    returns = np.full(closes.shape, np.nan)
+    returns[:, 1:] = closes[:, 1:] / closes[:, :-1] - 1
+    return returns
+
+def log_returns(closes):
+    returns = np.full(closes.shape, np.nan)
+    returns[:, 1:] = np.diff(np.log(closes), axis=1)
+    return returns
+
+def sma(closes, window):
+    """Simple moving average; NaN until a full window of closes"""
+    sums, counts = _rolling_sums(closes, window)
+    return _trailing(closes, window, np.where(counts == window, sums / window, np.nan))
+
+def ema(closes, window):
+    """Exponential moving average, ``alpha = 2 / (window + 1)``, seeded with the first close.
+
+    Expects forward-filled closes. The recurrence runs over days, but each
+    step updates every symbol at once, so the loop is as long as one series.
+    """
+    alpha = 2 / (window + 1)
+    result = np.empty(closes.shape)
+    if not closes.shape[1]:
+        return result
+    current = closes[:, 0].copy()
+    result[:, 0] = current
+    for day in range(1, closes.shape[1]):
+        close = closes[:, day]
+        current = np.where(np.isnan(current), close, current + alpha * (close - current))
+        result[:, day] = current
+    return result
+
+def rolling_volatility(returns, window, periods=TRADING_DAYS):
+    """Annualized standard deviation of ``returns`` over each trailing window"""
+    sums, counts = _rolling_sums(returns, window)
+    squares, _ = _rolling_sums(returns * returns, window)
+    variance = np.maximum(squares - sums * sums / window, 0) / (window - 1)
+    return _trailing(returns, window, np.where(counts == window, np.sqrt(variance * periods), np.nan))
+
+def correlation_matrix(returns):
+    """Pearson correlation between rows, each pair over the days both have a return.
+
+    Masked sums turn every pairwise statistic into a matrix product, so
+    all pairs come out of a handful of BLAS calls.
+    """
+    valid = (~np.isnan(returns)).astype(np.float64)
+    values = np.where(valid > 0, returns, 0)
+    counts = valid @ valid.T
+    sums = values @ valid.T
+    squares = (values * values) @ valid.T
+    products = values @ values.T
+    with np.errstate(invalid='ignore', divide='ignore'):
+        covariance = products - sums * sums.T / counts
+        variance = squares - sums * sums / counts
+        correlation = covariance / np.sqrt(variance * variance.T)
+    correlation[counts < 3] = np.nan
+    return np.clip(correlation, -1, 1)
+
+class Analysis:
+    """Indicators for one symbol set, window and lookback"""
+
+    __slots__ = ('symbols', 'window', 'dates', 'series', 'correlation', 'computed_at', 'expires_at')
+
+    def __init__(self, symbols, window, dates, closes, ttl):
+        self.symbols = symbols
+        self.window = window
+        self.dates = dates
+        closes = forward_fill(closes)
+        returns = log_returns(closes)
+        self.series = dict(zip(INDICATORS, (
+            closes, simple_returns(closes), sma(closes, window), ema(closes, window),
+            rolling_volatility(returns, window)
+        )))
+        self.correlation = correlation_matrix(returns)
+        self.computed_at = datetime.utcnow()
+        self.expires_at = time.time() + ttl
+
+    def payload(self, series=False):
+        """Latest value of each indicator per symbol, the correlations, and optionally every series"""
+        latest = {name: _values(values[:, -1]) if values.shape[1] else [None] * len(self.symbols)
+                  for name, values in self.series.items()}
+        listed = {name: _values(values) for name, values in self.series.items()} if series else None
+        symbols = {}
+        for index, symbol in enumerate(self.symbols):
+            symbols[symbol] = {name: values[index] for name, values in latest.items()}
+            if series:
+                symbols[symbol]['series'] = {name: values[index] for name, values in listed.items()}
+        payload = {
+            'window': self.window,
+            'computed_at': self.computed_at,
+            'symbols': symbols,
+            'correlation': {'symbols': list(self.symbols), 'matrix': _values(self.correlation.round(4))}
+        }
+        if series:
+            payload['dates'] = self.dates.astype(str).tolist()
+        return payload
+
+def _values(array):
+    """An array as (nested) lists, NaN as None"""
+    listed = array.astype(object)
+    listed[np.isnan(array)] = None
+    return listed.tolist()
+
+class StockAnalytics:
+    """Indicators over daily bars, cached per (symbol set, window, lookback).
+
+    Entries expire after ``ttl`` seconds rather than on quote writes:
+    intraday ticks only move the last daily close, and a live feed would
+    otherwise clear the cache every second. Concurrent misses for the
+    same key share one computation.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.ttl = 300
+        self.backend = LRUCacheBackend(64)
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'compute_ms': 0.0}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.ttl = app.config.get('ANALYTICS_CACHE_TTL', 300)
+        self.backend = LRUCacheBackend(app.config.get('ANALYTICS_CACHE_SIZE', 64))
+        app.extensions['stock_analytics'] = self
+
+    def analyze(self, symbols, window, days, now=None):
+        symbols = tuple(sorted(set(symbols)))
+        key = ('analytics', symbols, window, days)
+        analysis = self.backend.get(key)
+        if analysis is not None:
+            self._count('hits')
+            return analysis
+
+        def compute():
+            started = time.perf_counter()
+            end = bucket_start(now or datetime.utcnow(), '1d') + timedelta(days=1)
+            dates, closes = load_closes(symbols, end - timedelta(days=days), end)
+            analysis = Analysis(symbols, window, dates, closes, self.ttl)
+            self.backend.set(key, analysis)
+            with self._lock:
+                self._stats['compute_ms'] = round((time.perf_counter() - started) * 1000, 3)
+            return analysis
+
+        self._count('misses')
+        return request_coalescer.do(key, compute)[0]
+
+    def _count(self, outcome):
+        with self._lock:
+            self._stats[outcome] += 1
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, entries=len(self.backend))
+
+stock_analytics = StockAnalytics()
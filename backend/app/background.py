@@ -0,0 +1,50 @@
+import os
+import threading
+
+class PeriodicWorker:
+    """Daemon thread that calls ``func`` every ``interval`` seconds.
+
+    Started lazily and re-started after a fork, so every gunicorn worker
+    runs its own copy without the master process holding a thread.
+    ``wake()`` runs ``func`` early without waiting for the interval.
+    """
+
+    def __init__(self, name, interval, func):
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def is_running(self):
+        return self._pid == os.getpid() and self._thread is not None and self._thread.is_alive()
+
+    def ensure_started(self):
+        if self.is_running():
+            return
+        with self._lock:
+            if self.is_running():
+                return
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def wake(self):
+        self.ensure_started()
+        self._wake.set()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                return
+            self.func()
@@ -0,0 +1,257 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import request, make_response, current_app
+from werkzeug.datastructures import Headers
+from app.coalesce import request_coalescer
+from app.compression import compressor
+from app.conditional import payload_etag
+from app.surrogate import add_surrogate_keys, surrogate_keys
+
+class CachedResponse:
+    """A response body as it was sent, plus what it takes to replay it.
+
+    ``variants`` holds the body compressed per content-coding, filled the
+    first time a client asks for that encoding; ``surrogate_keys`` are
+    the keys of what the original response was built from.
+    """
+
+    __slots__ = ('body', 'status', 'mimetype', 'etag', 'tags', 'expires_at', 'variants', 'surrogate_keys')
+
+    def __init__(self, body, status, mimetype, etag, tags, expires_at, surrogate_keys=frozenset()):
+        self.body = body
+        self.status = status
+        self.mimetype = mimetype
+        self.etag = etag
+        self.tags = tags
+        self.expires_at = expires_at
+        self.variants = {}
+        self.surrogate_keys = surrogate_keys
+
+class LRUCacheBackend:
+    """In-process cache bounded by entry count, with per-entry expiry"""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        """Store an entry, returning the (key, entry) pairs evicted to make room"""
+        evicted = []
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                evicted.append(self._entries.popitem(last=False))
+        return evicted
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+BACKENDS = {
+    'lru': LRUCacheBackend
+}
+
+def key_from_args(*names):
+    """Key function using the path and only the named query args"""
+    def make_key():
+        args = '&'.join(f'{name}={request.args.get(name, "")}' for name in names)
+        return f'{request.path}?{args}'
+    return make_key
+
+def default_key():
+    return f'{request.path}?{"&".join(f"{k}={v}" for k, v in sorted(request.args.items(multi=True)))}'
+
+class ResponseCache:
+    """Cache for public GET responses, invalidated by tag on writes.
+
+    Views opt in with ``@response_cache.cached(...)``; write routes call
+    ``response_cache.invalidate(tag, ...)`` after committing, which drops
+    every cached response carrying one of those tags here and, through
+    ``bus`` when one is attached, in every other worker.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.backend = None
+        self.enabled = True
+        self.default_ttl = 60
+        self._tag_index = {}
+        self._tag_versions = {}
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'invalidations': 0, 'evictions': 0}
+        self._endpoint_stats = {}
+        self._listeners = []
+        self.bus = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config.get('RESPONSE_CACHE_ENABLED', True)
+        self.default_ttl = app.config.get('RESPONSE_CACHE_DEFAULT_TTL', 60)
+        backend = BACKENDS[app.config.get('RESPONSE_CACHE_BACKEND', 'lru')]
+        self.backend = backend(app.config.get('RESPONSE_CACHE_MAX_ENTRIES', 1024))
+        app.extensions['response_cache'] = self
+
+    def cached(self, ttl=None, key=None, tags=()):
+        """Cache a GET view's 200 responses under ``key()`` for ``ttl`` seconds"""
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if not self.enabled or request.method != 'GET':
+                    return view(*args, **kwargs)
+
+                cache_key = (key or default_key)()
+                entry = self.backend.get(cache_key)
+                if entry is not None:
+                    self._count(request.endpoint, 'hits')
+                    response = current_app.response_class(entry.body, status=entry.status, mimetype=entry.mimetype)
+                    response.headers['X-Cache'] = 'HIT'
+                    response.set_etag(entry.etag)
+                    add_surrogate_keys(*entry.surrogate_keys)
+                    return compressor.compress_cached(response.make_conditional(request), entry)
+
+                def render():
+                    versions = self.tag_versions(tags)
+                    response = make_response(view(*args, **kwargs))
+                    if response.status_code == 200 and not response.is_streamed:
+                        self.store(cache_key, response, tags, ttl, versions)
+                    # Waiters get a copy taken before after_request hooks touch the response
+                    frozen = None if response.is_streamed else (
+                        response.get_data(), response.status_code, Headers(response.headers), surrogate_keys())
+                    return response, frozen
+
+                # Identical requests arriving during the miss wait for this one's response
+                (response, frozen), shared = request_coalescer.do(f'response:{cache_key}', render)
+                if not shared:
+                    self._count(request.endpoint, 'misses')
+                    response.headers['X-Cache'] = 'MISS'
+                    return response
+                if frozen is None:
+                    return view(*args, **kwargs)
+                self._count(request.endpoint, 'hits')
+                body, status, headers, keys = frozen
+                add_surrogate_keys(*keys)
+                response = current_app.response_class(body, status=status, headers=headers.copy())
+                response.headers['X-Cache'] = 'COALESCED'
+                return response
+            wrapper.cache_tags = tuple(tags)
+            return wrapper
+        return decorator
+
+    def tag_versions(self, tags):
+        """Snapshot of how often each tag has been invalidated"""
+        with self._lock:
+            return tuple(self._tag_versions.get(tag, 0) for tag in tags)
+
+    def store(self, cache_key, response, tags, ttl=None, versions=None):
+        """Cache a response unless one of its tags was invalidated since ``versions``"""
+        if versions is not None and versions != self.tag_versions(tags):
+            return False
+
+        body = response.get_data()
+        entry = CachedResponse(
+            body=body,
+            status=response.status_code,
+            mimetype=response.mimetype,
+            etag=payload_etag(body),
+            tags=tuple(tags),
+            expires_at=time.time() + (self.default_ttl if ttl is None else ttl),
+            surrogate_keys=surrogate_keys()
+        )
+        evicted = self.backend.set(cache_key, entry)
+        with self._lock:
+            for tag in entry.tags:
+                self._tag_index.setdefault(tag, set()).add(cache_key)
+            for evicted_key, evicted_entry in evicted:
+                for tag in evicted_entry.tags:
+                    self._tag_index.get(tag, set()).discard(evicted_key)
+            self._stats['evictions'] += len(evicted)
+        return True
+
+    def on_invalidate(self, callback, tags=None, local=True, remote=True):
+        """Call ``callback(tags)`` whenever one of ``tags`` (or any tag) is invalidated.
+
+        Lets derived caches, such as prebuilt payloads, follow the same
+        write-driven invalidation as cached responses. ``local`` and
+        ``remote`` choose between invalidations made in this process and
+        those received from other workers.
+        """
+        self._listeners.append((callback, frozenset(tags) if tags else None, local, remote))
+
+    def invalidate(self, *tags, publish=True):
+        """Drop every cached response carrying any of the given tags.
+
+        With ``publish`` the tags also go out on the bus; invalidations
+        received from it pass ``publish=False``.
+        """
+        with self._lock:
+            keys = set()
+            for tag in tags:
+                keys |= self._tag_index.pop(tag, set())
+                self._tag_versions[tag] = self._tag_versions.get(tag, 0) + 1
+            self._stats['invalidations'] += len(keys)
+
+        for cache_key in keys:
+            self.backend.delete(cache_key)
+
+        for callback, wanted, local, remote in self._listeners:
+            if (wanted is None or wanted.intersection(tags)) and (local if publish else remote):
+                callback(tags)
+
+        if publish and self.bus is not None:
+            self.bus.publish(tags)
+        return len(keys)
+
+    def known_tags(self):
+        """Every tag cached under, invalidated or listened for so far"""
+        with self._lock:
+            tags = set(self._tag_index) | set(self._tag_versions)
+        for _, wanted, _, _ in self._listeners:
+            tags |= wanted or set()
+        return tags
+
+    def clear(self):
+        with self._lock:
+            self._tag_index.clear()
+        self.backend.clear()
+
+    def _count(self, endpoint, outcome):
+        with self._lock:
+            self._stats[outcome] += 1
+            counters = self._endpoint_stats.setdefault(endpoint, {'hits': 0, 'misses': 0})
+            counters[outcome] += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self._stats['hits'] + self._stats['misses']
+            return dict(
+                self._stats,
+                entries=len(self.backend) if self.backend is not None else 0,
+                hit_ratio=round(self._stats['hits'] / lookups, 4) if lookups else 0.0,
+                endpoints={endpoint: dict(counters) for endpoint, counters in self._endpoint_stats.items()}
+            )
+
+response_cache = ResponseCache()
@@ -0,0 +1,126 @@
+from datetime import datetime
+from sqlalchemy import event, func, select
+from sqlalchemy.exc import OperationalError
+from app import db
+from app.dialects import try_advisory_xact_lock
+from app.models import Article, Category, Page, MenuItem, SiteSettings, ChangeLog
+
+# model -> (entity name in the change feed, attribute clients know it by)
+TRACKED = {
+    Article: ('articles', 'slug'),
+    Category: ('categories', 'slug'),
+    Page: ('pages', 'slug'),
+    MenuItem: ('menu_items', None),
+    SiteSettings: ('settings', 'setting_key')
+}
+ENTITIES = tuple(entity for entity, _ in TRACKED.values())
+
+# Advisory lock key serializing sequence_changes() on PostgreSQL
+SEQUENCE_LOCK = 0x6368616e6765
+
+class InvalidChangeToken(ValueError):
+    """Raised for a ``since`` token that is not a non-negative integer"""
+
+def change_row(entity, ref_id, key, action, now=None):
+    return {'entity': entity, 'ref_id': ref_id, 'key': key, 'action': action,
+            'changed_at': now or datetime.utcnow()}
+
+def record_changes(connection, rows):
+    """Append change rows inside the caller's transaction"""
+    if rows:
+        connection.execute(ChangeLog.__table__.insert(), rows)
+
+def _row_for(instance, action, now):
+    entity, key_attribute = TRACKED[type(instance)]
+    key = getattr(instance, key_attribute) if key_attribute else str(instance.id)
+    return change_row(entity, instance.id, key, action, now)
+
+@event.listens_for(db.session, 'after_flush')
+def _log_changes(session, flush_context):
+    # Written through the flush's connection, so the log commits (or rolls
+    # back) together with the change it describes
+    now = datetime.utcnow()
+    rows = []
+    for action, instances in (('created', session.new), ('deleted', session.deleted)):
+        rows.extend(_row_for(instance, action, now) for instance in instances if type(instance) in TRACKED)
+    rows.extend(
+        _row_for(instance, 'updated', now) for instance in session.dirty
+        if type(instance) in TRACKED and session.is_modified(instance)
+    )
+    record_changes(session.connection(), rows)
+
+def parse_token(value):
+    try:
+        token = int(value)
+    except (TypeError, ValueError):
+        raise InvalidChangeToken('since must be a change token')
+    if token < 0:
+        raise InvalidChangeToken('since must be a change token')
+    return token
+
+def sequence_changes():
+    """Give committed change rows without a token the next tokens, in id order.
+
+    Runs in its own transaction, so it only ever sees committed rows, and
+    one run at a time stamps from the highest token handed out so far: a
+    transaction that commits late gets a token above every one a client
+    may already hold. Returns how many rows were stamped; 0 when another
+    process is stamping, whose rows the next call will see.
+    """
+    table = ChangeLog.__table__
+    with db.engine.connect() as connection:
+        if connection.execute(select(table.c.id).where(table.c.seq.is_(None)).limit(1)).first() is None:
+            return 0
+    stamped = table.alias('stamped')
+    base = select(func.coalesce(func.max(stamped.c.seq), 0)).scalar_subquery()
+    numbered = select(
+        table.c.id, (base + func.row_number().over(order_by=table.c.id)).label('seq')
+    ).where(table.c.seq.is_(None)).subquery()
+    try:
+        with db.engine.begin() as connection:
+            if not try_advisory_xact_lock(connection, SEQUENCE_LOCK):
+                return 0
+            return connection.execute(
+                table.update().values(seq=numbered.c.seq).where(table.c.id == numbered.c.id)
+            ).rowcount
+    except OperationalError:
+        # SQLite: another writer holds the database; its rows wait for the next poll
+        return 0
+
+def current_token():
+    sequence_changes()
+    return db.session.query(func.max(ChangeLog.seq)).scalar() or 0
+
+def changes_since(since, entities=ENTITIES, limit=500):
+    """Changes after ``since``, collapsed to the latest action per record.
+
+    Stamps newly committed rows first, then reads one range of the change
+    log by token.
+    """
+    sequence_changes()
+    query = ChangeLog.query.filter(ChangeLog.seq > since)
+    if set(entities) != set(ENTITIES):
+        query = query.filter(ChangeLog.entity.in_(entities))
+    rows = query.order_by(ChangeLog.seq).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    latest = {}
+    for row in rows:
+        previous = latest.get((row.entity, row.ref_id))
+        action = row.action
+        # Created and then edited within the window is still new to the client
+        if previous is not None and previous['action'] == 'created' and action == 'updated':
+            action = 'created'
+        latest[(row.entity, row.ref_id)] = {'id': row.ref_id, 'key': row.key, 'action': action,
+                                            'token': row.seq, 'changed_at': row.changed_at}
+
+    changes = {entity: {'created': [], 'updated': [], 'deleted': []} for entity in entities}
+    for (entity, _), change in sorted(latest.items(), key=lambda item: item[1]['token']):
+        changes[entity][change.pop('action')].append(change)
+
+    return {
+        'changes': changes,
+        'next_token': rows[-1].seq if rows else since,
+        'has_more': has_more
+    }
@@ -0,0 +1,83 @@
+import threading
+
+class _Call:
+    """One in-flight computation and the requests waiting on it"""
+
+    __slots__ = ('done', 'result', 'error', 'waiters')
+
+    def __init__(self):
+        # Looked up per call: under gunicorn's gevent worker threading is
+        # monkey-patched, so waiting blocks only the waiting greenlet
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+class RequestCoalescer:
+    """Single-flight execution of identical concurrent work.
+
+    The first caller for a key runs the function; callers arriving while
+    it runs wait for its result instead of repeating it, and get its
+    exception re-raised if it fails. A waiter that has not been answered
+    within ``timeout`` seconds stops waiting and runs the function itself.
+    Only in-flight work is shared; nothing is kept once it completes.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.enabled = True
+        self.timeout = 10.0
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._stats = {'leaders': 0, 'followers': 0, 'timeouts': 0, 'errors': 0}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config.get('COALESCE_ENABLED', True)
+        self.timeout = app.config.get('COALESCE_TIMEOUT', 10.0)
+        app.extensions['request_coalescer'] = self
+
+    def do(self, key, func):
+        """Return ``(func() or the in-flight result for key, shared)``"""
+        if not self.enabled:
+            return func(), False
+
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._stats['leaders'] += 1
+            else:
+                call.waiters += 1
+                self._stats['followers'] += 1
+
+        if leader:
+            try:
+                call.result = func()
+            except Exception as e:
+                call.error = e
+                with self._lock:
+                    self._stats['errors'] += 1
+                raise
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+            return call.result, False
+
+        if not call.done.wait(self.timeout):
+            with self._lock:
+                self._stats['timeouts'] += 1
+            return func(), False
+        if call.error is not None:
+            raise call.error
+        return call.result, True
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, in_flight=len(self._calls))
+
+request_coalescer = RequestCoalescer()
@@ -0,0 +1,134 @@
+import gzip
+import threading
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - gzip only, with a warning at init_app
+    brotli = None
+
+def _gzip(body, level):
+    # Fixed mtime so the same body always compresses to the same bytes
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+def _brotli(body, level):
+    return brotli.compress(body, quality=level)
+
+class Compressor:
+    """gzip/brotli response compression driven by the COMPRESS_* settings.
+
+    Every eligible response is compressed in an ``after_request`` hook
+    using the best encoding the client accepts. Responses replayed from a
+    cache (cached responses, homepage snapshots) go through
+    ``compress_cached`` instead, which compresses each body once per
+    encoding and keeps the result in the cache entry's ``variants``.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.enabled = True
+        self.mimetypes = frozenset()
+        self.min_size = 500
+        self.algorithms = ()
+        self.levels = {}
+        self._lock = threading.Lock()
+        self._stats = {'compressed': 0, 'variant_hits': 0, 'variant_builds': 0, 'bytes_in': 0, 'bytes_out': 0}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config.get('COMPRESS_ENABLED', True)
+        self.mimetypes = frozenset(app.config.get('COMPRESS_MIMETYPES', ()))
+        self.min_size = app.config.get('COMPRESS_MIN_SIZE', 500)
+        self.levels = {
+            'gzip': app.config.get('COMPRESS_LEVEL', 6),
+            'br': app.config.get('COMPRESS_BR_LEVEL', 4)
+        }
+        available = {'gzip': _gzip, 'br': _brotli if brotli is not None else None}
+        configured = app.config.get('COMPRESS_ALGORITHM', ('br', 'gzip'))
+        for name in configured:
+            if available.get(name) is None:
+                app.logger.warning('COMPRESS_ALGORITHM %r is unavailable and will not be offered%s', name,
+                                   ' (install Brotli)' if name == 'br' else '')
+        self.algorithms = tuple(name for name in configured if available.get(name) is not None)
+        self._encoders = {name: available[name] for name in self.algorithms}
+        app.after_request(self.after_request)
+        app.extensions['compressor'] = self
+
+    def negotiate(self):
+        """Best encoding the client accepts, ties going to the configured order"""
+        accepted = request.accept_encodings
+        best, best_quality = None, 0
+        for name in self.algorithms:
+            quality = accepted.quality(name)
+            if quality > best_quality:
+                best, best_quality = name, quality
+        return best
+
+    def compress(self, body, encoding):
+        return self._encoders[encoding](body, self.levels[encoding])
+
+    def _eligible(self, response):
+        return (self.enabled and response.mimetype in self.mimetypes
+                and 200 <= response.status_code < 300 and response.status_code != 204
+                and not response.direct_passthrough and not response.is_streamed
+                and 'Content-Encoding' not in response.headers)
+
+    def _apply(self, response, body, encoding):
+        response.set_data(body)
+        response.headers['Content-Encoding'] = encoding
+        # Compressed bytes differ from the identity body; a strong validator
+        # would be wrong, so downgrade it the way most proxies do
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+
+    def after_request(self, response):
+        if not self._eligible(response):
+            return response
+        response.vary.add('Accept-Encoding')
+
+        body = response.get_data()
+        encoding = self.negotiate()
+        if encoding is None or len(body) < self.min_size:
+            return response
+
+        compressed = self.compress(body, encoding)
+        self._apply(response, compressed, encoding)
+        self._count(compressed=1, bytes_in=len(body), bytes_out=len(compressed))
+        return response
+
+    def compress_cached(self, response, entry):
+        """Compress a response replayed from ``entry``, reusing ``entry.variants``"""
+        if not self._eligible(response):
+            return response
+        response.vary.add('Accept-Encoding')
+
+        encoding = self.negotiate()
+        if encoding is None or len(entry.body) < self.min_size:
+            return response
+
+        compressed = entry.variants.get(encoding)
+        if compressed is None:
+            compressed = entry.variants[encoding] = self.compress(entry.body, encoding)
+            self._count(variant_builds=1)
+        else:
+            self._count(variant_hits=1)
+        self._apply(response, compressed, encoding)
+        self._count(compressed=1, bytes_in=len(entry.body), bytes_out=len(compressed))
+        return response
+
+    def _count(self, **amounts):
+        with self._lock:
+            for name, amount in amounts.items():
+                self._stats[name] += amount
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats['ratio'] = round(stats['bytes_out'] / stats['bytes_in'], 4) if stats['bytes_in'] else 0.0
+        stats['algorithms'] = list(self.algorithms)
+        return stats
+
+compressor = Compressor()
@@ -0,0 +1,54 @@
+import hashlib
+from flask import request, current_app
+from werkzeug.http import is_resource_modified
+
+def row_etag(*parts):
+    """Weak ETag from a row's identity and version, e.g. (id, updated_at)"""
+    version = ':'.join(part.isoformat() if hasattr(part, 'isoformat') else str(part) for part in parts)
+    return hashlib.sha1(version.encode('utf-8')).hexdigest()
+
+def payload_etag(body):
+    """Strong ETag from the serialized payload"""
+    return hashlib.sha1(body).hexdigest()
+
+def _last_modified(value):
+    # HTTP dates have one-second resolution; drop microseconds so the
+    # If-Modified-Since round trip compares equal
+    return value.replace(microsecond=0) if value is not None else None
+
+def not_modified(etag=None, last_modified=None, weak=True):
+    """Build a 304 if the request's validators still match, before serializing.
+
+    Returns ``None`` when the client needs the full body.
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return None
+    last_modified = _last_modified(last_modified)
+    if is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        return None
+
+    response = current_app.response_class(status=304)
+    if etag:
+        response.set_etag(etag, weak=weak)
+    if last_modified:
+        response.last_modified = last_modified
+    return response
+
+def add_validators(response, etag=None, last_modified=None, weak=True):
+    """Attach ETag/Last-Modified to a full response"""
+    if etag:
+        response.set_etag(etag, weak=weak)
+    if last_modified:
+        response.last_modified = _last_modified(last_modified)
+    return response
+
+def conditional_response(response):
+    """after_request hook: hash the body into an ETag and answer 304 when it matches"""
+    if request.method not in ('GET', 'HEAD') or response.status_code != 200 or response.direct_passthrough:
+        return response
+    if response.is_streamed:
+        return response
+
+    if 'ETag' not in response.headers:
+        response.set_etag(payload_etag(response.get_data()))
+    return response.make_conditional(request)
@@ -0,0 +1,203 @@
+import threading
+import uuid
+from collections import Counter
+from sqlalchemy import event, func, text
+from sqlalchemy.orm import attributes
+from app import db
+from app.dialects import upsert, supports_upsert
+from app.models import Article, Author, Category, Tag, ContentCounter, article_tags
+
+# The max UUID rather than the nil one: SQLite gives UUID columns numeric
+# affinity, and an all-zero hex string would be stored as the integer 0
+GLOBAL_ID = uuid.UUID(int=(1 << 128) - 1)
+SCOPES = ('global', 'category', 'author', 'tag')
+
+def get_count(scope='global', ref_id=GLOBAL_ID):
+    """Published-article count for a scope, read by primary key"""
+    count = db.session.query(ContentCounter.count).filter_by(scope=scope, ref_id=ref_id).scalar()
+    return count or 0
+
+def counter_keys(published, category_id, author_id, tag_ids):
+    """Counter keys an article in this state contributes to"""
+    if not published:
+        return []
+    keys = [('global', GLOBAL_ID)]
+    if category_id is not None:
+        keys.append(('category', category_id))
+    if author_id is not None:
+        keys.append(('author', author_id))
+    keys.extend(('tag', tag_id) for tag_id in tag_ids)
+    return keys
+
+def _committed(article, name):
+    history = attributes.get_history(article, name)
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(article, name)
+
+def _current_state(article):
+    return (bool(article.is_published), article.category_id, article.author_id,
+            [tag.id for tag in article.tags])
+
+@event.listens_for(db.session, 'before_flush')
+def _snapshot_articles(session, flush_context, instances):
+    # Remember what changed articles counted for before this flush, while
+    # their old tags can still be loaded
+    snapshots = session.info.setdefault('counter_snapshots', {})
+    dropped = session.info.setdefault('counter_dropped', set())
+    for instance in list(session.dirty) + list(session.deleted):
+        # Deleting a category, author or tag detaches its articles inside
+        # the flush, so its whole counter goes rather than article deltas
+        for scope, model in (('category', Category), ('author', Author), ('tag', Tag)):
+            if isinstance(instance, model) and instance in session.deleted:
+                dropped.add((scope, instance.id))
+        if not isinstance(instance, Article) or instance in snapshots:
+            continue
+        article = instance
+        tags = attributes.get_history(article, 'tags')
+        snapshots[article] = (
+            bool(_committed(article, 'is_published')),
+            _committed(article, 'category_id'),
+            _committed(article, 'author_id'),
+            [tag.id for tag in list(tags.unchanged) + list(tags.deleted)]
+        )
+
+@event.listens_for(db.session, 'after_flush')
+def _apply_counter_deltas(session, flush_context):
+    snapshots = session.info.pop('counter_snapshots', {})
+    dropped = session.info.pop('counter_dropped', set())
+    deltas = Counter()
+
+    for article in session.new:
+        if isinstance(article, Article):
+            deltas.update(counter_keys(*_current_state(article)))
+
+    for article, old_state in snapshots.items():
+        deltas.subtract(counter_keys(*old_state))
+        if article not in session.deleted:
+            deltas.update(counter_keys(*_current_state(article)))
+
+    deltas = {key: delta for key, delta in deltas.items() if delta and key not in dropped}
+    if deltas:
+        apply_deltas(session.connection(), deltas)
+
+    table = ContentCounter.__table__
+    for scope, ref_id in dropped:
+        session.connection().execute(table.delete().where(
+            table.c.scope == scope,
+            table.c.ref_id == ref_id
+        ))
+
+def apply_deltas(connection, deltas):
+    """Add ``{(scope, ref_id): delta}`` to the counters inside the caller's transaction"""
+    table = ContentCounter.__table__
+    rows = [{'scope': scope, 'ref_id': ref_id, 'count': delta} for (scope, ref_id), delta in deltas.items()]
+
+    if supports_upsert(connection):
+        statement = upsert(table, connection)
+        connection.execute(statement.on_conflict_do_update(
+            index_elements=[table.c.scope, table.c.ref_id],
+            set_={'count': table.c.count + statement.excluded['count']}
+        ), rows)
+        return
+
+    for row in rows:
+        updated = connection.execute(table.update().where(
+            table.c.scope == row['scope'],
+            table.c.ref_id == row['ref_id']
+        ).values(count=table.c.count + row['count']))
+        if not updated.rowcount:
+            connection.execute(table.insert(), row)
+
+def _lock_counters(connection):
+    """On PostgreSQL, hold off concurrent deltas until the transaction ends"""
+    if connection.dialect.name == 'postgresql':
+        connection.execute(text('LOCK TABLE content_counters IN SHARE ROW EXCLUSIVE MODE'))
+
+def reconcile_counters():
+    """Rebuild every counter from the articles table.
+
+    A full recount: run it from the CLI or cron, not from request
+    workers. On PostgreSQL the counters table is locked against
+    concurrent deltas first, so no write can slip in between the recount
+    and the swap.
+    """
+    _lock_counters(db.session.connection())
+
+    published = Article.is_published == True
+    exact = {('global', GLOBAL_ID): db.session.query(func.count(Article.id)).filter(published).scalar()}
+    for scope, column in (('category', Article.category_id), ('author', Article.author_id)):
+        rows = db.session.query(column, func.count(Article.id)).filter(published, column.isnot(None)).group_by(column)
+        exact.update({(scope, ref_id): count for ref_id, count in rows})
+    rows = db.session.query(article_tags.c.tag_id, func.count(Article.id)).join(
+        Article, Article.id == article_tags.c.article_id
+    ).filter(published).group_by(article_tags.c.tag_id)
+    exact.update({('tag', ref_id): count for ref_id, count in rows})
+
+    stale = 0
+    for counter in ContentCounter.query.all():
+        key = (counter.scope, counter.ref_id)
+        if key in exact:
+            if counter.count != exact[key]:
+                counter.count = exact[key]
+                stale += 1
+            del exact[key]
+        elif counter.count:
+            counter.count = 0
+            stale += 1
+
+    db.session.add_all([ContentCounter(scope=scope, ref_id=ref_id, count=count)
+                        for (scope, ref_id), count in exact.items()])
+    db.session.commit()
+    return stale + len(exact)
+
+def _seeded():
+    return db.session.query(ContentCounter.count).filter_by(scope='global', ref_id=GLOBAL_ID).first() is not None
+
+def seed_counters():
+    """Build the counters once for a database that has none; True if this call built them.
+
+    The global counter exists from the first seed or published write on,
+    so later calls cost one primary-key lookup. Workers starting together
+    queue on the table lock and only the first one recounts.
+    """
+    if _seeded():
+        return False
+    _lock_counters(db.session.connection())
+    if _seeded():
+        db.session.commit()
+        return False
+    reconcile_counters()
+    return True
+
+class CounterSeeder:
+    """Seeds the counters before a worker's first request on a database that predates them"""
+
+    def __init__(self, app=None):
+        self.app = None
+        self.seeded = False
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions['counter_seeder'] = self
+        app.before_request(self.ensure_seeded)
+
+    def ensure_seeded(self):
+        if self.seeded:
+            return
+        with self._lock:
+            if self.seeded:
+                return
+            try:
+                if seed_counters():
+                    self.app.logger.info('Seeded content counters from the articles table')
+                self.seeded = True
+            except Exception:
+                # Counters read as zero until a later request manages to seed them
+                db.session.rollback()
+                self.app.logger.exception('Failed to seed content counters')
+
+counter_seeder = CounterSeeder()
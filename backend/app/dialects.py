@@ -0,0 +1,48 @@
+from sqlalchemy import Float, Integer, cast, extract, func, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+def upsert(table, bind):
+    """Dialect-specific INSERT supporting ``on_conflict_do_update``.
+
+    PostgreSQL and SQLite share the ``INSERT ... ON CONFLICT`` syntax;
+    other backends get a plain INSERT and callers must not rely on the
+    conflict clause there.
+    """
+    dialect = bind.dialect.name
+    if dialect == 'postgresql':
+        return postgresql.insert(table)
+    if dialect == 'sqlite':
+        return sqlite.insert(table)
+    return insert(table)
+
+def supports_upsert(bind):
+    return bind.dialect.name in ('postgresql', 'sqlite')
+
+def greatest(bind, *values):
+    """GREATEST(); SQLite's multi-argument max() is the same function"""
+    return func.max(*values) if bind.dialect.name == 'sqlite' else func.greatest(*values)
+
+def least(bind, *values):
+    return func.min(*values) if bind.dialect.name == 'sqlite' else func.least(*values)
+
+def epoch_days(bind, column):
+    """Whole days from 1970-01-01 to a timestamp column, computed by the database"""
+    if bind.dialect.name == 'sqlite':
+        return cast(func.julianday(column) - 2440587.5, Integer)
+    return cast(func.floor(extract('epoch', column) / 86400), Integer)
+
+def epoch_seconds(bind, column):
+    """Seconds from 1970-01-01 to a timestamp column, as a float"""
+    if bind.dialect.name == 'sqlite':
+        return (func.julianday(column) - 2440587.5) * 86400
+    return cast(extract('epoch', column), Float)
+
+def try_advisory_xact_lock(connection, key):
+    """Take a transaction-scoped PostgreSQL advisory lock without waiting.
+
+    Other backends have no advisory locks and report success; SQLite
+    serializes writers by itself.
+    """
+    if connection.dialect.name != 'postgresql':
+        return True
+    return connection.execute(select(func.pg_try_advisory_xact_lock(key))).scalar()
@@ -0,0 +1,104 @@
+import csv
+import io
+from flask import current_app, stream_with_context
+from marshmallow import fields
+from sqlalchemy import select
+from app import db
+
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
+
+# Tables the admin export may stream; anything else (users, authors, ...) is not exportable
+EXPORTABLE_TABLES = frozenset({'articles', 'categories', 'tags', 'article_tags'})
+
+class InvalidExportFormat(ValueError):
+    """Raised for a ``format`` other than ndjson or csv"""
+
+def export_format(value):
+    value = (value or 'ndjson').lower()
+    if value not in FORMATS:
+        raise InvalidExportFormat(f'format must be one of {", ".join(FORMATS)}')
+    return value
+
+def schema_columns(schema, prefix=''):
+    """CSV header for a schema: nested objects as dotted columns, lists as one column"""
+    columns = []
+    for name, field in schema.dump_fields.items():
+        if isinstance(field, fields.Nested) and not field.many:
+            columns.extend(schema_columns(field.schema, f'{prefix}{name}.'))
+        else:
+            columns.append(f'{prefix}{name}')
+    return columns
+
+def query_partitions(query, size):
+    """Serve an ORM query from a server-side cursor, ``size`` objects at a time"""
+    partition = []
+    for item in query.yield_per(size):
+        partition.append(item)
+        if len(partition) >= size:
+            yield partition
+            partition = []
+    if partition:
+        yield partition
+
+def table_partitions(table, size):
+    """Stream a whole table as lists of row dicts in primary-key order"""
+    statement = select(*table.columns).order_by(*table.primary_key.columns)
+    result = db.session.execute(statement.execution_options(stream_results=True, yield_per=size))
+    for partition in result.mappings().partitions():
+        yield [dict(row) for row in partition]
+
+def _flatten(row, prefix=''):
+    """One CSV cell per scalar; nested objects become dotted columns, lists JSON"""
+    flat = {}
+    for key, value in row.items():
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f'{prefix}{key}.'))
+        elif isinstance(value, (list, tuple)):
+            flat[f'{prefix}{key}'] = current_app.json.dumps(value)
+        elif hasattr(value, 'isoformat'):
+            flat[f'{prefix}{key}'] = value.isoformat()
+        else:
+            flat[f'{prefix}{key}'] = value
+    return flat
+
+def _export_default(value):
+    """ISO 8601 timestamps like the CSV cells, rather than the API's HTTP dates"""
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+def _ndjson(partitions):
+    dumps = current_app.json.dumps
+    for partition in partitions:
+        yield ''.join(dumps(row, default=_export_default) + '\n' for row in partition)
+
+def _csv(partitions, columns):
+    buffer = io.StringIO()
+    writer = None
+    for partition in partitions:
+        rows = [_flatten(row) for row in partition]
+        if writer is None:
+            # Without a fixed column list the first row decides the header
+            writer = csv.DictWriter(buffer, fieldnames=columns or list(rows[0]), extrasaction='ignore')
+            writer.writeheader()
+        writer.writerows(rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if writer is None and columns:
+        csv.writer(buffer).writerow(columns)
+        yield buffer.getvalue()
+
+def export_response(partitions, format, filename, columns=None):
+    """Generator response writing each partition as soon as it is fetched.
+
+    ``partitions`` yields lists of row dicts; only one is held in memory
+    at a time, whatever the size of the export.
+    """
+    body = _ndjson(partitions) if format == 'ndjson' else _csv(partitions, columns)
+    response = current_app.response_class(stream_with_context(body), mimetype=FORMATS[format])
+    response.headers['Content-Disposition'] = f'attachment; filename={filename}.{format}'
+    return response
@@ -0,0 +1,162 @@
+import threading
+import time
+from flask import current_app
+from sqlalchemy import desc
+from app import db
+from app.background import PeriodicWorker
+from app.cache import response_cache
+from app.coalesce import request_coalescer
+from app.conditional import payload_etag
+from app.counters import get_count
+from app.models import Article, Category, ContentCounter
+from app.projections import ARTICLE_PROJECTIONS, article_serializer_for
+from app.queries import article_query
+from app.surrogate import add_surrogate_keys, collect_surrogate_keys, entity_key
+from app.trending import get_trending_articles
+
+RECENT_LIMIT = 6
+FEATURED_LIMIT = 3
+TRENDING_LIMIT = 5
+CATEGORY_LIMIT = 6
+
+class Snapshot:
+    """Serialized homepage payload for one locale, plus its compressed variants"""
+
+    __slots__ = ('body', 'etag', 'built_at', 'variants', 'surrogate_keys')
+
+    def __init__(self, body, etag, built_at, surrogate_keys=frozenset()):
+        self.body = body
+        self.etag = etag
+        self.built_at = built_at
+        self.variants = {}
+        self.surrogate_keys = surrogate_keys
+
+def build_homepage_payload(locale):
+    """Compute the whole homepage in one pass.
+
+    Recent and featured share a single ranked fetch, and every article is
+    serialized once even when it appears in several sections.
+    """
+    fields = ARTICLE_PROJECTIONS['card']
+    serializer = article_serializer_for(fields)
+
+    ranked = article_query(fields).filter(
+        Article.is_published == True
+    ).order_by(desc(Article.published_at)).limit(max(RECENT_LIMIT, FEATURED_LIMIT)).all()
+    trending = get_trending_articles('24h', TRENDING_LIMIT, fields=fields)
+
+    dumped = {}
+    def dump(article):
+        if article.id not in dumped:
+            dumped[article.id] = serializer.dump(article)
+        return dumped[article.id]
+
+    categories = db.session.query(
+        Category.id,
+        Category.name,
+        Category.slug,
+        Category.description,
+        ContentCounter.count.label('article_count')
+    ).join(ContentCounter, db.and_(
+        ContentCounter.scope == 'category',
+        ContentCounter.ref_id == Category.id
+    )).filter(ContentCounter.count > 0)\
+     .order_by(desc(ContentCounter.count))\
+     .limit(CATEGORY_LIMIT).all()
+    add_surrogate_keys(*(entity_key('category', cat.id) for cat in categories))
+
+    return {
+        'success': True,
+        'data': {
+            'trending_articles': [dump(article) for article in trending],
+            'recent_articles': [dump(article) for article in ranked[:RECENT_LIMIT]],
+            'featured_articles': [dump(article) for article in ranked[:FEATURED_LIMIT]],
+            'categories': [
+                {
+                    'id': cat.id,
+                    'name': cat.name,
+                    'slug': cat.slug,
+                    'description': cat.description,
+                    'articleCount': cat.article_count
+                }
+                for cat in categories
+            ],
+            'total_articles': get_count(),
+            'locale': locale
+        }
+    }
+
+class HomepageSnapshots:
+    """Prebuilt homepage bodies, swapped atomically when rebuilt.
+
+    Requests only read the current snapshot for their locale; a locale
+    outside ``SUPPORTED_LOCALES`` is served the default one, so there is
+    one snapshot per supported locale at most. Content
+    changes (any invalidation of the article, category or trending tags)
+    and a timer wake a background rebuild; readers keep getting the
+    previous bytes until the replacement is complete.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.worker = None
+        self.locales = ('en',)
+        self._snapshots = {}
+        self._build_lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.locales = tuple(app.config.get('SUPPORTED_LOCALES') or ('en',))
+        self.worker = PeriodicWorker('homepage-snapshot', app.config.get('HOMEPAGE_SNAPSHOT_INTERVAL', 60),
+                                     self.rebuild_all)
+        app.extensions['homepage_snapshots'] = self
+        response_cache.on_invalidate(self._content_changed, tags=('articles', 'categories', 'trending'))
+
+    def resolve(self, locale):
+        """The locale a request is served: itself if supported, else the default"""
+        return locale if locale in self.locales else self.locales[0]
+
+    def get(self, locale):
+        """Current snapshot for a locale, building it on first use"""
+        locale = self.resolve(locale)
+        snapshot = self._snapshots.get(locale)
+        if snapshot is not None:
+            return snapshot
+
+        # Requests for a locale still being built wait for that build
+        snapshot, _ = request_coalescer.do(f'homepage:{locale}',
+                                           lambda: self._snapshots.get(locale) or self.build(locale))
+        self.worker.ensure_started()
+        return snapshot
+
+    def build(self, locale):
+        with collect_surrogate_keys() as keys:
+            body = current_app.json.response(build_homepage_payload(locale)).get_data()
+        snapshot = Snapshot(body, payload_etag(body), time.time(), frozenset(keys))
+
+        # Replace the whole mapping so readers never see a partial update
+        self._snapshots = dict(self._snapshots, **{locale: snapshot})
+        return snapshot
+
+    def rebuild_all(self):
+        with self.app.app_context():
+            for locale in list(self._snapshots):
+                try:
+                    with self._build_lock:
+                        self.build(locale)
+                except Exception:
+                    db.session.rollback()
+                    self.app.logger.exception('Failed to rebuild homepage snapshot for %s', locale)
+
+    def _content_changed(self, tags):
+        if self._snapshots:
+            self.worker.wake()
+
+    def stats(self):
+        now = time.time()
+        return {locale: {'age_seconds': round(now - snapshot.built_at, 3), 'bytes': len(snapshot.body)}
+                for locale, snapshot in self._snapshots.items()}
+
+homepage_snapshots = HomepageSnapshots()
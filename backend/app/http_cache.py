@@ -0,0 +1,180 @@
+import json
+import threading
+from datetime import datetime
+from flask import g, request, current_app, has_request_context
+from sqlalchemy import event
+from app import db
+from app.cache import response_cache
+from app.surrogate import KEY_PREFIXES, MAX_SURROGATE_KEYS, instance_key, surrogate_keys
+
+@event.listens_for(db.session, 'after_flush')
+def _collect_purge_keys(session, flush_context):
+    keys = session.info.setdefault('purge_keys', set())
+    for instances in (session.new, session.deleted):
+        keys.update(instance_key(instance) for instance in instances if type(instance) in KEY_PREFIXES)
+    keys.update(instance_key(instance) for instance in session.dirty
+                if type(instance) in KEY_PREFIXES and session.is_modified(instance))
+
+@event.listens_for(db.session, 'after_commit')
+def _purge_committed(session):
+    keys = session.info.pop('purge_keys', None)
+    if keys:
+        http_cache.purge(*keys)
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_purge_keys(session):
+    session.info.pop('purge_keys', None)
+
+class CachePolicy:
+    """Cache-Control for shared and browser caches, in seconds"""
+
+    __slots__ = ('max_age', 's_maxage', 'stale_while_revalidate', 'stale_if_error', 'header')
+
+    def __init__(self, max_age=0, s_maxage=None, stale_while_revalidate=None, stale_if_error=None):
+        self.max_age = max_age
+        self.s_maxage = s_maxage
+        self.stale_while_revalidate = stale_while_revalidate
+        self.stale_if_error = stale_if_error
+        directives = ['public', f'max-age={max_age}']
+        for name, value in (('s-maxage', s_maxage), ('stale-while-revalidate', stale_while_revalidate),
+                            ('stale-if-error', stale_if_error)):
+            if value is not None:
+                directives.append(f'{name}={value}')
+        self.header = ', '.join(directives)
+
+def cache_policy(name, keys=()):
+    """Serve a view's GET responses with the named policy from ``HTTP_CACHE_POLICIES``.
+
+    ``keys`` are collection keys added to every response's Surrogate-Key,
+    on top of the view's response-cache tags and the ids it loaded.
+    ``cache_policy(None)`` opts a view out of its blueprint's policy.
+    """
+    def decorator(view):
+        view.cache_policy = (name, tuple(keys))
+        return view
+    return decorator
+
+class NullPurger:
+    def purge(self, keys):
+        pass
+
+class LogPurger:
+    """Appends each purge as a JSON line to ``path``, or logs it when no path is set"""
+
+    def __init__(self, app):
+        self.app = app
+        self.path = app.config.get('HTTP_CACHE_PURGE_LOG')
+        self._lock = threading.Lock()
+
+    def purge(self, keys):
+        if not self.path:
+            self.app.logger.info('Purge surrogate keys: %s', ' '.join(keys))
+            return
+        line = json.dumps({'purged_at': datetime.utcnow().isoformat(), 'keys': list(keys)})
+        with self._lock, open(self.path, 'a', encoding='utf-8') as log:
+            log.write(line + '\n')
+
+PURGERS = {
+    'none': lambda app: NullPurger(),
+    'log': LogPurger
+}
+
+class HttpCache:
+    """Cache-Control and Surrogate-Key headers for CDN caching, and purging.
+
+    Views declare a named policy with ``@cache_policy(name)``, or inherit
+    one set for their blueprint with ``blueprint_policy``. Surrogate keys
+    are the view's collection keys plus one ``article-<id>``,
+    ``category-<id>`` or ``menu-<id>`` key per instance the request
+    loaded. Committed writes to those models, and every local response
+    cache invalidation, send the affected keys to the configured purger
+    once the request is done.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.enabled = True
+        self.policies = {}
+        self.purger = NullPurger()
+        self._blueprints = {}
+        self._lock = threading.Lock()
+        self._stats = {'purges': 0, 'purged_keys': 0, 'errors': 0}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config.get('HTTP_CACHE_ENABLED', True)
+        self.policies = {name: CachePolicy(**settings)
+                         for name, settings in app.config.get('HTTP_CACHE_POLICIES', {}).items()}
+        self.purger = PURGERS[app.config.get('HTTP_CACHE_PURGER', 'none')](app)
+        app.before_request(self._start_collecting)
+        app.after_request(self.after_request)
+        app.teardown_request(self._flush_purges)
+        app.extensions['http_cache'] = self
+        response_cache.on_invalidate(self._tags_invalidated, remote=False)
+
+    def blueprint_policy(self, blueprint, name, keys=()):
+        """Default policy for every view of ``blueprint`` without its own"""
+        self._blueprints[blueprint.name] = (name, tuple(keys))
+
+    def _policy_for(self, view):
+        declared = getattr(view, 'cache_policy', None)
+        if declared is None:
+            declared = self._blueprints.get(request.blueprint)
+        if declared is None or declared[0] is None:
+            return None, ()
+        return self.policies[declared[0]], declared[1] + tuple(getattr(view, 'cache_tags', ()))
+
+    def _start_collecting(self):
+        g.surrogate_keys = set()
+
+    def after_request(self, response):
+        if not self.enabled or request.method not in ('GET', 'HEAD') or response.status_code not in (200, 304):
+            return response
+        policy, collection_keys = self._policy_for(current_app.view_functions.get(request.endpoint))
+        if policy is None or 'Cache-Control' in response.headers:
+            return response
+
+        response.headers['Cache-Control'] = policy.header
+        entity_keys = sorted(surrogate_keys())
+        if len(entity_keys) > MAX_SURROGATE_KEYS:
+            entity_keys = []
+        keys = list(dict.fromkeys(collection_keys)) + entity_keys
+        if keys:
+            response.headers['Surrogate-Key'] = ' '.join(keys)
+        return response
+
+    def _tags_invalidated(self, tags):
+        self.purge(*tags)
+
+    def purge(self, *keys):
+        """Purge keys from the CDN; inside a request they go out together at teardown"""
+        if has_request_context():
+            g.setdefault('purge_keys', set()).update(keys)
+            return
+        self._send(keys)
+
+    def _flush_purges(self, exc=None):
+        keys = g.pop('purge_keys', None)
+        if keys:
+            self._send(keys)
+
+    def _send(self, keys):
+        keys = sorted(set(keys))
+        try:
+            self.purger.purge(keys)
+        except Exception:
+            with self._lock:
+                self._stats['errors'] += 1
+            self.app.logger.exception('Failed to purge surrogate keys')
+            return
+        with self._lock:
+            self._stats['purges'] += 1
+            self._stats['purged_keys'] += len(keys)
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+http_cache = HttpCache()
@@ -0,0 +1,229 @@
+import uuid
+from collections import Counter
+from datetime import datetime
+from flask import current_app
+from marshmallow import ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+from app import db
+from app.cache import response_cache
+from app.changes import change_row, record_changes
+from app.counters import counter_keys, apply_deltas
+from app.dialects import upsert, supports_upsert
+from app.http_cache import http_cache
+from app.models import Article, Author, Category, Tag, article_tags
+from app.related import related_index
+from app.schemas import ArticleImportSchema
+from app.surrogate import entity_key
+
+# Columns an import line may replace on an existing article; only those the line sends are
+UPDATE_COLUMNS = ('title', 'content', 'excerpt', 'image_url', 'image_alt', 'published_at',
+                  'is_published', 'author_id', 'category_id')
+
+# Values for optional columns a line leaves out, used only when it creates the article
+INSERT_DEFAULTS = {'excerpt': None, 'image_url': None, 'image_alt': None, 'is_published': False,
+                   'category_id': None}
+
+def _error(line, message, slug=None):
+    return {'line': line, 'slug': slug, 'status': 'error', 'error': message}
+
+class ArticleImporter:
+    """Upserts articles by slug from NDJSON lines, one transaction per batch.
+
+    Lines are validated with ``ArticleImportSchema`` as they arrive.
+    Authors (by email), categories and tags (by slug) referenced in a batch
+    are looked up with one query per kind and kept for later batches, and
+    the batch is written with a single ``INSERT ... ON CONFLICT (slug)``.
+    Counters, the change log, the related-articles index and the response
+    cache are updated the same way the ORM write paths update them.
+    """
+
+    def __init__(self, batch_size=500):
+        self.batch_size = batch_size
+        self.schema = ArticleImportSchema()
+        self.authors = {}
+        self.categories = {}
+        self.tags = {}
+        self.totals = Counter()
+
+    def run(self, lines):
+        """Yield one result dict per non-blank line, then a summary"""
+        batch = []
+        slugs = set()
+        for number, raw in enumerate(lines, 1):
+            if not raw.strip():
+                continue
+            try:
+                data = self.schema.load(current_app.json.loads(raw))
+            except ValidationError as e:
+                batch.append((number, None, _error(number, e.messages)))
+            except ValueError:
+                batch.append((number, None, _error(number, 'Invalid JSON')))
+            else:
+                # The same slug twice in one INSERT ... ON CONFLICT is an error
+                if data['slug'] in slugs:
+                    yield from self._flush(batch)
+                    batch, slugs = [], set()
+                batch.append((number, data, None))
+                slugs.add(data['slug'])
+
+            if len(batch) >= self.batch_size:
+                yield from self._flush(batch)
+                batch, slugs = [], set()
+
+        yield from self._flush(batch)
+        yield {'summary': dict(lines=sum(self.totals.values()), created=self.totals['created'],
+                               updated=self.totals['updated'], errors=self.totals['error'])}
+
+    def _flush(self, batch):
+        if not batch:
+            return
+        results = {number: error for number, _, error in batch if error is not None}
+        pending = [(number, data) for number, data, error in batch if error is None]
+
+        self._resolve(pending)
+        rows = []
+        for number, data in pending:
+            row, problem = self._row(data)
+            if problem:
+                results[number] = _error(number, problem, data['slug'])
+            else:
+                rows.append((number, row, data.get('tags')))
+
+        if rows:
+            try:
+                statuses, ids = self._write(rows)
+                db.session.commit()
+            except SQLAlchemyError as e:
+                db.session.rollback()
+                current_app.logger.exception('Article import batch failed')
+                message = f'Batch failed: {getattr(e, "orig", None) or e}'
+                statuses = {}
+                for number, row, _ in rows:
+                    results[number] = _error(number, message, row['slug'])
+            else:
+                response_cache.invalidate('articles')
+                related_index.queue(ids)
+                http_cache.purge(*(entity_key('article', article_id) for article_id in ids))
+            for number, row, _ in rows:
+                if number not in results:
+                    results[number] = {'line': number, 'slug': row['slug'], 'status': statuses[row['slug']]}
+
+        for number in sorted(results):
+            self.totals[results[number]['status']] += 1
+            yield results[number]
+
+    def _resolve(self, pending):
+        """Load every author, category and tag the batch needs that is not cached yet"""
+        wanted = {
+            'authors': {data['author_email'] for _, data in pending} - self.authors.keys(),
+            'categories': {data['category'] for _, data in pending if data.get('category')} - self.categories.keys(),
+            'tags': {slug for _, data in pending for slug in data.get('tags') or ()} - self.tags.keys()
+        }
+        if wanted['authors']:
+            self.authors.update(db.session.query(Author.email, Author.id).filter(Author.email.in_(wanted['authors'])))
+        if wanted['categories']:
+            self.categories.update(db.session.query(Category.slug, Category.id).filter(Category.slug.in_(wanted['categories'])))
+        if wanted['tags']:
+            self.tags.update(db.session.query(Tag.slug, Tag.id).filter(Tag.slug.in_(wanted['tags'])))
+
+    def _row(self, data):
+        """Column values the line sets, or an error for unknown references"""
+        author_id = self.authors.get(data['author_email'])
+        if author_id is None:
+            return None, f'Unknown author: {data["author_email"]}'
+        row = {'slug': data['slug'], 'title': data['title'], 'content': data['content'], 'author_id': author_id}
+        if 'category' in data:
+            row['category_id'] = None
+            if data['category']:
+                row['category_id'] = self.categories.get(data['category'])
+                if row['category_id'] is None:
+                    return None, f'Unknown category: {data["category"]}'
+        unknown = [slug for slug in data.get('tags') or () if slug not in self.tags]
+        if unknown:
+            return None, f'Unknown tags: {", ".join(unknown)}'
+
+        for name in ('excerpt', 'image_url', 'image_alt', 'is_published'):
+            if name in data:
+                row[name] = data[name]
+        # An explicit null publication date still means "now"
+        if 'published_at' in data:
+            row['published_at'] = data['published_at'] or datetime.utcnow()
+        return row, None
+
+    def _write(self, rows):
+        """Upsert a batch; returns ({slug: 'created' | 'updated'}, article ids)"""
+        connection = db.session.connection()
+        table = Article.__table__
+        now = datetime.utcnow()
+
+        slugs = [row['slug'] for _, row, _ in rows]
+        existing = {
+            slug: (article_id, published, category_id, author_id)
+            for article_id, slug, published, category_id, author_id in db.session.query(
+                Article.id, Article.slug, Article.is_published, Article.category_id, Article.author_id
+            ).filter(Article.slug.in_(slugs))
+        }
+        old_tags = {}
+        if existing:
+            for article_id, tag_id in connection.execute(article_tags.select().where(
+                article_tags.c.article_id.in_([state[0] for state in existing.values()])
+            )):
+                old_tags.setdefault(article_id, []).append(tag_id)
+
+        # Lines sending the same columns share one statement; defaults only fill the INSERT half
+        groups = {}
+        for _, row, _ in rows:
+            param = {**INSERT_DEFAULTS, 'published_at': now, **row,
+                     'id': existing[row['slug']][0] if row['slug'] in existing else uuid.uuid4(),
+                     'created_at': now, 'updated_at': now, 'views': 0}
+            updated = tuple(column for column in UPDATE_COLUMNS if column in row) + ('updated_at',)
+            groups.setdefault(updated, []).append(param)
+
+        ids = {}
+        for updated, params in groups.items():
+            if supports_upsert(connection):
+                statement = upsert(table, connection)
+                statement = statement.on_conflict_do_update(
+                    index_elements=[table.c.slug],
+                    set_={column: statement.excluded[column] for column in updated}
+                ).returning(table.c.id, table.c.slug)
+                ids.update((slug, article_id) for article_id, slug in connection.execute(statement, params))
+            else:
+                new = [param for param in params if param['slug'] not in existing]
+                for param in params:
+                    if param['slug'] in existing:
+                        connection.execute(table.update().where(table.c.slug == param['slug']).values(
+                            {column: param[column] for column in updated}
+                        ))
+                if new:
+                    connection.execute(table.insert(), new)
+                ids.update((param['slug'], param['id']) for param in params)
+
+        # Replace tags only for lines that listed them
+        retagged = {ids[row['slug']]: [self.tags[slug] for slug in dict.fromkeys(tags)]
+                    for _, row, tags in rows if tags is not None}
+        if retagged:
+            connection.execute(article_tags.delete().where(article_tags.c.article_id.in_(list(retagged))))
+            pairs = [{'article_id': article_id, 'tag_id': tag_id}
+                     for article_id, tag_ids in retagged.items() for tag_id in tag_ids]
+            if pairs:
+                connection.execute(article_tags.insert(), pairs)
+
+        deltas = Counter()
+        for _, row, _ in rows:
+            article_id = ids[row['slug']]
+            published, category_id = INSERT_DEFAULTS['is_published'], INSERT_DEFAULTS['category_id']
+            if row['slug'] in existing:
+                old_id, published, category_id, author_id = existing[row['slug']]
+                deltas.subtract(counter_keys(bool(published), category_id, author_id, old_tags.get(old_id, [])))
+            tag_ids = retagged.get(article_id, old_tags.get(article_id, []))
+            deltas.update(counter_keys(bool(row.get('is_published', published)), row.get('category_id', category_id),
+                                       row['author_id'], tag_ids))
+        deltas = {key: delta for key, delta in deltas.items() if delta}
+        if deltas:
+            apply_deltas(connection, deltas)
+
+        statuses = {slug: 'updated' if slug in existing else 'created' for slug in slugs}
+        record_changes(connection, [change_row('articles', ids[slug], slug, status, now)
+                                    for slug, status in statuses.items()])
+        return statuses, list(ids.values())
@@ -0,0 +1,206 @@
+import json
+import os
+import select
+import threading
+import time
+import uuid
+from datetime import datetime
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from app import db
+from app.background import PeriodicWorker
+from app.cache import response_cache
+from app.dialects import upsert
+from app.models import CacheTagVersion
+
+CHANNEL = 'cache_invalidation'
+TRANSPORTS = ('notify', 'poll')
+
+class InvalidationBus:
+    """Carries cache invalidations between worker processes and nodes.
+
+    ``response_cache.invalidate`` evicts locally and then publishes its
+    tags here; every other process evicts the same tags from its own
+    cache, which also runs its invalidation listeners (homepage
+    snapshots, sitemaps). On PostgreSQL tags travel over
+    ``LISTEN/NOTIFY``. Elsewhere each publish bumps the tag's row in
+    ``cache_tag_versions`` and workers poll that table, which holds one
+    row per tag and so stays a few rows long.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.worker = None
+        self.transport = None
+        self.poll_interval = 1.0
+        self._origin = None
+        self._origin_pid = None
+        self._versions = None
+        self._listener = None
+        self._listener_pid = None
+        self._lock = threading.Lock()
+        self._stats = {'published': 0, 'received': 0, 'errors': 0}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        transport = app.config.get('INVALIDATION_BUS', 'auto')
+        if transport == 'auto':
+            backend = make_url(app.config['SQLALCHEMY_DATABASE_URI']).get_backend_name()
+            transport = 'notify' if backend == 'postgresql' else 'poll'
+        app.extensions['invalidation_bus'] = self
+        if transport not in TRANSPORTS:
+            return
+
+        self.transport = transport
+        self.poll_interval = app.config.get('INVALIDATION_POLL_INTERVAL', 1.0)
+        # LISTEN blocks in select() for up to poll_interval itself, so its loop has no extra wait
+        self.worker = PeriodicWorker('cache-invalidation', 0 if transport == 'notify' else self.poll_interval,
+                                     self.receive)
+        response_cache.bus = self
+        app.before_request(self.start)
+
+    @property
+    def origin(self):
+        """Identifies this process, so it can skip its own notifications"""
+        if self._origin_pid != os.getpid():
+            self._origin, self._origin_pid = uuid.uuid4().hex, os.getpid()
+        return self._origin
+
+    def start(self):
+        """Subscribe before this process caches anything, then receive in the background"""
+        if self.worker is None or self.worker.is_running():
+            return
+        with self.app.app_context():
+            try:
+                if self.transport == 'notify':
+                    self._listen()
+                elif self._versions is None:
+                    self._versions = self._read_versions()
+            except Exception:
+                self._count('errors')
+                self.app.logger.exception('Failed to subscribe to cache invalidations')
+        self.worker.ensure_started()
+
+    def publish(self, tags):
+        """Tell other processes to drop ``tags``; failures are logged, never raised"""
+        if self.transport is None or not tags:
+            return
+        with self.app.app_context():
+            try:
+                if self.transport == 'notify':
+                    self._notify(tags)
+                else:
+                    self._bump(tags)
+                self._count('published')
+            except Exception:
+                self._count('errors')
+                self.app.logger.exception('Failed to publish cache invalidation for %s', ', '.join(tags))
+
+    def receive(self):
+        """Evict whatever other processes invalidated since the last call"""
+        with self.app.app_context():
+            try:
+                tags = self._poll_notifications() if self.transport == 'notify' else self._poll_versions()
+            except Exception:
+                self._count('errors')
+                self.app.logger.exception('Failed to receive cache invalidations')
+                self._drop_listener()
+                time.sleep(self.poll_interval)
+                return
+            if tags:
+                self._count('received')
+                response_cache.invalidate(*tags, publish=False)
+
+    # LISTEN/NOTIFY
+
+    def _notify(self, tags):
+        payload = json.dumps({'origin': self.origin, 'tags': sorted(tags)})
+        with db.engine.connect() as connection:
+            connection.execute(text('SELECT pg_notify(:channel, :payload)'), {'channel': CHANNEL, 'payload': payload})
+            connection.commit()
+
+    def _listen(self):
+        """Dedicated autocommit connection outside the pool, kept for LISTEN"""
+        if self._listener is not None and self._listener_pid == os.getpid():
+            return self._listener
+        # A connection inherited across fork belongs to the parent; leave it alone
+        self._listener = None
+
+        engine = db.engine
+        cargs, cparams = engine.dialect.create_connect_args(engine.url)
+        connection = engine.dialect.connect(*cargs, **cparams)
+        connection.autocommit = True
+        with connection.cursor() as cursor:
+            cursor.execute(f'LISTEN {CHANNEL}')
+        self._listener, self._listener_pid = connection, os.getpid()
+        return connection
+
+    def _drop_listener(self):
+        listener, self._listener = self._listener, None
+        if listener is not None and self._listener_pid == os.getpid():
+            try:
+                listener.close()
+            except Exception:
+                pass
+
+    def _poll_notifications(self):
+        reconnected = self._listener is None or self._listener_pid != os.getpid()
+        connection = self._listen()
+        tags = set()
+        if reconnected:
+            # Notifications sent while we were not listening are lost
+            tags.update(response_cache.known_tags())
+        if select.select([connection], [], [], self.poll_interval)[0]:
+            connection.poll()
+            while connection.notifies:
+                message = json.loads(connection.notifies.pop(0).payload)
+                if message.get('origin') != self.origin:
+                    tags.update(message.get('tags', ()))
+        return tags
+
+    # Version table
+
+    def _read_versions(self):
+        return dict(db.session.query(CacheTagVersion.tag, CacheTagVersion.version))
+
+    def _bump(self, tags):
+        table = CacheTagVersion.__table__
+        now = datetime.utcnow()
+        with db.engine.begin() as connection:
+            statement = upsert(table, connection)
+            statement = statement.on_conflict_do_update(
+                index_elements=[table.c.tag],
+                set_={'version': table.c.version + 1, 'updated_at': statement.excluded.updated_at}
+            ).returning(table.c.version)
+            versions = {tag: connection.execute(statement, {'tag': tag, 'version': 1, 'updated_at': now}).scalar()
+                        for tag in tags}
+        with self._lock:
+            if self._versions is None:
+                return
+            for tag, version in versions.items():
+                # Only skip our own bump; if another process bumped in between, the poll evicts again
+                if self._versions.get(tag, 0) + 1 == version:
+                    self._versions[tag] = version
+
+    def _poll_versions(self):
+        current = self._read_versions()
+        db.session.rollback()
+        with self._lock:
+            if self._versions is None:
+                self._versions = current
+                return set()
+            changed = {tag for tag, version in current.items() if version > self._versions.get(tag, 0)}
+            self._versions.update(current)
+        return changed
+
+    def _count(self, outcome):
+        with self._lock:
+            self._stats[outcome] += 1
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, transport=self.transport)
+
+invalidation_bus = InvalidationBus()
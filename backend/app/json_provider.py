@@ -0,0 +1,65 @@
+import datetime
+import decimal
+from flask.json.provider import JSONProvider
+from werkzeug.http import http_date
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - falls back to Flask's provider
+    orjson = None
+
+def _default(obj):
+    """Types orjson does not encode natively, handled like Flask's provider"""
+    if isinstance(obj, datetime.date):
+        # Same RFC 1123 HTTP dates as Flask's provider, not orjson's ISO 8601
+        return http_date(obj)
+    if isinstance(obj, datetime.time):
+        return obj.isoformat()
+    if isinstance(obj, decimal.Decimal):
+        return str(obj)
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+class OrjsonProvider(JSONProvider):
+    """Flask JSON provider backed by orjson.
+
+    UUIDs and dataclasses are encoded natively. Dates and datetimes are
+    passed through and encoded as HTTP dates like Flask's provider does,
+    and Decimals as strings. Keys are left in insertion order
+    unless ``sort_keys`` is turned on.
+    """
+
+    sort_keys = False
+    compact = None
+    mimetype = 'application/json'
+
+    def _options(self, sort_keys=None, indent=None):
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys if sort_keys is None else sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def dumps(self, obj, **kwargs):
+        return self.dumps_bytes(obj, **kwargs).decode('utf-8')
+
+    def dumps_bytes(self, obj, **kwargs):
+        """Encode straight to UTF-8 bytes, skipping the str round trip"""
+        option = self._options(kwargs.get('sort_keys'), kwargs.get('indent'))
+        return orjson.dumps(obj, default=kwargs.get('default', _default), option=option)
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        # Like Flask's provider, only responses are pretty-printed in debug mode
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        return self._app.response_class(self.dumps_bytes(obj, indent=indent) + b'\n', mimetype=self.mimetype)
+
+def init_json(app):
+    """Use the orjson provider when orjson is installed and not disabled"""
+    if orjson is not None and app.config.get('JSON_PROVIDER', 'orjson') == 'orjson':
+        app.json = OrjsonProvider(app)
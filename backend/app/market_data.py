@@ -0,0 +1,104 @@
+import random
+import uuid
+from datetime import datetime
+from decimal import Decimal
+from marshmallow import ValidationError
+from app import db
+from app.dialects import upsert, supports_upsert
+from app.models import StockQuote
+from app.price_history import record_ticks, volume_traded
+from app.schemas import StockQuoteUpsertSchema
+
+quote_upsert_schema = StockQuoteUpsertSchema()
+
+def validate_quotes(items):
+    """Split raw quote dicts into ``(valid, errors)``.
+
+    Quotes for the same symbol are merged in order, later fields winning,
+    since one upsert cannot touch a row twice; ``errors`` are per-item
+    results.
+    """
+    valid = {}
+    errors = []
+    for index, item in enumerate(items):
+        try:
+            data = quote_upsert_schema.load(item if isinstance(item, dict) else {})
+        except ValidationError as e:
+            symbol = item.get('symbol') if isinstance(item, dict) else None
+            errors.append({'index': index, 'symbol': symbol, 'status': 'error', 'errors': e.messages})
+        else:
+            valid[data['symbol']] = dict(valid.get(data['symbol'], {}), **data)
+    return list(valid.values()), errors
+
+def upsert_quotes(quotes, now=None):
+    """Write validated quotes with ``INSERT ... ON CONFLICT (symbol) DO UPDATE``.
+
+    Quotes sending the same fields share one statement, so a feed that
+    always sends the same fields writes its whole batch with one. Fields
+    a quote leaves out keep their stored value. Quotes with a price are
+    also recorded as ticks for the price history. Returns
+    ``({symbol: 'created' | 'updated'}, written rows)``; the caller commits.
+    """
+    if not quotes:
+        return {}, []
+    connection = db.session.connection()
+    table = StockQuote.__table__
+    now = now or datetime.utcnow()
+
+    symbols = [quote['symbol'] for quote in quotes]
+    existing = dict(db.session.query(StockQuote.symbol, StockQuote.volume).filter(StockQuote.symbol.in_(symbols)))
+
+    groups = {}
+    for quote in quotes:
+        groups.setdefault(tuple(sorted(quote)), []).append(dict(quote, id=uuid.uuid4(), updated_at=now))
+
+    rows = []
+    for columns, params in groups.items():
+        updated = [column for column in columns if column != 'symbol'] + ['updated_at']
+        if supports_upsert(connection):
+            statement = upsert(table, connection)
+            statement = statement.on_conflict_do_update(
+                index_elements=[table.c.symbol],
+                set_={column: statement.excluded[column] for column in updated}
+            ).returning(*table.c)
+            rows.extend(connection.execute(statement, params))
+        else:
+            for param in params:
+                if param['symbol'] in existing:
+                    connection.execute(table.update().where(table.c.symbol == param['symbol']).values(
+                        {column: param[column] for column in updated}
+                    ))
+                else:
+                    connection.execute(table.insert(), [param])
+            rows.extend(connection.execute(table.select().where(
+                table.c.symbol.in_([param['symbol'] for param in params])
+            )))
+
+    record_ticks(connection, [
+        (quote['symbol'], quote['current_price'], volume_traded(existing.get(quote['symbol']), quote.get('volume')))
+        for quote in quotes if quote.get('current_price') is not None
+    ], now)
+    return {symbol: 'updated' if symbol in existing else 'created' for symbol in symbols}, rows
+
+CENT = Decimal('0.01')
+
+def simulated_quotes(quotes, volatility=0.002, rng=random):
+    """One step of a local random-walk feed for ``quotes`` (``StockQuote``-like objects).
+
+    Each price moves by a normal percentage; the change stays measured from
+    the previous close and some volume trades. The result feeds ``upsert_quotes``.
+    """
+    moved = []
+    for quote in quotes:
+        price = quote.current_price or Decimal('100')
+        close = price - (quote.price_change or 0)
+        price = max(CENT, (price * Decimal(1 + rng.gauss(0, volatility))).quantize(CENT))
+        change = price - close
+        moved.append({
+            'symbol': quote.symbol,
+            'current_price': price,
+            'price_change': change,
+            'percent_change': (change / close * 100).quantize(CENT) if close else Decimal('0'),
+            'volume': (quote.volume or 0) + rng.randint(0, 1000)
+        })
+    return moved
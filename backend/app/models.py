@@ -5,6 +5,13 @@ import uuid
 
 class Article(db.Model):
     __tablename__ = 'articles'
+    __table_args__ = (
+        # Keyset pagination over (published_at, id), globally and per category
+        db.Index('idx_articles_published_keyset', 'is_published', 'published_at', 'id'),
+        db.Index('idx_articles_category_keyset', 'category_id', 'is_published', 'published_at', 'id'),
+        # Covers the sitemap scan of (slug, updated_at) in publication order
+        db.Index('idx_articles_sitemap', 'is_published', 'published_at', 'id', 'slug', 'updated_at'),
+    )
     
     id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     title = db.Column(db.String(255), nullable=False)
@@ -130,6 +137,10 @@ class MenuItem(db.Model):
 
 class StockQuote(db.Model):
     __tablename__ = 'stock_quotes'
+    __table_args__ = (
+        # One row per symbol; the conflict target of bulk upserts
+        db.Index('uq_stock_quotes_symbol', 'symbol', unique=True),
+    )
     
     id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     symbol = db.Column(db.String(10), nullable=False)
@@ -150,3 +161,91 @@ class SiteSettings(db.Model):
     setting_type = db.Column(db.String(50), default='text')  # text, json, boolean, number
     description = db.Column(db.Text)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class ArticleViewBucket(db.Model):
+    __tablename__ = 'article_view_buckets'
+    __table_args__ = (
+        db.Index('idx_article_view_buckets_bucket_start', 'bucket_start'),
+    )
+    
+    article_id = db.Column(UUID(as_uuid=True), db.ForeignKey('articles.id', ondelete='CASCADE'), primary_key=True)
+    bucket_start = db.Column(db.DateTime, primary_key=True)
+    views = db.Column(db.Integer, nullable=False, default=0)
+
+class TrendingArticle(db.Model):
+    __tablename__ = 'trending_articles'
+    
+    # Materialized top-N per window, read back in (window, rank) order
+    window = db.Column(db.String(10), primary_key=True)
+    rank = db.Column(db.Integer, primary_key=True)
+    article_id = db.Column(UUID(as_uuid=True), db.ForeignKey('articles.id', ondelete='CASCADE'), nullable=False)
+    score = db.Column(db.Float, nullable=False)
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class ContentCounter(db.Model):
+    __tablename__ = 'content_counters'
+    
+    # Published-article counts: scope is global, category, author or tag,
+    # and ref_id is the id counted within that scope (max UUID for global)
+    scope = db.Column(db.String(20), primary_key=True)
+    ref_id = db.Column(UUID(as_uuid=True), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+class RelatedArticle(db.Model):
+    __tablename__ = 'related_articles'
+    __table_args__ = (
+        db.Index('idx_related_articles_related_id', 'related_id'),
+    )
+    
+    # Precomputed neighbor lists, read back in (article_id, rank) order
+    article_id = db.Column(UUID(as_uuid=True), db.ForeignKey('articles.id', ondelete='CASCADE'), primary_key=True)
+    rank = db.Column(db.Integer, primary_key=True)
+    related_id = db.Column(UUID(as_uuid=True), db.ForeignKey('articles.id', ondelete='CASCADE'), nullable=False)
+    score = db.Column(db.Float, nullable=False)
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class ChangeLog(db.Model):
+    __tablename__ = 'change_log'
+    __table_args__ = (
+        db.Index('idx_change_log_entity_seq', 'entity', 'seq'),
+    )
+    
+    # Append-only. Ids are handed out at insert time, so they do not follow
+    # commit order; seq is stamped after commit and is the token clients poll
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True, autoincrement=True)
+    seq = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), unique=True)
+    entity = db.Column(db.String(20), nullable=False)
+    ref_id = db.Column(UUID(as_uuid=True), nullable=False)
+    key = db.Column(db.String(255))
+    action = db.Column(db.String(10), nullable=False)
+    changed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+class CacheTagVersion(db.Model):
+    __tablename__ = 'cache_tag_versions'
+    
+    # Bumped on every invalidation of a tag; workers without LISTEN/NOTIFY poll it
+    tag = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class PriceTick(db.Model):
+    __tablename__ = 'price_ticks'
+    
+    # Append-only; the (symbol, ts) primary key is the range index history reads scan
+    symbol = db.Column(db.String(10), primary_key=True)
+    ts = db.Column(db.DateTime, primary_key=True)
+    price = db.Column(db.Numeric(10, 2), nullable=False)
+    volume = db.Column(db.BigInteger, nullable=False, default=0)
+
+class PriceBar(db.Model):
+    __tablename__ = 'price_bars'
+    
+    # OHLCV rollups per period (1m, 5m, 1h, 1d), upserted as ticks arrive
+    period = db.Column(db.String(3), primary_key=True)
+    symbol = db.Column(db.String(10), primary_key=True)
+    bucket_start = db.Column(db.DateTime, primary_key=True)
+    open = db.Column(db.Numeric(10, 2), nullable=False)
+    high = db.Column(db.Numeric(10, 2), nullable=False)
+    low = db.Column(db.Numeric(10, 2), nullable=False)
+    close = db.Column(db.Numeric(10, 2), nullable=False)
+    volume = db.Column(db.BigInteger, nullable=False, default=0)
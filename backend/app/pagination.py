@@ -0,0 +1,53 @@
+import base64
+import json
+import uuid
+from datetime import datetime
+from sqlalchemy import and_, or_, desc
+from app.models import Article
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+
+def encode_cursor(article):
+    """Build an opaque cursor pointing just after the given article"""
+    payload = json.dumps([article.published_at.isoformat(), str(article.id)])
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    """Decode a cursor into its (published_at, id) keyset position"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        published_at, article_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return datetime.fromisoformat(published_at), uuid.UUID(article_id)
+    except (ValueError, TypeError, UnicodeError):
+        raise InvalidCursor('Invalid cursor')
+
+def keyset_paginate(query, cursor=None, per_page=10, with_total=False):
+    """Page through published_at DESC, id DESC without OFFSET.
+
+    The query must not be ordered yet. The ordering matches the composite
+    ``(published_at, id)`` indexes on ``articles``, so every page is a
+    single index range scan no matter how deep the reader has scrolled.
+    """
+    # Keyset positions need a timestamp, so undated drafts are left out
+    query = query.filter(Article.published_at.isnot(None))
+    total = query.order_by(None).count() if with_total else None
+
+    if cursor:
+        published_at, article_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            Article.published_at < published_at,
+            and_(Article.published_at == published_at, Article.id < article_id)
+        ))
+
+    # Fetch one extra row to find out whether another page exists
+    items = query.order_by(desc(Article.published_at), desc(Article.id)).limit(per_page + 1).all()
+    has_next = len(items) > per_page
+    items = items[:per_page]
+
+    return {
+        'items': items,
+        'next_cursor': encode_cursor(items[-1]) if has_next else None,
+        'has_next': has_next,
+        'total': total
+    }
@@ -0,0 +1,153 @@
+from datetime import datetime, timedelta
+from app import db
+from app.background import PeriodicWorker
+from app.dialects import upsert, supports_upsert, greatest, least
+from app.models import PriceTick, PriceBar
+
+EPOCH = datetime(1970, 1, 1)
+
+# Rollup periods, finest first, and the length of one bar
+PERIODS = {
+    '1m': timedelta(minutes=1),
+    '5m': timedelta(minutes=5),
+    '1h': timedelta(hours=1),
+    '1d': timedelta(days=1),
+}
+
+class InvalidHistoryRange(ValueError):
+    """Raised for an unknown interval or a range that needs too many bars"""
+
+def bucket_start(moment, period):
+    """Start of the ``period`` bar a (naive UTC) timestamp falls into"""
+    size = PERIODS[period]
+    return EPOCH + ((moment - EPOCH) // size) * size
+
+def volume_traded(previous, current):
+    """Volume since the last quote, from cumulative session volumes.
+
+    A drop means a new session started, so the whole new total counts.
+    """
+    if current is None:
+        return 0
+    if previous is None or current < previous:
+        return current
+    return current - previous
+
+def record_ticks(connection, ticks, now):
+    """Append ticks and fold them into every rollup, in the caller's transaction.
+
+    ``ticks`` are ``(symbol, price, volume)`` observed at ``now``. All
+    bars for all periods go out as one upsert: the open is kept, high
+    and low widen, the close moves to the newest price and volume adds up.
+    Ticks are stamped on arrival, so they reach each bar in order.
+    """
+    if not ticks:
+        return
+    tick_rows = [{'symbol': symbol, 'ts': now, 'price': price, 'volume': volume} for symbol, price, volume in ticks]
+    bar_rows = [
+        {'period': period, 'symbol': symbol, 'bucket_start': bucket_start(now, period),
+         'open': price, 'high': price, 'low': price, 'close': price, 'volume': volume}
+        for period in PERIODS for symbol, price, volume in ticks
+    ]
+    ticks_table = PriceTick.__table__
+    bars = PriceBar.__table__
+
+    if not supports_upsert(connection):
+        connection.execute(ticks_table.insert(), tick_rows)
+        for row in bar_rows:
+            key = (bars.c.period == row['period']) & (bars.c.symbol == row['symbol']) & \
+                  (bars.c.bucket_start == row['bucket_start'])
+            current = connection.execute(bars.select().where(key)).first()
+            if current is None:
+                connection.execute(bars.insert(), [row])
+            else:
+                connection.execute(bars.update().where(key).values(
+                    high=max(current.high, row['high']), low=min(current.low, row['low']),
+                    close=row['close'], volume=current.volume + row['volume']
+                ))
+        return
+
+    connection.execute(upsert(ticks_table, connection).on_conflict_do_nothing(), tick_rows)
+    statement = upsert(bars, connection)
+    statement = statement.on_conflict_do_update(
+        index_elements=[bars.c.period, bars.c.symbol, bars.c.bucket_start],
+        set_={
+            'high': greatest(connection, bars.c.high, statement.excluded.high),
+            'low': least(connection, bars.c.low, statement.excluded.low),
+            'close': statement.excluded.close,
+            'volume': bars.c.volume + statement.excluded.volume
+        }
+    )
+    connection.execute(statement, bar_rows)
+
+def pick_period(start, end, max_points, retention=None, now=None):
+    """Finest period whose bars over ``[start, end)`` fit in ``max_points``.
+
+    Periods whose retention no longer reaches back to ``start`` are
+    skipped, since their bars for the range are gone.
+    """
+    retention = retention or {}
+    now = now or datetime.utcnow()
+    for period, size in PERIODS.items():
+        kept = retention.get(period)
+        if kept and start < now - timedelta(days=kept):
+            continue
+        if (end - start) / size <= max_points:
+            return period
+    return '1d'
+
+def load_history(symbol, period, start, end, max_points):
+    """Bars of one period covering ``[start, end)``, oldest first; one primary-key range scan"""
+    if period not in PERIODS:
+        raise InvalidHistoryRange(f'interval must be one of {", ".join(PERIODS)}')
+    if end <= start:
+        raise InvalidHistoryRange('from must be before to')
+    if (end - start) / PERIODS[period] > max_points:
+        raise InvalidHistoryRange(f'More than {max_points} {period} bars requested; use a wider interval')
+
+    return PriceBar.query.filter(
+        PriceBar.period == period,
+        PriceBar.symbol == symbol,
+        PriceBar.bucket_start >= bucket_start(start, period),
+        PriceBar.bucket_start < end
+    ).order_by(PriceBar.bucket_start).all()
+
+class PriceHistory:
+    """Drops ticks and fine bars older than their retention, hourly"""
+
+    def __init__(self, app=None):
+        self.app = None
+        self.worker = None
+        self.retention = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.retention = app.config.get('PRICE_HISTORY_RETENTION_DAYS', {})
+        self.worker = PeriodicWorker('price-history-prune', 3600, self.prune)
+        app.extensions['price_history'] = self
+        app.before_request(self.worker.ensure_started)
+
+    def prune(self, now=None):
+        now = now or datetime.utcnow()
+        with self.app.app_context():
+            try:
+                deleted = 0
+                for name, days in self.retention.items():
+                    if not days:
+                        continue
+                    cutoff = now - timedelta(days=days)
+                    if name == 'tick':
+                        query = PriceTick.query.filter(PriceTick.ts < cutoff)
+                    else:
+                        query = PriceBar.query.filter(PriceBar.period == name, PriceBar.bucket_start < cutoff)
+                    deleted += query.delete(synchronize_session=False)
+                db.session.commit()
+                return deleted
+            except Exception:
+                db.session.rollback()
+                self.app.logger.exception('Failed to prune price history')
+                return None
+
+price_history = PriceHistory()
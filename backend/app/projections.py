@@ -0,0 +1,45 @@
+from functools import lru_cache
+from flask import request
+from app.schemas import ArticleSchema
+from app.serializers import serializer_for
+
+# Named projections for article payloads; None means every field
+ARTICLE_PROJECTIONS = {
+    'card': ('id', 'title', 'slug', 'excerpt', 'image_url', 'image_alt', 'published_at',
+             'author', 'category'),
+    'teaser': ('id', 'title', 'slug', 'excerpt', 'image_url', 'image_alt', 'published_at',
+               'updated_at', 'views', 'author', 'category', 'tags'),
+    'full': None
+}
+DEFAULT_LIST_PROJECTION = 'card'
+
+class InvalidFields(ValueError):
+    """Raised for an unknown projection name or field"""
+
+def resolve_fields(value, default=DEFAULT_LIST_PROJECTION):
+    """Turn a ``fields=`` value (projection name or comma list) into field names.
+
+    Returns ``None`` for the full projection.
+    """
+    value = (value or default).strip()
+    if value in ARTICLE_PROJECTIONS:
+        return ARTICLE_PROJECTIONS[value]
+
+    names = tuple(sorted({name.strip() for name in value.split(',') if name.strip()}))
+    unknown = set(names) - set(ArticleSchema().fields)
+    if not names or unknown:
+        raise InvalidFields(f'Unknown fields: {", ".join(sorted(unknown)) or value}')
+    return names
+
+def request_fields(default=DEFAULT_LIST_PROJECTION):
+    """Fields selected by the current request's ``fields`` argument"""
+    return resolve_fields(request.args.get('fields'), default)
+
+@lru_cache(maxsize=64)
+def _serializers(fields):
+    return serializer_for(ArticleSchema(only=fields)), serializer_for(ArticleSchema(many=True, only=fields))
+
+def article_serializer_for(fields, many=False):
+    """Compiled serializer dumping only ``fields`` (all of them when None)"""
+    single, multiple = _serializers(fields)
+    return multiple if many else single
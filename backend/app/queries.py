@@ -0,0 +1,39 @@
+from sqlalchemy.orm import joinedload, selectinload, load_only
+from app.models import Article
+
+# Always loaded: identity plus the keyset pagination position
+KEY_COLUMNS = ('id', 'published_at')
+
+def article_loader_options(fields=None):
+    """Loader options for the fields ArticleSchema will dump.
+
+    ``fields=None`` loads every column and relationship; otherwise only
+    the listed columns are selected (so ``content`` stays in the database
+    for card lists) and only the listed relationships are eager-loaded.
+    """
+    if fields is None:
+        return (
+            joinedload(Article.author, innerjoin=True),
+            joinedload(Article.category),
+            selectinload(Article.tags)
+        )
+
+    columns = Article.__table__.columns.keys()
+    options = [load_only(*[getattr(Article, name) for name in KEY_COLUMNS + tuple(fields)
+                           if name in columns])]
+    if 'author' in fields:
+        options.append(joinedload(Article.author, innerjoin=True))
+    if 'category' in fields:
+        options.append(joinedload(Article.category))
+    if 'tags' in fields:
+        options.append(selectinload(Article.tags))
+    return tuple(options)
+
+def article_query(fields=None):
+    """Base Article query that eager-loads author, category and tags.
+
+    Serializing a page of articles then costs a fixed number of queries
+    (the page itself plus one IN-query for tags) instead of three lazy
+    loads per row. ``fields`` narrows both to a projection.
+    """
+    return Article.query.options(*article_loader_options(fields))
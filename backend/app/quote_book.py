@@ -0,0 +1,142 @@
+import threading
+import time
+from sqlalchemy.exc import SQLAlchemyError
+from app import db
+from app.cache import response_cache
+from app.models import StockQuote
+from app.serializers import stock_quote_serializer
+
+QUOTE_FIELDS = ('id', 'symbol', 'company_name', 'current_price', 'price_change', 'percent_change',
+                'volume', 'market_cap', 'updated_at')
+
+SORT_ORDERS = ('volume', 'change')
+
+class Quote:
+    """The latest quote for one symbol and its serialized form"""
+
+    __slots__ = QUOTE_FIELDS + ('data',)
+
+    def __init__(self, row):
+        for name in QUOTE_FIELDS:
+            setattr(self, name, getattr(row, name))
+        self.data = stock_quote_serializer.dump(self)
+
+class _Book:
+    """One immutable generation of the book: quotes by symbol and the sort orders"""
+
+    __slots__ = ('quotes', 'listed', 'by_volume', 'by_change')
+
+    def __init__(self, quotes):
+        self.quotes = quotes
+        self.listed = tuple(quotes.values())
+        self.by_volume = tuple(sorted(self.listed, key=lambda quote: (-(quote.volume or 0), quote.symbol)))
+        self.by_change = tuple(sorted(self.listed, key=lambda quote: (-abs(quote.percent_change or 0), quote.symbol)))
+
+class QuoteBook:
+    """Latest ``StockQuote`` per symbol, held in memory for the stocks routes.
+
+    Loaded once at startup (or on first use if the table is not there
+    yet). Writes in this process update the book in place; writes on
+    other workers arrive as a ``stocks`` invalidation and reload it.
+    Each update swaps in a new generation with its sort orders
+    precomputed, so readers never lock. ``on_change`` listeners get the
+    quotes that changed, whichever way the update arrived.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self._book = None
+        self._loaded_at = None
+        self._listeners = []
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions['quote_book'] = self
+        response_cache.on_invalidate(self._reload_remote, tags=('stocks',), local=False)
+        with app.app_context():
+            try:
+                self.load()
+            except SQLAlchemyError:
+                db.session.rollback()
+                app.logger.info('Quote book not loaded at startup; loading on first use')
+
+    def on_change(self, callback):
+        """Call ``callback(quotes)`` with the new ``Quote`` objects after every change"""
+        self._listeners.append(callback)
+
+    def _changed(self, quotes):
+        if quotes:
+            for callback in self._listeners:
+                callback(quotes)
+
+    def load(self):
+        """Replace the book with the latest row per symbol"""
+        latest = {}
+        for row in StockQuote.query.order_by(StockQuote.updated_at):
+            latest[row.symbol] = Quote(row)
+        with self._lock:
+            previous = self._book.quotes if self._book is not None else None
+            self._book = _Book(dict(sorted(latest.items())))
+            self._loaded_at = time.time()
+        if previous is not None:
+            self._changed([quote for symbol, quote in latest.items()
+                           if symbol not in previous or previous[symbol].data != quote.data])
+
+    def _current(self):
+        book = self._book
+        if book is None:
+            self.load()
+            book = self._book
+        return book
+
+    def all(self, limit=None):
+        return self._current().listed[:limit]
+
+    def get(self, symbol):
+        return self._current().quotes.get(symbol)
+
+    def top(self, by='volume', limit=None):
+        book = self._current()
+        return (book.by_change if by == 'change' else book.by_volume)[:limit]
+
+    def put(self, *rows):
+        """Add or replace quotes from committed rows"""
+        self._current()
+        changed = [Quote(row) for row in rows]
+        with self._lock:
+            quotes = dict(self._book.quotes)
+            for quote in changed:
+                quotes[quote.symbol] = quote
+            self._book = _Book(dict(sorted(quotes.items())))
+        self._changed(changed)
+
+    def refresh(self, symbol):
+        """Re-read one symbol after a write, dropping it if no row is left"""
+        row = StockQuote.query.filter_by(symbol=symbol).order_by(StockQuote.updated_at.desc()).first()
+        if row is not None:
+            self.put(row)
+            return
+        self._current()
+        with self._lock:
+            quotes = dict(self._book.quotes)
+            quotes.pop(symbol, None)
+            self._book = _Book(quotes)
+
+    def _reload_remote(self, tags):
+        try:
+            self.load()
+        except SQLAlchemyError:
+            db.session.rollback()
+            self.app.logger.exception('Failed to reload the quote book')
+
+    def stats(self):
+        book = self._book
+        return {
+            'symbols': len(book.quotes) if book is not None else 0,
+            'age_seconds': round(time.time() - self._loaded_at, 3) if self._loaded_at else None
+        }
+
+quote_book = QuoteBook()
@@ -0,0 +1,131 @@
+import threading
+from flask import current_app, stream_with_context
+from app.quote_book import quote_book
+
+class Subscription:
+    """One connected client: its symbols and the latest unsent quote per symbol"""
+
+    __slots__ = ('symbols', 'pending', 'ready', 'lock')
+
+    def __init__(self, symbols):
+        self.symbols = symbols
+        self.pending = {}
+        # Looked up per subscription, so gevent's patched Event is used under gevent workers
+        self.ready = threading.Event()
+        self.lock = threading.Lock()
+
+    def offer(self, quote):
+        """Queue a quote, replacing any unsent one for the symbol; True if one was replaced"""
+        with self.lock:
+            replaced = quote.symbol in self.pending
+            self.pending[quote.symbol] = quote.data
+        self.ready.set()
+        return replaced
+
+    def take(self):
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            self.ready.clear()
+        return pending
+
+class QuoteStream:
+    """Fans quote book changes out to Server-Sent Events clients.
+
+    Each change is offered once to every subscription watching the
+    symbol. A subscription keeps only the latest unsent quote per symbol,
+    so a slow client skips intermediate prices instead of building a
+    backlog. Idle connections get a comment line every heartbeat interval,
+    which keeps proxies from closing them and finds clients that left.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.heartbeat = 15
+        self.max_clients = 500
+        self.max_symbols = 100
+        self._subscriptions = set()
+        self._lock = threading.Lock()
+        self._stats = {'published': 0, 'delivered': 0, 'coalesced': 0}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.heartbeat = app.config.get('STREAM_HEARTBEAT_SECONDS', 15)
+        self.max_clients = self._client_limit(app)
+        self.max_symbols = app.config.get('STREAM_MAX_SYMBOLS', 100)
+        app.extensions['quote_stream'] = self
+        quote_book.on_change(self.publish)
+
+    @staticmethod
+    def _client_limit(app):
+        """Open streams per worker, leaving request threads free for the rest of the API"""
+        available = max(app.config.get('WEB_THREADS', 100) - app.config.get('STREAM_RESERVED_THREADS', 25), 0)
+        configured = app.config.get('STREAM_MAX_CLIENTS')
+        if configured is None:
+            return available
+        if configured > available:
+            app.logger.warning('STREAM_MAX_CLIENTS=%d exceeds the %d threads streams may use; capping it',
+                               configured, available)
+        return min(configured, available)
+
+    def subscribe(self, symbols):
+        """New subscription, or None when the client limit is reached"""
+        subscription = Subscription(frozenset(symbols))
+        with self._lock:
+            if len(self._subscriptions) >= self.max_clients:
+                return None
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def publish(self, quotes):
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        coalesced = 0
+        for subscription in subscriptions:
+            for quote in quotes:
+                if not subscription.symbols or quote.symbol in subscription.symbols:
+                    coalesced += subscription.offer(quote)
+        with self._lock:
+            self._stats['published'] += len(quotes)
+            self._stats['coalesced'] += coalesced
+
+    def _delivered(self, count):
+        with self._lock:
+            self._stats['delivered'] += count
+
+    def events(self, subscription):
+        """SSE lines for one client: a snapshot, then deltas and heartbeats"""
+        dumps = current_app.json.dumps
+        try:
+            symbols = subscription.symbols
+            snapshot = [quote.data for quote in quote_book.all() if not symbols or quote.symbol in symbols]
+            yield f'retry: 3000\nevent: snapshot\ndata: {dumps(snapshot)}\n\n'
+            while True:
+                if not subscription.ready.wait(self.heartbeat):
+                    yield ': heartbeat\n\n'
+                    continue
+                pending = subscription.take()
+                if pending:
+                    self._delivered(len(pending))
+                    yield ''.join(f'event: quote\ndata: {dumps(data)}\n\n' for data in pending.values())
+        finally:
+            self.unsubscribe(subscription)
+
+    def response(self, subscription):
+        response = current_app.response_class(stream_with_context(self.events(subscription)),
+                                              mimetype='text/event-stream')
+        response.headers['Cache-Control'] = 'no-cache'
+        # Keep nginx from buffering the stream
+        response.headers['X-Accel-Buffering'] = 'no'
+        return response
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, clients=len(self._subscriptions))
+
+quote_stream = QuoteStream()
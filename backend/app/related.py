@@ -0,0 +1,461 @@
+import re
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+import numpy as np
+from sqlalchemy import desc, event, func
+from sqlalchemy.orm import attributes
+from app import db
+from app.background import PeriodicWorker
+from app.cache import response_cache
+from app.models import Article, RelatedArticle, article_tags
+from app.queries import article_query
+
+# How much each signal contributes to a neighbor's score; each signal is in [0, 1]
+TAG_WEIGHT = 0.5
+TEXT_WEIGHT = 0.35
+CATEGORY_WEIGHT = 0.15
+
+# Article columns whose change can move an article's neighbors
+INDEXED_FIELDS = ('title', 'excerpt', 'category_id', 'is_published', 'tags')
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+STOP_WORDS = frozenset('''
+    a an and are as at be but by for from has have in is it its of on or that the this to was were will with
+'''.split())
+
+def tokenize(text):
+    return [token for token in TOKEN_PATTERN.findall((text or '').lower())
+            if len(token) > 2 and token not in STOP_WORDS]
+
+class SparseRows:
+    """A documents x features sparse matrix kept in both row and column order.
+
+    Row order (CSR) lists one document's features; column order (CSC)
+    lists every document carrying a feature, which is what a one-against-
+    all similarity needs.
+    """
+
+    def __init__(self, rows, cols, data, n_rows, n_cols):
+        order = np.lexsort((cols, rows))
+        self.row_cols = cols[order]
+        self.row_data = data[order]
+        self.row_ptr = np.concatenate(([0], np.cumsum(np.bincount(rows, minlength=n_rows))))
+
+        order = np.lexsort((rows, cols))
+        self.col_rows = rows[order]
+        self.col_data = data[order]
+        self.col_ptr = np.concatenate(([0], np.cumsum(np.bincount(cols, minlength=n_cols))))
+        self.n_rows = n_rows
+        self.n_cols = n_cols
+
+    def row(self, i):
+        """Features and weights of row ``i``, features ascending"""
+        start, end = self.row_ptr[i], self.row_ptr[i + 1]
+        return self.row_cols[start:end], self.row_data[start:end]
+
+    def dot(self, features, weights):
+        """Dot product of a sparse vector with every row, as a dense vector"""
+        known = features < self.n_cols
+        features, weights = features[known], weights[known]
+
+        # Gather the postings of every feature in one pass
+        starts = self.col_ptr[features]
+        lengths = self.col_ptr[features + 1] - starts
+        total = int(lengths.sum())
+        if not total:
+            return np.zeros(self.n_rows)
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(total)
+        return np.bincount(self.col_rows[offsets],
+                           weights=np.repeat(weights, lengths) * self.col_data[offsets],
+                           minlength=self.n_rows)
+
+    def similarity(self, i):
+        """Dot product of row ``i`` with every row, as a dense vector"""
+        return self.dot(*self.row(i))
+
+def _normalized_rows(rows, cols, data, n_rows, n_cols):
+    """SparseRows with every row scaled to unit length, so dot products are cosines"""
+    rows = np.asarray(rows, dtype=np.int64)
+    cols = np.asarray(cols, dtype=np.int64)
+    data = np.asarray(data, dtype=np.float64)
+    norms = np.sqrt(np.bincount(rows, weights=data ** 2, minlength=n_rows))
+    if len(data):
+        data = data / norms[rows]
+    return SparseRows(rows, cols, data, n_rows, n_cols)
+
+def _unit_vector(features, weights):
+    """A sparse vector sorted by feature and scaled to unit length"""
+    features = np.asarray(features, dtype=np.int64)
+    weights = np.asarray(weights, dtype=np.float64)
+    order = np.argsort(features)
+    features, weights = features[order], weights[order]
+    if len(weights):
+        weights = weights / np.sqrt((weights ** 2).sum())
+    return features, weights
+
+def _sparse_dot(a, b):
+    if not len(a[0]) or not len(b[0]):
+        return 0.0
+    _, i, j = np.intersect1d(a[0], b[0], assume_unique=True, return_indices=True)
+    return float(a[1][i] @ b[1][j])
+
+EMPTY_VECTOR = (np.zeros(0, dtype=np.int64), np.zeros(0))
+
+class NeighborIndex:
+    """Similarity between published articles from tags, category and TF-IDF text.
+
+    ``articles`` are ``(id, text, category_id)`` in tie-break order (newest
+    first); ``tag_pairs`` are ``(article_id, tag_id)``.
+
+    The vectors built here are the base. ``update`` re-vectorizes only the
+    articles it is given, against the current document frequencies, and
+    keeps them in an overlay that ``scores`` consults on top of the base;
+    articles new since the build tie-break after the rest. A full rebuild
+    folds the overlay back in.
+    """
+
+    def __init__(self, articles, tag_pairs):
+        self.ids = [article_id for article_id, _, _ in articles]
+        self.position = {article_id: i for i, article_id in enumerate(self.ids)}
+        self.base_size = n = len(self.ids)
+        self.live = n
+
+        self.vocabulary = {}
+        rows, cols, counts = [], [], []
+        for i, (_, text, _) in enumerate(articles):
+            for term, count in Counter(tokenize(text)).items():
+                rows.append(i)
+                cols.append(self.vocabulary.setdefault(term, len(self.vocabulary)))
+                counts.append(count)
+        cols_array = np.asarray(cols, dtype=np.int64)
+        self.document_frequency = np.bincount(cols_array, minlength=len(self.vocabulary))
+        tf_idf = (1 + np.log(np.asarray(counts, dtype=np.float64))) * self._idf()[cols_array]
+        self.text = _normalized_rows(rows, cols_array, tf_idf, n, len(self.vocabulary))
+
+        self.tag_codes = {}
+        rows, cols = [], []
+        for article_id, tag_id in tag_pairs:
+            if article_id in self.position:
+                rows.append(self.position[article_id])
+                cols.append(self.tag_codes.setdefault(tag_id, len(self.tag_codes)))
+        self.tags = _normalized_rows(rows, cols, np.ones(len(rows)), n, len(self.tag_codes))
+
+        self.category_codes = {}
+        self.categories = np.array([self._category_code(category_id) for _, _, category_id in articles],
+                                   dtype=np.int64)
+
+        # position -> (text vector, tag vector) replacing the base row
+        self.overlay = {}
+        self.removed = set()
+
+    def _idf(self):
+        return np.log((1 + self.live) / (1 + self.document_frequency)) + 1
+
+    def _category_code(self, category_id):
+        return self.category_codes.setdefault(category_id, len(self.category_codes)) if category_id is not None else -1
+
+    def _vectors(self, i):
+        if i in self.overlay:
+            return self.overlay[i]
+        return self.text.row(i), self.tags.row(i)
+
+    def __len__(self):
+        return self.live
+
+    def __contains__(self, article_id):
+        i = self.position.get(article_id)
+        return i is not None and i not in self.removed
+
+    def update(self, articles, tag_pairs, removed_ids=()):
+        """Re-vectorize ``articles`` (``(id, text, category_id)``) and drop ``removed_ids``"""
+        for article_id in removed_ids:
+            if article_id in self:
+                i = self.position[article_id]
+                self._forget_terms(i)
+                self.overlay[i] = (EMPTY_VECTOR, EMPTY_VECTOR)
+                self.categories[i] = -1
+                self.removed.add(i)
+                self.live -= 1
+
+        tags = {}
+        for article_id, tag_id in tag_pairs:
+            tags.setdefault(article_id, []).append(self.tag_codes.setdefault(tag_id, len(self.tag_codes)))
+
+        terms = {}
+        for article_id, text, category_id in articles:
+            i = self.position.get(article_id)
+            if i is None:
+                i = self.position[article_id] = len(self.ids)
+                self.ids.append(article_id)
+                self.categories = np.append(self.categories, -1)
+                self.live += 1
+            elif i in self.removed:
+                self.removed.discard(i)
+                self.live += 1
+            else:
+                self._forget_terms(i)
+            self.categories[i] = self._category_code(category_id)
+            counts = Counter(tokenize(text))
+            terms[i] = [(self.vocabulary.setdefault(term, len(self.vocabulary)), count)
+                        for term, count in counts.items()]
+
+        if len(self.vocabulary) > len(self.document_frequency):
+            self.document_frequency = np.concatenate((
+                self.document_frequency,
+                np.zeros(len(self.vocabulary) - len(self.document_frequency), dtype=np.int64)
+            ))
+        for counts in terms.values():
+            self.document_frequency[[col for col, _ in counts]] += 1
+
+        idf = self._idf()
+        for (article_id, _, _), (i, counts) in zip(articles, terms.items()):
+            cols = [col for col, _ in counts]
+            text = _unit_vector(cols, (1 + np.log([count for _, count in counts])) * idf[cols]) if counts \
+                else EMPTY_VECTOR
+            codes = sorted(set(tags.get(article_id, ())))
+            self.overlay[i] = (text, _unit_vector(codes, np.ones(len(codes))))
+
+    def _forget_terms(self, i):
+        features, _ = self._vectors(i)[0]
+        self.document_frequency[features] -= 1
+
+    def scores(self, article_id):
+        """Score of every indexed article against ``article_id`` (symmetric)"""
+        i = self.position[article_id]
+        text, tags = self._vectors(i)
+        scores = np.zeros(len(self.ids))
+        scores[:self.base_size] = TAG_WEIGHT * self.tags.dot(*tags) + TEXT_WEIGHT * self.text.dot(*text)
+        for j, (other_text, other_tags) in self.overlay.items():
+            scores[j] = TAG_WEIGHT * _sparse_dot(tags, other_tags) + TEXT_WEIGHT * _sparse_dot(text, other_text)
+        if self.categories[i] >= 0:
+            scores += CATEGORY_WEIGHT * (self.categories == self.categories[i])
+        scores[list(self.removed)] = 0.0
+        scores[i] = 0.0
+        return scores
+
+    def neighbors(self, article_id, top_n):
+        """Best ``top_n`` ``(related_id, score)`` pairs, ties going to newer articles"""
+        scores = self.scores(article_id)
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > top_n:
+            candidates = candidates[np.argpartition(-scores[candidates], top_n - 1)[:top_n]]
+        candidates = candidates[np.lexsort((candidates, -scores[candidates]))]
+        return [(self.ids[j], float(scores[j])) for j in candidates]
+
+def load_articles(article_ids=None):
+    """``(articles, tag_pairs)`` for the index: every published article, or those among ``article_ids``"""
+    published = Article.is_published == True
+    articles = db.session.query(
+        Article.id, Article.title, Article.excerpt, Article.category_id
+    ).filter(published)
+    tag_pairs = db.session.query(article_tags.c.article_id, article_tags.c.tag_id).join(
+        Article, Article.id == article_tags.c.article_id
+    ).filter(published)
+    if article_ids is not None:
+        articles = articles.filter(Article.id.in_(article_ids))
+        tag_pairs = tag_pairs.filter(Article.id.in_(article_ids))
+    articles = articles.order_by(desc(Article.published_at), Article.id).all()
+    return (
+        [(article_id, f'{title} {excerpt or ""}', category_id) for article_id, title, excerpt, category_id in articles],
+        tag_pairs.all()
+    )
+
+def load_index():
+    """Build the neighbor index over every published article"""
+    return NeighborIndex(*load_articles())
+
+def _chunks(values, size=500):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+def _write_neighbors(index, article_ids, top_n, now):
+    rows = []
+    for article_id in article_ids:
+        if article_id in index:
+            rows.extend(
+                {'article_id': article_id, 'rank': rank, 'related_id': related_id, 'score': score, 'computed_at': now}
+                for rank, (related_id, score) in enumerate(index.neighbors(article_id, top_n), 1)
+            )
+    if rows:
+        db.session.execute(RelatedArticle.__table__.insert(), rows)
+    return len(rows)
+
+def _rebuild(top_n, now):
+    index = load_index()
+    RelatedArticle.query.delete()
+    _write_neighbors(index, index.ids, top_n, now)
+    db.session.commit()
+    return index
+
+def rebuild_related(top_n=10, now=None):
+    """Recompute every neighbor list and replace the table in one transaction"""
+    return len(_rebuild(top_n, now or datetime.utcnow()))
+
+def update_related(index, changed_ids, top_n=10, now=None):
+    """Apply ``changed_ids`` to ``index`` and refresh only the neighbor lists they can affect.
+
+    Only the changed articles are read back and re-vectorized. Scores are
+    symmetric, so one score vector per changed article shows which other
+    lists it now enters; lists that referenced a changed article are
+    recomputed too, so edits, unpublishing and deletes drop out. Other
+    lists keep their scores until the next full rebuild, even though IDF
+    weights shift slightly. Returns how many lists were rewritten.
+    """
+    now = now or datetime.utcnow()
+    changed = set(changed_ids)
+    articles, tag_pairs = [], []
+    for chunk in _chunks(changed):
+        chunk_articles, chunk_pairs = load_articles(chunk)
+        articles.extend(chunk_articles)
+        tag_pairs.extend(chunk_pairs)
+    index.update(articles, tag_pairs, removed_ids=changed - {article_id for article_id, _, _ in articles})
+
+    affected = set(changed)
+    for chunk in _chunks(changed):
+        affected.update(article_id for article_id, in db.session.query(RelatedArticle.article_id).filter(
+            RelatedArticle.related_id.in_(chunk)
+        ))
+
+    candidates = {}
+    for article_id in changed:
+        if article_id in index:
+            scores = index.scores(article_id)
+            for j in np.flatnonzero(scores > 0):
+                candidates[index.ids[j]] = max(candidates.get(index.ids[j], 0.0), scores[j])
+    for chunk in _chunks(set(candidates) - affected):
+        cutoffs = {
+            article_id: (lowest, count)
+            for article_id, lowest, count in db.session.query(
+                RelatedArticle.article_id, func.min(RelatedArticle.score), func.count()
+            ).filter(RelatedArticle.article_id.in_(chunk)).group_by(RelatedArticle.article_id)
+        }
+        for article_id in chunk:
+            lowest, count = cutoffs.get(article_id, (0.0, 0))
+            if count < top_n or candidates[article_id] > lowest:
+                affected.add(article_id)
+
+    for chunk in _chunks(affected):
+        RelatedArticle.query.filter(RelatedArticle.article_id.in_(chunk)).delete(synchronize_session=False)
+    _write_neighbors(index, affected, top_n, now)
+    db.session.commit()
+    return len(affected)
+
+def get_related_articles(article_id, limit=6, fields=None, category_id=None):
+    """Read an article's precomputed neighbors.
+
+    Until the index covers the article, falls back to the latest articles
+    from the same category.
+    """
+    articles = article_query(fields).join(
+        RelatedArticle, RelatedArticle.related_id == Article.id
+    ).filter(
+        RelatedArticle.article_id == article_id,
+        Article.is_published == True
+    ).order_by(RelatedArticle.rank).limit(limit).all()
+
+    if articles or category_id is None:
+        return articles
+
+    return article_query(fields).filter(
+        Article.is_published == True,
+        Article.category_id == category_id,
+        Article.id != article_id
+    ).order_by(desc(Article.published_at)).limit(limit).all()
+
+def _indexed_change(article):
+    return any(attributes.get_history(article, name).has_changes() for name in INDEXED_FIELDS)
+
+@event.listens_for(db.session, 'after_flush')
+def _collect_changed_articles(session, flush_context):
+    changed = session.info.setdefault('related_changed', set())
+    for instance in session.new:
+        if isinstance(instance, Article):
+            changed.add(instance.id)
+    for instance in session.deleted:
+        if isinstance(instance, Article):
+            changed.add(instance.id)
+    for instance in session.dirty:
+        if isinstance(instance, Article) and _indexed_change(instance):
+            changed.add(instance.id)
+
+@event.listens_for(db.session, 'after_commit')
+def _queue_changed_articles(session):
+    changed = session.info.pop('related_changed', None)
+    if changed:
+        related_index.queue(changed)
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_changed_articles(session):
+    session.info.pop('related_changed', None)
+
+class RelatedIndex:
+    """Keeps the related-articles table current.
+
+    Committed article changes are queued and applied incrementally by a
+    background thread against an index kept in memory; the whole table is
+    rebuilt once it is older than the refresh interval. Another worker's
+    refresh (a remote ``related`` invalidation) means this worker's index
+    missed changes, so it is dropped and rebuilt from the database on the
+    next update.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.worker = None
+        self.top_n = 10
+        self.interval = 3600
+        self.index = None
+        self._pending = set()
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.top_n = app.config.get('RELATED_TOP_N', 10)
+        self.interval = app.config.get('RELATED_REBUILD_INTERVAL', 3600)
+        self.worker = PeriodicWorker('related-refresh', self.interval, self.refresh)
+        app.extensions['related_index'] = self
+        app.before_request(self.worker.ensure_started)
+        response_cache.on_invalidate(self._drop_index, tags=('related',), local=False)
+
+    def _drop_index(self, tags):
+        self.index = None
+
+    def queue(self, article_ids):
+        if self.worker is None:
+            return
+        with self._lock:
+            self._pending.update(article_ids)
+        self.worker.wake()
+
+    def refresh(self, force=False):
+        with self._lock:
+            pending, self._pending = self._pending, set()
+
+        with self.app.app_context():
+            try:
+                # The oldest row dates the last full rebuild (by any worker)
+                oldest = db.session.query(func.min(RelatedArticle.computed_at)).scalar()
+                if force or oldest is None or datetime.utcnow() - oldest >= timedelta(seconds=self.interval):
+                    self.index = _rebuild(self.top_n, datetime.utcnow())
+                elif pending:
+                    index = self.index if self.index is not None else load_index()
+                    # Unset while being updated, so a failure leaves no half-applied index behind
+                    self.index = None
+                    update_related(index, pending, self.top_n)
+                    self.index = index
+                else:
+                    return False
+                response_cache.invalidate('related')
+                return True
+            except Exception:
+                db.session.rollback()
+                with self._lock:
+                    self._pending |= pending
+                self.app.logger.exception('Failed to refresh related articles')
+                return False
+
+related_index = RelatedIndex()
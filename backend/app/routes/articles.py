@@ -1,22 +1,53 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app, stream_with_context
+from flask_jwt_extended import jwt_required, verify_jwt_in_request
 from app import db
 from app.models import Article, Author, Category, Tag
-from app.schemas import article_schema, articles_schema
+from app.schemas import article_schema, ArticleSchema
+from app.serializers import article_serializer
+from app.pagination import keyset_paginate, InvalidCursor
+from app import search
+from app.queries import article_query
+from app.projections import request_fields, resolve_fields, article_serializer_for, InvalidFields
+from app.view_counter import view_counter
+from app.cache import response_cache, key_from_args
+from app.coalesce import request_coalescer
+from app.http_cache import http_cache, cache_policy
+from app.surrogate import add_surrogate_keys, collect_surrogate_keys
+from app.conditional import row_etag, not_modified, add_validators, conditional_response
+from app.trending import get_trending_articles as load_trending_articles, window_for_days, WINDOWS
+from app.related import related_index, get_related_articles as load_related_articles
+from app.importer import ArticleImporter
+from app.export import export_format, export_response, query_partitions, schema_columns, InvalidExportFormat
+from app import counters
 from sqlalchemy import desc, func
 from datetime import datetime, timedelta
 
 articles_bp = Blueprint('articles', __name__)
+articles_bp.after_request(conditional_response)
+http_cache.blueprint_policy(articles_bp, 'listing', keys=('articles',))
 
 @articles_bp.route('/', methods=['GET'])
 def get_articles():
-    """Get all articles with pagination and filtering"""
+    """Get all articles with pagination and filtering
+
+    Passing ``cursor`` (empty for the first page) switches to keyset
+    pagination; ``with_total=true`` adds the otherwise skipped count.
+    ``fields`` picks a projection (card, teaser, full) or a field list.
+    """
+    try:
+        fields = request_fields()
+    except InvalidFields as e:
+        return jsonify({'error': str(e)}), 400
+    serializer = article_serializer_for(fields, many=True)
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 10, type=int)
+    cursor = request.args.get('cursor')
+    with_total = request.args.get('with_total', 'false').lower() == 'true'
     category = request.args.get('category')
     author = request.args.get('author')
     published_only = request.args.get('published', 'true').lower() == 'true'
     
-    query = Article.query
+    query = article_query(fields)
     
     if published_only:
         query = query.filter(Article.is_published == True)
@@ -27,14 +58,39 @@ def get_articles():
     if author:
         query = query.join(Author).filter(Author.name.ilike(f'%{author}%'))
     
+    if cursor is not None:
+        try:
+            result = keyset_paginate(query, cursor, per_page, with_total)
+        except InvalidCursor as e:
+            return jsonify({'error': str(e)}), 400
+        
+        return jsonify({
+            'articles': serializer.dump(result['items']),
+            'next_cursor': result['next_cursor'],
+            'has_next': result['has_next'],
+            'per_page': per_page,
+            'total': result['total']
+        })
+    
     query = query.order_by(desc(Article.published_at))
     
+    # Unfiltered published listings read their total from the counters
+    total = None
+    if published_only and not author:
+        if not category:
+            total = counters.get_count()
+        else:
+            category_id = db.session.query(Category.id).filter_by(slug=category).scalar()
+            total = counters.get_count('category', category_id) if category_id else 0
+    
     articles = query.paginate(
-        page=page, per_page=per_page, error_out=False
+        page=page, per_page=per_page, error_out=False, count=total is None
     )
+    if total is not None:
+        articles.total = total
     
     return jsonify({
-        'articles': articles_schema.dump(articles.items),
+        'articles': serializer.dump(articles.items),
         'total': articles.total,
         'pages': articles.pages,
         'current_page': page,
@@ -43,17 +99,55 @@ def get_articles():
     })
 
 @articles_bp.route('/<slug>', methods=['GET'])
+@cache_policy('article')
 def get_article_by_slug(slug):
-    """Get a single article by slug"""
-    article = Article.query.filter_by(slug=slug).first()
+    """Get a single article by slug
+
+    Concurrent requests for the same slug share one load; each still
+    counts its view and gets its own conditional response.
+    """
+    def load():
+        with collect_surrogate_keys() as keys:
+            article = article_query().filter_by(slug=slug).first()
+            if not article:
+                return None
+            return article.id, article.updated_at, article.views or 0, article_serializer.dump(article), keys
+    
+    loaded, _ = request_coalescer.do(f'article:{slug}', load)
+    if loaded is None:
+        return jsonify({'error': 'Article not found'}), 404
+    article_id, updated_at, views, data, keys = loaded
+    add_surrogate_keys(*keys)
+    
+    # Buffer the view; it is written in a batch by the view counter
+    view_counter.record(article_id)
+    
+    # Answer revalidations from the row version before building the body
+    etag = row_etag(article_id, updated_at)
+    unchanged = not_modified(etag, updated_at)
+    if unchanged:
+        return unchanged
+    
+    data = dict(data, views=views + view_counter.pending_for(article_id))
+    return add_validators(jsonify(data), etag, updated_at)
+
+@articles_bp.route('/<slug>/related', methods=['GET'])
+@response_cache.cached(key=key_from_args('limit', 'fields'), tags=('articles', 'related'))
+def get_related_articles(slug):
+    """Get articles related to one, from the precomputed neighbor index"""
+    article = db.session.query(Article.id, Article.category_id).filter_by(slug=slug).first()
     if not article:
         return jsonify({'error': 'Article not found'}), 404
     
-    # Increment view count
-    article.views += 1
-    db.session.commit()
+    limit = min(max(request.args.get('limit', 6, type=int), 1), related_index.top_n)
+    try:
+        fields = request_fields()
+    except InvalidFields as e:
+        return jsonify({'error': str(e)}), 400
+    serializer = article_serializer_for(fields, many=True)
     
-    return jsonify(article_schema.dump(article))
+    articles = load_related_articles(article.id, limit, fields=fields, category_id=article.category_id)
+    return jsonify(serializer.dump(articles))
 
 @articles_bp.route('/', methods=['POST'])
 def create_article():
@@ -67,15 +161,60 @@ def create_article():
         article = article_schema.load(json_data)
         db.session.add(article)
         db.session.commit()
+        response_cache.invalidate('articles')
         
         return jsonify(article_schema.dump(article)), 201
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
+@articles_bp.route('/import', methods=['POST'])
+@jwt_required()
+def import_articles():
+    """Bulk upsert articles by slug from an NDJSON body
+
+    Streams back one NDJSON result per input line followed by a summary.
+    ``batch_size`` overrides how many lines are committed together.
+    """
+    batch_size = request.args.get('batch_size', current_app.config['IMPORT_BATCH_SIZE'], type=int)
+    importer = ArticleImporter(min(max(batch_size, 1), 5000))
+    
+    def generate():
+        for result in importer.run(request.stream):
+            yield current_app.json.dumps(result) + '\n'
+    
+    return current_app.response_class(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@articles_bp.route('/export', methods=['GET'])
+@cache_policy(None)
+def export_articles():
+    """Stream articles as NDJSON or CSV (``format``) from a server-side cursor
+
+    ``fields`` picks the projection (every field by default); pass
+    ``published=false`` with a JWT to include drafts.
+    """
+    try:
+        format = export_format(request.args.get('format'))
+        fields = request_fields(default='full')
+    except (InvalidExportFormat, InvalidFields) as e:
+        return jsonify({'error': str(e)}), 400
+    published_only = request.args.get('published', 'true').lower() == 'true'
+    if not published_only:
+        verify_jwt_in_request()
+    serializer = article_serializer_for(fields, many=True)
+    
+    query = article_query(fields)
+    if published_only:
+        query = query.filter(Article.is_published == True)
+    query = query.order_by(desc(Article.published_at), desc(Article.id))
+    
+    partitions = (serializer.dump(articles)
+                  for articles in query_partitions(query, current_app.config['EXPORT_BATCH_SIZE']))
+    return export_response(partitions, format, 'articles', columns=schema_columns(ArticleSchema(only=fields)))
+
 @articles_bp.route('/<slug>', methods=['PUT'])
 def update_article(slug):
     """Update an existing article"""
-    article = Article.query.filter_by(slug=slug).first()
+    article = article_query().filter_by(slug=slug).first()
     if not article:
         return jsonify({'error': 'Article not found'}), 404
     
@@ -91,6 +230,7 @@ def update_article(slug):
         
         article.updated_at = datetime.utcnow()
         db.session.commit()
+        response_cache.invalidate('articles')
         
         return jsonify(article_schema.dump(article))
     except Exception as e:
@@ -105,62 +245,107 @@ def delete_article(slug):
     
     db.session.delete(article)
     db.session.commit()
+    response_cache.invalidate('articles')
     
     return jsonify({'message': 'Article deleted successfully'})
 
 @articles_bp.route('/trending', methods=['GET'])
+@response_cache.cached(key=key_from_args('window', 'days', 'limit', 'fields'), tags=('articles', 'trending'))
 def get_trending_articles():
-    """Get trending articles based on views in the last 7 days"""
+    """Get trending articles ranked by time-decayed views
+
+    ``window`` is one of 1h, 24h or 7d; without it the legacy ``days``
+    argument picks the window.
+    """
     limit = request.args.get('limit', 10, type=int)
     days = request.args.get('days', 7, type=int)
+    window = request.args.get('window') or window_for_days(days)
     
-    since_date = datetime.utcnow() - timedelta(days=days)
+    if window not in WINDOWS:
+        return jsonify({'error': f'window must be one of {", ".join(WINDOWS)}'}), 400
     
-    articles = Article.query.filter(
-        Article.is_published == True,
-        Article.published_at >= since_date
-    ).order_by(desc(Article.views)).limit(limit).all()
+    try:
+        fields = request_fields()
+    except InvalidFields as e:
+        return jsonify({'error': str(e)}), 400
+    serializer = article_serializer_for(fields, many=True)
+    
+    since_date = datetime.utcnow() - timedelta(days=days)
+    articles = load_trending_articles(window, limit, since=since_date, fields=fields)
     
-    return jsonify(articles_schema.dump(articles))
+    return jsonify(serializer.dump(articles))
 
 @articles_bp.route('/recent', methods=['GET'])
+@response_cache.cached(key=key_from_args('limit', 'fields'), tags=('articles',))
 def get_recent_articles():
     """Get recent articles"""
     limit = request.args.get('limit', 10, type=int)
+    try:
+        fields = request_fields()
+    except InvalidFields as e:
+        return jsonify({'error': str(e)}), 400
+    serializer = article_serializer_for(fields, many=True)
     
-    articles = Article.query.filter(
+    articles = article_query(fields).filter(
         Article.is_published == True
     ).order_by(desc(Article.published_at)).limit(limit).all()
     
-    return jsonify(articles_schema.dump(articles))
+    return jsonify(serializer.dump(articles))
 
 @articles_bp.route('/search', methods=['GET'])
 def search_articles():
-    """Search articles by title and content"""
-    query = request.args.get('q', '')
+    """Search articles by title, excerpt and content, ranked by relevance"""
+    query = request.args.get('q', '').strip()
     if not query:
         return jsonify({'error': 'Search query is required'}), 400
     
-    articles = Article.query.filter(
-        Article.is_published == True,
-        db.or_(
-            Article.title.ilike(f'%{query}%'),
-            Article.content.ilike(f'%{query}%')
-        )
-    ).order_by(desc(Article.published_at)).all()
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', 10, type=int), 1), 50)
+    
+    try:
+        fields = request_fields()
+    except InvalidFields as e:
+        return jsonify({'error': str(e)}), 400
+    serializer = article_serializer_for(fields)
+    
+    results, has_next = search.search_articles(query, page, per_page, fields)
+    
+    articles = []
+    for article, rank, title_highlight, snippet in results:
+        data = serializer.dump(article)
+        data['rank'] = rank
+        data['highlight'] = {
+            'title': title_highlight,
+            'snippet': snippet
+        }
+        articles.append(data)
     
-    return jsonify(articles_schema.dump(articles))
+    return jsonify({
+        'articles': articles,
+        'query': query,
+        'current_page': page,
+        'per_page': per_page,
+        'has_next': has_next,
+        'has_prev': page > 1
+    })
 
 @articles_bp.route('/recent-with-main', methods=['GET'])
+@response_cache.cached(key=key_from_args('locale', 'skip', 'first', 'fields'), tags=('articles',))
 def get_recent_articles_with_main():
     """Get recent articles with a main article (first one) and others"""
+    try:
+        fields = request_fields()
+    except InvalidFields as e:
+        return jsonify({'error': str(e)}), 400
+    serializer = article_serializer_for(fields, many=True)
+    
     try:
         locale = request.args.get('locale', 'en')
         skip = request.args.get('skip', 0, type=int)
         first = request.args.get('first', 4, type=int)
         
         # Get recent articles, skipping the specified number
-        articles = Article.query.filter(
+        articles = article_query(fields).filter(
             Article.is_published == True
         ).order_by(desc(Article.published_at)).offset(skip).limit(first).all()
         
@@ -180,8 +365,8 @@ def get_recent_articles_with_main():
         return jsonify({
             'success': True,
             'data': {
-                'mainArticle': article_schema.dump(main_article) if main_article else None,
-                'articles': articles_schema.dump(other_articles)
+                'mainArticle': article_serializer_for(fields).dump(main_article) if main_article else None,
+                'articles': serializer.dump(other_articles)
             }
         })
         
@@ -193,8 +378,15 @@ def get_recent_articles_with_main():
         }), 500
 
 @articles_bp.route('/by-category-slug', methods=['GET'])
+@response_cache.cached(key=key_from_args('locale', 'categorySlug', 'skip', 'first', 'fields'), tags=('articles', 'categories'))
 def get_articles_by_category_slug():
     """Get articles by category slug"""
+    try:
+        fields = request_fields()
+    except InvalidFields as e:
+        return jsonify({'error': str(e)}), 400
+    serializer = article_serializer_for(fields, many=True)
+    
     try:
         locale = request.args.get('locale', 'en')
         category_slug = request.args.get('categorySlug')
@@ -210,7 +402,7 @@ def get_articles_by_category_slug():
             return jsonify({'error': 'Category not found'}), 404
         
         # Get articles in this category
-        articles = Article.query.filter(
+        articles = article_query(fields).filter(
             Article.is_published == True,
             Article.category_id == category.id
         ).order_by(desc(Article.published_at)).offset(skip).limit(first).all()
@@ -218,17 +410,14 @@ def get_articles_by_category_slug():
         return jsonify({
             'success': True,
             'data': {
-                'articles': articles_schema.dump(articles),
+                'articles': serializer.dump(articles),
                 'category': {
                     'id': category.id,
                     'name': category.name,
                     'slug': category.slug,
                     'description': category.description
                 },
-                'total': Article.query.filter(
-                    Article.is_published == True,
-                    Article.category_id == category.id
-                ).count()
+                'total': counters.get_count('category', category.id)
             }
         })
         
@@ -245,7 +434,7 @@ def get_articles_count():
     try:
         locale = request.args.get('locale', 'en')
         
-        count = Article.query.filter(Article.is_published == True).count()
+        count = counters.get_count()
         
         return jsonify({
             'success': True,
@@ -270,14 +459,19 @@ def get_articles_by_slugs():
         locale = data.get('locale', 'en')
         slugs = data['slugs']
         
-        articles = Article.query.filter(
+        try:
+            fields = resolve_fields(data.get('fields') or request.args.get('fields'))
+        except InvalidFields as e:
+            return jsonify({'error': str(e)}), 400
+        
+        articles = article_query(fields).filter(
             Article.is_published == True,
             Article.slug.in_(slugs)
         ).all()
         
         return jsonify({
             'success': True,
-            'data': articles_schema.dump(articles)
+            'data': article_serializer_for(fields, many=True).dump(articles)
         })
         
     except Exception as e:
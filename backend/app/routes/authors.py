@@ -1,7 +1,9 @@
 from flask import Blueprint, request, jsonify
 from app import db
 from app.models import Author
-from app.schemas import author_schema, authors_schema
+from app.schemas import author_schema
+from app.serializers import author_serializer, authors_serializer
+from app.cache import response_cache
 
 authors_bp = Blueprint('authors', __name__)
 
@@ -9,7 +11,7 @@ authors_bp = Blueprint('authors', __name__)
 def get_authors():
     """Get all authors"""
     authors = Author.query.all()
-    return jsonify(authors_schema.dump(authors))
+    return jsonify(authors_serializer.dump(authors))
 
 @authors_bp.route('/<author_id>', methods=['GET'])
 def get_author(author_id):
@@ -18,7 +20,7 @@ def get_author(author_id):
     if not author:
         return jsonify({'error': 'Author not found'}), 404
     
-    return jsonify(author_schema.dump(author))
+    return jsonify(author_serializer.dump(author))
 
 @authors_bp.route('/', methods=['POST'])
 def create_author():
@@ -53,6 +55,7 @@ def update_author(author_id):
                 setattr(author, key, value)
         
         db.session.commit()
+        response_cache.invalidate('articles')
         return jsonify(author_schema.dump(author))
     except Exception as e:
         return jsonify({'error': str(e)}), 400
@@ -66,5 +69,6 @@ def delete_author(author_id):
     
     db.session.delete(author)
     db.session.commit()
+    response_cache.invalidate('articles')
     
     return jsonify({'message': 'Author deleted successfully'})
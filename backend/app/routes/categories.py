@@ -1,15 +1,26 @@
 from flask import Blueprint, request, jsonify
 from app import db
 from app.models import Category, Article
-from app.schemas import category_schema, categories_schema
+from app.schemas import category_schema
+from app.serializers import category_serializer, categories_serializer
+from app.pagination import keyset_paginate, InvalidCursor
+from app.queries import article_query
+from app.projections import request_fields, article_serializer_for, InvalidFields
+from app.cache import response_cache
+from app import counters
+from app.conditional import conditional_response
+from app.http_cache import http_cache
 
 categories_bp = Blueprint('categories', __name__)
+categories_bp.after_request(conditional_response)
+http_cache.blueprint_policy(categories_bp, 'navigation', keys=('categories',))
 
 @categories_bp.route('/', methods=['GET'])
+@response_cache.cached(tags=('categories',))
 def get_categories():
     """Get all categories"""
     categories = Category.query.all()
-    return jsonify(categories_schema.dump(categories))
+    return jsonify(categories_serializer.dump(categories))
 
 @categories_bp.route('/<slug>', methods=['GET'])
 def get_category_by_slug(slug):
@@ -18,29 +29,54 @@ def get_category_by_slug(slug):
     if not category:
         return jsonify({'error': 'Category not found'}), 404
     
-    return jsonify(category_schema.dump(category))
+    return jsonify(category_serializer.dump(category))
 
 @categories_bp.route('/<slug>/articles', methods=['GET'])
 def get_category_articles(slug):
-    """Get articles by category"""
+    """Get articles by category, by page or by keyset ``cursor``, in the ``fields`` projection"""
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 10, type=int)
+    cursor = request.args.get('cursor')
+    with_total = request.args.get('with_total', 'false').lower() == 'true'
     
     category = Category.query.filter_by(slug=slug).first()
     if not category:
         return jsonify({'error': 'Category not found'}), 404
     
-    articles = Article.query.filter(
+    try:
+        fields = request_fields()
+    except InvalidFields as e:
+        return jsonify({'error': str(e)}), 400
+    serializer = article_serializer_for(fields, many=True)
+    
+    query = article_query(fields).filter(
         Article.category_id == category.id,
         Article.is_published == True
-    ).order_by(Article.published_at.desc()).paginate(
-        page=page, per_page=per_page, error_out=False
     )
     
-    from app.schemas import articles_schema
+    if cursor is not None:
+        try:
+            result = keyset_paginate(query, cursor, per_page, with_total)
+        except InvalidCursor as e:
+            return jsonify({'error': str(e)}), 400
+        
+        return jsonify({
+            'category': category_serializer.dump(category),
+            'articles': serializer.dump(result['items']),
+            'next_cursor': result['next_cursor'],
+            'has_next': result['has_next'],
+            'per_page': per_page,
+            'total': result['total']
+        })
+    
+    articles = query.order_by(Article.published_at.desc()).paginate(
+        page=page, per_page=per_page, error_out=False, count=False
+    )
+    articles.total = counters.get_count('category', category.id)
+    
     return jsonify({
-        'category': category_schema.dump(category),
-        'articles': articles_schema.dump(articles.items),
+        'category': category_serializer.dump(category),
+        'articles': serializer.dump(articles.items),
         'total': articles.total,
         'pages': articles.pages,
         'current_page': page,
@@ -59,6 +95,7 @@ def create_category():
         category = category_schema.load(json_data)
         db.session.add(category)
         db.session.commit()
+        response_cache.invalidate('categories')
         
         return jsonify(category_schema.dump(category)), 201
     except Exception as e:
@@ -81,6 +118,7 @@ def update_category(slug):
                 setattr(category, key, value)
         
         db.session.commit()
+        response_cache.invalidate('categories', 'articles')
         return jsonify(category_schema.dump(category))
     except Exception as e:
         return jsonify({'error': str(e)}), 400
@@ -94,5 +132,6 @@ def delete_category(slug):
     
     db.session.delete(category)
     db.session.commit()
+    response_cache.invalidate('categories', 'articles')
     
     return jsonify({'message': 'Category deleted successfully'})
@@ -0,0 +1,30 @@
+from flask import Blueprint, request, jsonify
+from app import changes as change_log
+
+changes_bp = Blueprint('changes', __name__)
+
+@changes_bp.route('', methods=['GET'])
+def get_changes():
+    """Created, updated and deleted records since a change token
+
+    Without ``since`` only the current token is returned, to start
+    polling from. ``types`` limits the entities (comma separated).
+    """
+    types = request.args.get('types')
+    entities = tuple(name.strip() for name in types.split(',') if name.strip()) if types else change_log.ENTITIES
+    unknown = set(entities) - set(change_log.ENTITIES)
+    if unknown:
+        return jsonify({'error': f'Unknown types: {", ".join(sorted(unknown))}'}), 400
+    
+    since = request.args.get('since')
+    if since is None:
+        return jsonify({'next_token': change_log.current_token(), 'has_more': False,
+                        'changes': {entity: {'created': [], 'updated': [], 'deleted': []} for entity in entities}})
+    
+    try:
+        since = change_log.parse_token(since)
+    except change_log.InvalidChangeToken as e:
+        return jsonify({'error': str(e)}), 400
+    
+    limit = min(max(request.args.get('limit', 500, type=int), 1), 5000)
+    return jsonify(change_log.changes_since(since, entities, limit))
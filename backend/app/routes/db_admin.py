@@ -1,5 +1,7 @@
-from flask import Blueprint, jsonify, render_template_string, request
+from flask import Blueprint, jsonify, render_template_string, request, current_app
 from app import db
+from flask_jwt_extended import jwt_required
+from app.export import export_format, export_response, table_partitions, InvalidExportFormat, EXPORTABLE_TABLES
 from sqlalchemy import text
 import os
 
@@ -589,6 +591,21 @@ def table_data_json(table_name):
     except Exception as e:
         return jsonify({"error": str(e), "status": "error"}), 500
 
+@db_admin_bp.route('/api/admin/export/<table_name>')
+@jwt_required()
+def export_table(table_name):
+    """Stream a whole content table as NDJSON or CSV from a server-side cursor"""
+    table = db.metadata.tables.get(table_name) if table_name in EXPORTABLE_TABLES else None
+    if table is None:
+        return jsonify({"error": f"Unknown table: {table_name}", "status": "error"}), 404
+    try:
+        format = export_format(request.args.get('format'))
+    except InvalidExportFormat as e:
+        return jsonify({"error": str(e), "status": "error"}), 400
+    
+    partitions = table_partitions(table, current_app.config['EXPORT_BATCH_SIZE'])
+    return export_response(partitions, format, table_name, columns=table.columns.keys())
+
 @db_admin_bp.route('/api/admin/stats-json')
 def stats_json():
     """JSON API for database statistics"""
@@ -0,0 +1,38 @@
+from flask import Blueprint, request, url_for, current_app
+from app.sitemap import sitemaps
+from app.compression import compressor
+from app.http_cache import http_cache
+
+feeds_bp = Blueprint('feeds', __name__)
+http_cache.blueprint_policy(feeds_bp, 'feed', keys=('articles',))
+
+def _xml_response(document, mimetype='application/xml'):
+    response = current_app.response_class(document.body, mimetype=mimetype)
+    response.set_etag(document.etag)
+    if document.lastmod:
+        response.last_modified = document.lastmod.replace(microsecond=0)
+    return compressor.compress_cached(response.make_conditional(request), document)
+
+def _shard_location(number):
+    """Public URL of a shard: under SITE_URL when set, else this request's host"""
+    if sitemaps.site_url:
+        return sitemaps.site_url + url_for('feeds.sitemap_shard', number=number)
+    return url_for('feeds.sitemap_shard', number=number, _external=True)
+
+@feeds_bp.route('/sitemap.xml', methods=['GET'])
+def sitemap_index():
+    """Sitemap index with one entry per shard of article URLs"""
+    return _xml_response(sitemaps.render_index(_shard_location))
+
+@feeds_bp.route('/sitemap-<int:number>.xml', methods=['GET'])
+def sitemap_shard(number):
+    """One prebuilt sitemap shard"""
+    shard = sitemaps.shard(number)
+    if shard is None:
+        return current_app.response_class('Sitemap not found', status=404, mimetype='text/plain')
+    return _xml_response(shard.document)
+
+@feeds_bp.route('/feed.xml', methods=['GET'])
+def rss_feed():
+    """RSS 2.0 feed of the latest published articles"""
+    return _xml_response(sitemaps.feed(), mimetype='application/rss+xml')
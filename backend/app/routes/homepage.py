@@ -1,68 +1,34 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from app import db
 from app.models import Article, Author, Category, Tag
 from app.schemas import article_schema, articles_schema
+from app.cache import response_cache, key_from_args
+from app import counters
+from app.homepage_snapshot import homepage_snapshots
+from app.compression import compressor
+from app.http_cache import http_cache, cache_policy
+from app.surrogate import add_surrogate_keys
 from sqlalchemy import desc, func
 from datetime import datetime, timedelta
 
 # Create homepage blueprint
 homepage_bp = Blueprint('homepage', __name__)
+http_cache.blueprint_policy(homepage_bp, 'listing', keys=('articles', 'categories', 'trending'))
 
 @homepage_bp.route('/api/homepage', methods=['GET'])
 def get_homepage():
-    """Get homepage data with featured articles and sections"""
+    """Get homepage data with featured articles and sections
+
+    Served from a prebuilt per-locale snapshot; see app.homepage_snapshot.
+    """
     try:
         locale = request.args.get('locale', 'en')
+        snapshot = homepage_snapshots.get(locale)
+        add_surrogate_keys(*snapshot.surrogate_keys)
         
-        # Get trending articles (based on views)
-        trending = Article.query.filter(
-            Article.is_published == True
-        ).order_by(desc(Article.views)).limit(5).all()
-        
-        # Get recent articles
-        recent = Article.query.filter(
-            Article.is_published == True
-        ).order_by(desc(Article.published_at)).limit(6).all()
-        
-        # Get featured articles (you can add a featured flag to Article model)
-        featured = Article.query.filter(
-            Article.is_published == True
-        ).order_by(desc(Article.published_at)).limit(3).all()
-        
-        # Get categories with article counts
-        categories = db.session.query(
-            Category.id,
-            Category.name,
-            Category.slug,
-            Category.description,
-            func.count(Article.id).label('article_count')
-        ).join(Article, Article.category_id == Category.id)\
-         .filter(Article.is_published == True)\
-         .group_by(Category.id)\
-         .limit(6).all()
-        
-        categories_data = [
-            {
-                'id': cat.id,
-                'name': cat.name,
-                'slug': cat.slug,
-                'description': cat.description,
-                'articleCount': cat.article_count
-            }
-            for cat in categories
-        ]
-        
-        return jsonify({
-            'success': True,
-            'data': {
-                'trending_articles': articles_schema.dump(trending),
-                'recent_articles': articles_schema.dump(recent),
-                'featured_articles': articles_schema.dump(featured),
-                'categories': categories_data,
-                'total_articles': Article.query.filter(Article.is_published == True).count(),
-                'locale': locale
-            }
-        })
+        response = current_app.response_class(snapshot.body, mimetype='application/json')
+        response.set_etag(snapshot.etag)
+        return compressor.compress_cached(response.make_conditional(request), snapshot)
         
     except Exception as e:
         return jsonify({
@@ -72,6 +38,7 @@ def get_homepage():
         }), 500
 
 @homepage_bp.route('/api/homepage/metadata', methods=['GET'])
+@response_cache.cached(key=key_from_args('locale'), tags=('articles', 'categories'))
 def get_homepage_metadata():
     """Get homepage metadata for SEO"""
     try:
@@ -83,7 +50,7 @@ def get_homepage_metadata():
         ).order_by(desc(Article.published_at)).first()
         
         # Get total counts for metadata
-        total_articles = Article.query.filter(Article.is_published == True).count()
+        total_articles = counters.get_count()
         total_categories = Category.query.count()
         
         return jsonify({
@@ -1,11 +1,16 @@
 from flask import Blueprint, request, jsonify
 from app import db
 from app.models import MenuItem
-from app.schemas import menu_item_schema, menu_items_schema
+from app.schemas import menu_item_schema
+from app.serializers import menu_item_serializer, menu_items_serializer
+from app.cache import response_cache, key_from_args
+from app.http_cache import http_cache
 
 menu_bp = Blueprint('menu', __name__)
+http_cache.blueprint_policy(menu_bp, 'navigation', keys=('menu',))
 
 @menu_bp.route('/', methods=['GET'])
+@response_cache.cached(key=key_from_args('type', 'active'), tags=('menu',))
 def get_menu_items():
     """Get all menu items"""
     menu_type = request.args.get('type', 'header')  # header or footer
@@ -19,10 +24,11 @@ def get_menu_items():
     
     return jsonify({
         'menu_type': menu_type,
-        'items': menu_items_schema.dump(menu_items)
+        'items': menu_items_serializer.dump(menu_items)
     })
 
 @menu_bp.route('/header', methods=['GET'])
+@response_cache.cached(tags=('menu',))
 def get_header_menu():
     """Get header menu items"""
     menu_items = MenuItem.query.filter_by(
@@ -30,9 +36,10 @@ def get_header_menu():
         is_active=True
     ).order_by(MenuItem.menu_order).all()
     
-    return jsonify(menu_items_schema.dump(menu_items))
+    return jsonify(menu_items_serializer.dump(menu_items))
 
 @menu_bp.route('/footer', methods=['GET'])
+@response_cache.cached(tags=('menu',))
 def get_footer_menu():
     """Get footer menu items"""
     menu_items = MenuItem.query.filter_by(
@@ -40,13 +47,13 @@ def get_footer_menu():
         is_active=True
     ).order_by(MenuItem.menu_order).all()
     
-    return jsonify(menu_items_schema.dump(menu_items))
+    return jsonify(menu_items_serializer.dump(menu_items))
 
 @menu_bp.route('/<item_id>', methods=['GET'])
 def get_menu_item(item_id):
     """Get a specific menu item by ID"""
     menu_item = MenuItem.query.get_or_404(item_id)
-    return jsonify(menu_item_schema.dump(menu_item))
+    return jsonify(menu_item_serializer.dump(menu_item))
 
 @menu_bp.route('/', methods=['POST'])
 def create_menu_item():
@@ -63,6 +70,7 @@ def create_menu_item():
     
     db.session.add(menu_item)
     db.session.commit()
+    response_cache.invalidate('menu')
     
     return jsonify(menu_item_schema.dump(menu_item)), 201
 
@@ -79,6 +87,7 @@ def update_menu_item(item_id):
     menu_item.menu_type = data.get('menu_type', menu_item.menu_type)
     
     db.session.commit()
+    response_cache.invalidate('menu')
     
     return jsonify(menu_item_schema.dump(menu_item))
 
@@ -88,5 +97,6 @@ def delete_menu_item(item_id):
     menu_item = MenuItem.query.get_or_404(item_id)
     db.session.delete(menu_item)
     db.session.commit()
+    response_cache.invalidate('menu')
     
     return jsonify({'message': 'Menu item deleted successfully'}), 200
@@ -1,9 +1,14 @@
 from flask import Blueprint, request, jsonify
 from app import db
 from app.models import Page
-from app.schemas import page_schema, pages_schema
+from app.schemas import page_schema
+from app.serializers import page_serializer, pages_serializer
+from app.conditional import row_etag, not_modified, add_validators, conditional_response
+from app.http_cache import http_cache
 
 pages_bp = Blueprint('pages', __name__)
+pages_bp.after_request(conditional_response)
+http_cache.blueprint_policy(pages_bp, 'navigation', keys=('pages',))
 
 @pages_bp.route('/', methods=['GET'])
 def get_pages():
@@ -23,7 +28,7 @@ def get_pages():
     )
     
     return jsonify({
-        'pages': pages_schema.dump(pages.items),
+        'pages': pages_serializer.dump(pages.items),
         'total': pages.total,
         'total_pages': pages.pages,
         'current_page': page_num
@@ -33,13 +38,23 @@ def get_pages():
 def get_page_by_id(page_id):
     """Get a specific page by ID"""
     page = Page.query.get_or_404(page_id)
-    return jsonify(page_schema.dump(page))
+    etag = row_etag(page.id, page.updated_at)
+    unchanged = not_modified(etag, page.updated_at)
+    if unchanged:
+        return unchanged
+    
+    return add_validators(jsonify(page_serializer.dump(page)), etag, page.updated_at)
 
 @pages_bp.route('/slug/<slug>', methods=['GET'])
 def get_page_by_slug(slug):
     """Get a specific page by slug"""
     page = Page.query.filter_by(slug=slug, is_published=True).first_or_404()
-    return jsonify(page_schema.dump(page))
+    etag = row_etag(page.id, page.updated_at)
+    unchanged = not_modified(etag, page.updated_at)
+    if unchanged:
+        return unchanged
+    
+    return add_validators(jsonify(page_serializer.dump(page)), etag, page.updated_at)
 
 @pages_bp.route('/', methods=['POST'])
 def create_page():
@@ -57,6 +72,7 @@ def create_page():
     
     db.session.add(page)
     db.session.commit()
+    http_cache.purge('pages')
     
     return jsonify(page_schema.dump(page)), 201
 
@@ -74,6 +90,7 @@ def update_page(page_id):
     page.is_published = data.get('is_published', page.is_published)
     
     db.session.commit()
+    http_cache.purge('pages')
     
     return jsonify(page_schema.dump(page))
 
@@ -83,5 +100,6 @@ def delete_page(page_id):
     page = Page.query.get_or_404(page_id)
     db.session.delete(page)
     db.session.commit()
+    http_cache.purge('pages')
     
     return jsonify({'message': 'Page deleted successfully'}), 200
@@ -1,12 +1,19 @@
 from flask import Blueprint, request, jsonify
 from app import db
 from app.models import SiteSettings
-from app.schemas import site_settings_schema, site_settings_list_schema
+from app.schemas import site_settings_schema
+from app.serializers import site_settings_list_serializer
+from app.cache import response_cache
+from app.conditional import row_etag, not_modified, add_validators, conditional_response
+from app.http_cache import http_cache
 import json
 
 settings_bp = Blueprint('settings', __name__)
+settings_bp.after_request(conditional_response)
+http_cache.blueprint_policy(settings_bp, 'navigation', keys=('settings',))
 
 @settings_bp.route('/', methods=['GET'])
+@response_cache.cached(tags=('settings',))
 def get_all_settings():
     """Get all site settings"""
     settings = SiteSettings.query.all()
@@ -31,7 +38,7 @@ def get_all_settings():
     
     return jsonify({
         'settings': settings_dict,
-        'raw_settings': site_settings_list_schema.dump(settings)
+        'raw_settings': site_settings_list_serializer.dump(settings)
     })
 
 @settings_bp.route('/<setting_key>', methods=['GET'])
@@ -39,6 +46,11 @@ def get_setting(setting_key):
     """Get a specific setting by key"""
     setting = SiteSettings.query.filter_by(setting_key=setting_key).first_or_404()
     
+    etag = row_etag(setting.id, setting.updated_at)
+    unchanged = not_modified(etag, setting.updated_at)
+    if unchanged:
+        return unchanged
+    
     # Parse the value based on type
     if setting.setting_type == 'json':
         try:
@@ -55,12 +67,12 @@ def get_setting(setting_key):
     else:
         value = setting.setting_value
     
-    return jsonify({
+    return add_validators(jsonify({
         'key': setting_key,
         'value': value,
         'type': setting.setting_type,
         'description': setting.description
-    })
+    }), etag, setting.updated_at)
 
 @settings_bp.route('/navigation', methods=['GET'])
 def get_navigation_settings():
@@ -69,7 +81,7 @@ def get_navigation_settings():
         SiteSettings.setting_key.like('nav_%')
     ).all()
     
-    return jsonify(site_settings_list_schema.dump(nav_settings))
+    return jsonify(site_settings_list_serializer.dump(nav_settings))
 
 @settings_bp.route('/footer', methods=['GET'])
 def get_footer_settings():
@@ -78,7 +90,7 @@ def get_footer_settings():
         SiteSettings.setting_key.like('footer_%')
     ).all()
     
-    return jsonify(site_settings_list_schema.dump(footer_settings))
+    return jsonify(site_settings_list_serializer.dump(footer_settings))
 
 @settings_bp.route('/seo', methods=['GET'])
 def get_seo_settings():
@@ -87,7 +99,7 @@ def get_seo_settings():
         SiteSettings.setting_key.like('seo_%')
     ).all()
     
-    return jsonify(site_settings_list_schema.dump(seo_settings))
+    return jsonify(site_settings_list_serializer.dump(seo_settings))
 
 @settings_bp.route('/', methods=['POST'])
 def create_setting():
@@ -116,6 +128,7 @@ def create_setting():
     
     db.session.add(setting)
     db.session.commit()
+    response_cache.invalidate('settings')
     
     return jsonify(site_settings_schema.dump(setting)), 201
 
@@ -141,6 +154,7 @@ def update_setting(setting_key):
         setting.description = data['description']
     
     db.session.commit()
+    response_cache.invalidate('settings')
     
     return jsonify(site_settings_schema.dump(setting))
 
@@ -150,5 +164,6 @@ def delete_setting(setting_key):
     setting = SiteSettings.query.filter_by(setting_key=setting_key).first_or_404()
     db.session.delete(setting)
     db.session.commit()
+    response_cache.invalidate('settings')
     
     return jsonify({'message': f'Setting {setting_key} deleted successfully'}), 200
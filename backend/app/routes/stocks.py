@@ -1,38 +1,146 @@
-from flask import Blueprint, request, jsonify
+from datetime import datetime, timedelta, timezone
+from flask import Blueprint, request, jsonify, abort, current_app
+from sqlalchemy.exc import IntegrityError
 from app import db
 from app.models import StockQuote
-from app.schemas import stock_quote_schema, stock_quotes_schema
+from app.schemas import stock_quote_schema
+from app.cache import response_cache
+from app.http_cache import http_cache
+from app.quote_book import quote_book, SORT_ORDERS
+from app.quote_stream import quote_stream
+from app.analytics import stock_analytics
+from app.market_data import validate_quotes, upsert_quotes
+from app.price_history import InvalidHistoryRange, load_history, pick_period, record_ticks, volume_traded
 
 stocks_bp = Blueprint('stocks', __name__)
+http_cache.blueprint_policy(stocks_bp, 'quotes', keys=('stocks',))
+
+def _record_tick(stock, previous_volume=None):
+    if stock.current_price is not None:
+        record_ticks(db.session.connection(), [
+            (stock.symbol, stock.current_price, volume_traded(previous_volume, stock.volume))
+        ], datetime.utcnow())
+
+def _parse_time(value):
+    """ISO 8601 timestamp as naive UTC"""
+    moment = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+def _quote_changed(symbol):
+    """Update this worker's quote book in place and tell the others to reload"""
+    quote_book.refresh(symbol)
+    response_cache.invalidate('stocks')
 
 @stocks_bp.route('/', methods=['GET'])
 def get_stock_quotes():
-    """Get all stock quotes"""
+    """Get all stock quotes, served from the in-memory quote book"""
     limit = request.args.get('limit', 10, type=int)
     
-    stocks = StockQuote.query.limit(limit).all()
+    stocks = quote_book.all(limit)
     
     return jsonify({
-        'stocks': stock_quotes_schema.dump(stocks),
+        'stocks': [quote.data for quote in stocks],
         'count': len(stocks)
     })
 
 @stocks_bp.route('/<symbol>', methods=['GET'])
 def get_stock_by_symbol(symbol):
     """Get a specific stock quote by symbol"""
-    stock = StockQuote.query.filter_by(symbol=symbol.upper()).first_or_404()
-    return jsonify(stock_quote_schema.dump(stock))
+    stock = quote_book.get(symbol.upper())
+    if stock is None:
+        abort(404)
+    return jsonify(stock.data)
+
+@stocks_bp.route('/stream', methods=['GET'])
+def stream_stock_quotes():
+    """Server-Sent Events stream of quote changes
+
+    ``symbols`` is a comma-separated list to watch (default: all). The
+    stream opens with a ``snapshot`` event holding the current quotes,
+    then sends a ``quote`` event per changed symbol. A client that falls
+    behind gets only the latest quote for each symbol.
+    """
+    symbols = [symbol.strip().upper() for symbol in request.args.get('symbols', '').split(',') if symbol.strip()]
+    if len(symbols) > quote_stream.max_symbols:
+        return jsonify({'error': f'At most {quote_stream.max_symbols} symbols per stream'}), 400
+    
+    subscription = quote_stream.subscribe(symbols)
+    if subscription is None:
+        return jsonify({'error': 'Too many open quote streams'}), 503
+    return quote_stream.response(subscription)
+
+@stocks_bp.route('/analytics', methods=['GET'])
+def get_stock_analytics():
+    """SMA, EMA, volatility, returns and correlations over daily bars
+
+    ``symbols`` is a comma-separated list (default: every quoted symbol),
+    ``window`` the indicator window in trading days and ``days`` the
+    lookback in calendar days. ``series=true`` adds every day's values.
+    """
+    max_symbols = current_app.config['ANALYTICS_MAX_SYMBOLS']
+    max_days = current_app.config['ANALYTICS_MAX_DAYS']
+    symbols = [symbol.strip().upper() for symbol in request.args.get('symbols', '').split(',') if symbol.strip()]
+    symbols = symbols or [quote.symbol for quote in quote_book.all()]
+    window = request.args.get('window', 20, type=int)
+    days = request.args.get('days', 365, type=int)
+    if len(set(symbols)) > max_symbols:
+        return jsonify({'error': f'At most {max_symbols} symbols per request'}), 400
+    if not 2 <= window <= 252:
+        return jsonify({'error': 'window must be between 2 and 252'}), 400
+    if not 1 <= days <= max_days:
+        return jsonify({'error': f'days must be between 1 and {max_days}'}), 400
+    
+    analysis = stock_analytics.analyze(symbols, window, days)
+    return jsonify(analysis.payload(series=request.args.get('series', '').lower() in ('1', 'true')))
+
+@stocks_bp.route('/<symbol>/history', methods=['GET'])
+def get_stock_history(symbol):
+    """OHLCV bars for a symbol, read from a single rollup period
+
+    ``from`` and ``to`` are ISO 8601 timestamps (default: the last day).
+    ``interval`` is one of 1m, 5m, 1h, 1d; by default the finest period
+    whose bars for the range fit in HISTORY_MAX_POINTS.
+    """
+    max_points = current_app.config['HISTORY_MAX_POINTS']
+    retention = current_app.config['PRICE_HISTORY_RETENTION_DAYS']
+    try:
+        end = _parse_time(request.args['to']) if request.args.get('to') else datetime.utcnow()
+        start = _parse_time(request.args['from']) if request.args.get('from') else end - timedelta(days=1)
+    except ValueError:
+        return jsonify({'error': 'from and to must be ISO 8601 timestamps'}), 400
+    
+    period = request.args.get('interval') or pick_period(start, end, max_points, retention)
+    try:
+        bars = load_history(symbol.upper(), period, start, end, max_points)
+    except InvalidHistoryRange as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({
+        'symbol': symbol.upper(),
+        'interval': period,
+        'from': start,
+        'to': end,
+        'bars': [
+            {'time': bar.bucket_start, 'open': bar.open, 'high': bar.high, 'low': bar.low,
+             'close': bar.close, 'volume': bar.volume}
+            for bar in bars
+        ]
+    })
 
 @stocks_bp.route('/trending', methods=['GET'])
 def get_trending_stocks():
-    """Get trending stocks (highest volume or biggest price changes)"""
+    """Get trending stocks (highest volume, or biggest percent change with ``by=change``)"""
     limit = request.args.get('limit', 5, type=int)
+    by = request.args.get('by', 'volume')
+    if by not in SORT_ORDERS:
+        return jsonify({'error': f'by must be one of {", ".join(SORT_ORDERS)}'}), 400
     
-    # Get stocks with highest volume or biggest price changes
-    stocks = StockQuote.query.order_by(StockQuote.volume.desc()).limit(limit).all()
+    stocks = quote_book.top(by, limit)
     
     return jsonify({
-        'trending_stocks': stock_quotes_schema.dump(stocks),
+        'trending_stocks': [quote.data for quote in stocks],
         'count': len(stocks)
     })
 
@@ -40,9 +148,12 @@ def get_trending_stocks():
 def create_stock_quote():
     """Create a new stock quote"""
     data = request.get_json()
+    symbol = data['symbol'].upper()
+    if StockQuote.query.filter_by(symbol=symbol).first():
+        return jsonify({'error': f'Stock quote for {symbol} already exists'}), 409
     
     stock = StockQuote(
-        symbol=data['symbol'].upper(),
+        symbol=symbol,
         company_name=data.get('company_name'),
         current_price=data.get('current_price'),
         price_change=data.get('price_change'),
@@ -52,15 +163,54 @@ def create_stock_quote():
     )
     
     db.session.add(stock)
-    db.session.commit()
+    try:
+        db.session.flush()
+        _record_tick(stock)
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({'error': f'Stock quote for {symbol} already exists'}), 409
+    _quote_changed(stock.symbol)
     
     return jsonify(stock_quote_schema.dump(stock)), 201
 
+@stocks_bp.route('/bulk', methods=['POST'])
+def bulk_upsert_stock_quotes():
+    """Create or update many quotes by symbol in one statement
+
+    Takes a JSON list of quotes (or ``{"quotes": [...]}``) and returns a
+    status per symbol. Invalid quotes are reported and skipped; the rest
+    are written in a single transaction.
+    """
+    payload = request.get_json(silent=True)
+    items = payload.get('quotes') if isinstance(payload, dict) else payload
+    if not isinstance(items, list):
+        return jsonify({'error': 'Expected a list of quotes'}), 400
+    limit = current_app.config['STOCKS_BULK_LIMIT']
+    if len(items) > limit:
+        return jsonify({'error': f'At most {limit} quotes per request'}), 413
+    
+    quotes, errors = validate_quotes(items)
+    statuses, rows = upsert_quotes(quotes)
+    db.session.commit()
+    if rows:
+        quote_book.put(*rows)
+        response_cache.invalidate('stocks')
+    
+    results = [{'symbol': symbol, 'status': status} for symbol, status in statuses.items()] + errors
+    return jsonify({
+        'results': results,
+        'created': sum(1 for status in statuses.values() if status == 'created'),
+        'updated': sum(1 for status in statuses.values() if status == 'updated'),
+        'errors': len(errors)
+    })
+
 @stocks_bp.route('/<symbol>', methods=['PUT'])
 def update_stock_quote(symbol):
     """Update an existing stock quote"""
     stock = StockQuote.query.filter_by(symbol=symbol.upper()).first_or_404()
     data = request.get_json()
+    previous_volume = stock.volume
     
     stock.company_name = data.get('company_name', stock.company_name)
     stock.current_price = data.get('current_price', stock.current_price)
@@ -69,7 +219,10 @@ def update_stock_quote(symbol):
     stock.volume = data.get('volume', stock.volume)
     stock.market_cap = data.get('market_cap', stock.market_cap)
     
+    if data.get('current_price') is not None:
+        _record_tick(stock, previous_volume)
     db.session.commit()
+    _quote_changed(stock.symbol)
     
     return jsonify(stock_quote_schema.dump(stock))
 
@@ -79,5 +232,6 @@ def delete_stock_quote(symbol):
     stock = StockQuote.query.filter_by(symbol=symbol.upper()).first_or_404()
     db.session.delete(stock)
     db.session.commit()
+    _quote_changed(stock.symbol)
     
     return jsonify({'message': f'Stock quote for {symbol} deleted successfully'}), 200
@@ -1,4 +1,6 @@
-from marshmallow import Schema, fields
+from datetime import timezone
+from decimal import Decimal
+from marshmallow import Schema, fields, validate, post_load
 from marshmallow_sqlalchemy import SQLAlchemyAutoSchema
 from app.models import Article, Author, Category, Tag, User, Quiz, Question, Answer, Page, MenuItem, StockQuote, SiteSettings
 
@@ -33,6 +35,46 @@ class ArticleSchema(SQLAlchemyAutoSchema):
     category = fields.Nested(CategorySchema, dump_only=True)
     tags = fields.Nested(TagSchema, many=True, dump_only=True)
 
+class ArticleImportSchema(Schema):
+    """One line of a bulk article import; references are by email and slug.
+
+    Optional fields left out of a line keep an existing article's value.
+    """
+    title = fields.Str(required=True, validate=validate.Length(min=1, max=255))
+    slug = fields.Str(required=True, validate=validate.Length(min=1, max=255))
+    content = fields.Str(required=True)
+    excerpt = fields.Str(allow_none=True)
+    image_url = fields.Str(allow_none=True, validate=validate.Length(max=500))
+    image_alt = fields.Str(allow_none=True, validate=validate.Length(max=255))
+    published_at = fields.DateTime(allow_none=True)
+    is_published = fields.Bool()
+    author_email = fields.Str(required=True, validate=validate.Length(min=1, max=120))
+    category = fields.Str(allow_none=True)
+    tags = fields.List(fields.Str(), allow_none=True, load_default=None)
+    
+    @post_load
+    def naive_utc(self, data, **kwargs):
+        # Columns hold naive UTC timestamps
+        published_at = data.get('published_at')
+        if published_at is not None and published_at.tzinfo is not None:
+            data['published_at'] = published_at.astimezone(timezone.utc).replace(tzinfo=None)
+        return data
+
+class StockQuoteUpsertSchema(Schema):
+    """One quote of a bulk upsert; omitted fields keep their stored value"""
+    symbol = fields.Str(required=True, validate=validate.Length(min=1, max=10))
+    company_name = fields.Str(allow_none=True, validate=validate.Length(max=255))
+    current_price = fields.Decimal(allow_none=True, validate=validate.Range(Decimal('0'), Decimal('99999999.99')))
+    price_change = fields.Decimal(allow_none=True, validate=validate.Range(Decimal('-99999999.99'), Decimal('99999999.99')))
+    percent_change = fields.Decimal(allow_none=True, validate=validate.Range(Decimal('-999.99'), Decimal('999.99')))
+    volume = fields.Int(allow_none=True, validate=validate.Range(min=0))
+    market_cap = fields.Int(allow_none=True, validate=validate.Range(min=0))
+    
+    @post_load
+    def upper_symbol(self, data, **kwargs):
+        data['symbol'] = data['symbol'].upper()
+        return data
+
 class UserSchema(SQLAlchemyAutoSchema):
     class Meta:
         model = User
@@ -0,0 +1,234 @@
+import html
+import re
+import uuid
+from sqlalchemy import event, text, func, desc, literal_column
+from app import db
+from app.models import Article
+from app.queries import article_query, article_loader_options
+
+HIGHLIGHT_START = '<mark>'
+HIGHLIGHT_END = '</mark>'
+
+# The databases mark matches with private-use characters; _highlight()
+# escapes the text around them before they become HIGHLIGHT_START/END
+MARK_START = '\ue000'
+MARK_END = '\ue001'
+_MARKED = re.compile(f'{MARK_START}([^{MARK_START}{MARK_END}]*){MARK_END}')
+_TAGS = re.compile(r'<[^>]*>')
+# A snippet window can open or close in the middle of a tag
+_CUT_TAGS = re.compile(r'^[^<]*>|<[^>]*$')
+
+# PostgreSQL keeps a weighted tsvector as a generated column, so inserts,
+# updates and deletes keep the GIN index in sync without any app code.
+POSTGRES_DDL = [
+    """
+    ALTER TABLE articles ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(excerpt, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(content, '')), 'C')
+    ) STORED
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_articles_search_vector
+    ON articles USING GIN (search_vector)
+    """
+]
+
+# SQLite copies the searchable columns into an FTS5 table that holds its own
+# content; triggers keep it in sync with every write to articles. The UUID
+# primary key cannot be an FTS5 rowid and the implicit articles rowid may
+# change on VACUUM, so articles_fts_keys hands each article a stable INTEGER
+# key that the FTS rows use as rowid and the triggers look up by article id.
+SQLITE_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS articles_fts_keys (
+        key INTEGER PRIMARY KEY,
+        article_id CHAR(32) NOT NULL UNIQUE
+    )
+    """,
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+        title, excerpt, content, article_id UNINDEXED,
+        tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS articles_fts_insert AFTER INSERT ON articles BEGIN
+        INSERT INTO articles_fts_keys(article_id) VALUES (new.id);
+        INSERT INTO articles_fts(rowid, title, excerpt, content, article_id)
+        VALUES ((SELECT key FROM articles_fts_keys WHERE article_id = new.id),
+                new.title, new.excerpt, new.content, new.id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS articles_fts_delete AFTER DELETE ON articles BEGIN
+        DELETE FROM articles_fts WHERE rowid = (SELECT key FROM articles_fts_keys WHERE article_id = old.id);
+        DELETE FROM articles_fts_keys WHERE article_id = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS articles_fts_update AFTER UPDATE OF title, excerpt, content ON articles BEGIN
+        UPDATE articles_fts SET title = new.title, excerpt = new.excerpt, content = new.content
+        WHERE rowid = (SELECT key FROM articles_fts_keys WHERE article_id = new.id);
+    END
+    """
+]
+
+# Rebuilds the SQLite index from articles, for databases that predate it
+SQLITE_BACKFILL = [
+    "DELETE FROM articles_fts",
+    "DELETE FROM articles_fts_keys",
+    "INSERT INTO articles_fts_keys(article_id) SELECT id FROM articles",
+    """
+    INSERT INTO articles_fts(rowid, title, excerpt, content, article_id)
+    SELECT articles_fts_keys.key, articles.title, articles.excerpt, articles.content, articles.id
+    FROM articles JOIN articles_fts_keys ON articles_fts_keys.article_id = articles.id
+    """
+]
+
+# The first SQLite index was external content keyed by the articles rowid
+SQLITE_LEGACY_DROP = [
+    "DROP TRIGGER IF EXISTS articles_fts_insert",
+    "DROP TRIGGER IF EXISTS articles_fts_delete",
+    "DROP TRIGGER IF EXISTS articles_fts_update",
+    "DROP TABLE IF EXISTS articles_fts"
+]
+
+def _has_legacy_sqlite_index(connection):
+    sql = connection.execute(text(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'articles_fts'"
+    )).scalar()
+    return sql is not None and 'content_rowid' in sql
+
+def install_search_index(connection):
+    """Create the full-text index structures for the connection's dialect"""
+    dialect = connection.dialect.name
+    if dialect == 'postgresql':
+        statements = POSTGRES_DDL
+    elif dialect == 'sqlite':
+        statements = SQLITE_DDL
+    else:
+        return False
+
+    if dialect == 'sqlite' and _has_legacy_sqlite_index(connection):
+        statements = SQLITE_LEGACY_DROP + statements
+    for statement in statements:
+        connection.execute(text(statement))
+    return True
+
+@event.listens_for(Article.__table__, 'after_create')
+def _create_search_index(target, connection, **kw):
+    install_search_index(connection)
+
+def ensure_search_index():
+    """Install the full-text index on an existing database and backfill it"""
+    connection = db.session.connection()
+    if not install_search_index(connection):
+        return False
+
+    if connection.dialect.name == 'sqlite':
+        for statement in SQLITE_BACKFILL:
+            connection.execute(text(statement))
+    db.session.commit()
+    return True
+
+def _fts5_query(query):
+    """Turn free text into a safe FTS5 expression, prefix-matching the last word"""
+    terms = re.findall(r'\w+', query, re.UNICODE)
+    if not terms:
+        return None
+
+    quoted = ['"%s"' % term for term in terms]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+def _highlight(value, stored_html=False):
+    """Escaped plain text whose only markup is the highlight tags.
+
+    ``stored_html`` values (content) have their tags removed first, along
+    with any tag a snippet window cut in half; a match inside a tag goes
+    with it.
+    """
+    if value is None:
+        return None
+    if stored_html:
+        value = html.unescape(_TAGS.sub(' ', _CUT_TAGS.sub(' ', value)))
+        value = ' '.join(value.split())
+    value = _MARKED.sub(rf'{HIGHLIGHT_START}\1{HIGHLIGHT_END}', html.escape(value, quote=False))
+    return value.replace(MARK_START, '').replace(MARK_END, '')
+
+def _search_postgresql(query, offset, limit, fields):
+    tsquery = func.websearch_to_tsquery('english', query)
+    vector = literal_column('articles.search_vector')
+    rank = func.ts_rank_cd(vector, tsquery).label('rank')
+
+    rows = db.session.query(
+        Article,
+        rank,
+        func.ts_headline('english', Article.title, tsquery,
+                         f'StartSel="{MARK_START}", StopSel="{MARK_END}", HighlightAll=true'),
+        # Fragments are picked from the text, not from tags and attributes
+        func.ts_headline('english', func.regexp_replace(Article.content, '<[^>]*>', ' ', 'g'), tsquery,
+                         f'StartSel="{MARK_START}", StopSel="{MARK_END}", MaxFragments=2, MaxWords=30, MinWords=10')
+    ).options(*article_loader_options(fields)).filter(
+        Article.is_published == True,
+        vector.op('@@')(tsquery)
+    ).order_by(desc('rank'), desc(Article.published_at)).offset(offset).limit(limit).all()
+
+    return [(article, float(score), _highlight(title), _highlight(snippet, stored_html=True))
+            for article, score, title, snippet in rows]
+
+def _search_sqlite(query, offset, limit, fields):
+    match = _fts5_query(query)
+    if not match:
+        return []
+
+    rows = db.session.execute(text(f"""
+        SELECT articles.id,
+               bm25(articles_fts, 10.0, 5.0, 1.0, 0.0) AS rank,
+               highlight(articles_fts, 0, '{MARK_START}', '{MARK_END}') AS title,
+               snippet(articles_fts, 2, '{MARK_START}', '{MARK_END}', '…', 24) AS snippet
+        FROM articles_fts
+        JOIN articles ON articles.id = articles_fts.article_id
+        WHERE articles_fts MATCH :match AND articles.is_published = :published
+        ORDER BY rank, articles.published_at DESC
+        LIMIT :limit OFFSET :offset
+    """), {'match': match, 'published': True, 'limit': limit, 'offset': offset}).fetchall()
+
+    ids = [uuid.UUID(str(row[0])) for row in rows]
+    articles = {article.id: article for article in article_query(fields).filter(Article.id.in_(ids)).all()}
+
+    # bm25() is lower-is-better; flip it so rank reads the same on every backend
+    return [(articles[article_id], -row[1], _highlight(row[2]), _highlight(row[3], stored_html=True))
+            for article_id, row in zip(ids, rows) if article_id in articles]
+
+def _search_fallback(query, offset, limit, fields):
+    articles = article_query(fields).filter(
+        Article.is_published == True,
+        db.or_(
+            Article.title.ilike(f'%{query}%'),
+            Article.content.ilike(f'%{query}%')
+        )
+    ).order_by(desc(Article.published_at)).offset(offset).limit(limit).all()
+
+    return [(article, None, None, None) for article in articles]
+
+def search_articles(query, page=1, per_page=10, fields=None):
+    """Run a ranked full-text search over published articles.
+
+    Returns ``(results, has_next)`` where each result is a tuple of
+    ``(article, rank, title_highlight, snippet)``. Articles are loaded
+    in the ``fields`` projection.
+    """
+    offset = (page - 1) * per_page
+    dialect = db.session.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        results = _search_postgresql(query, offset, per_page + 1, fields)
+    elif dialect == 'sqlite':
+        results = _search_sqlite(query, offset, per_page + 1, fields)
+    else:
+        results = _search_fallback(query, offset, per_page + 1, fields)
+
+    return results[:per_page], len(results) > per_page
@@ -0,0 +1,91 @@
+from marshmallow import fields
+from app import schemas
+
+class Serializer:
+    """Dump-only stand-in for a marshmallow schema on read paths.
+
+    The schema's dump fields are turned into one generated function per
+    model and field selection, which builds the output dict with plain
+    attribute reads. Output matches ``schema.dump``; loading and
+    validation stay with marshmallow.
+    """
+
+    __slots__ = ('build', 'many', 'fields')
+
+    def __init__(self, build, many, field_names):
+        self.build = build
+        self.many = many
+        self.fields = field_names
+
+    def dump(self, obj, many=None):
+        many = self.many if many is None else many
+        if many:
+            build = self.build
+            return [build(item) for item in obj]
+        return self.build(obj)
+
+_builders = {}
+
+def _schema_key(schema):
+    return (type(schema), schema.only and frozenset(schema.only), frozenset(schema.exclude))
+
+def _value_expression(name, field, env, local):
+    """Source for one field's output value, reading the attribute once into ``local``"""
+    attribute = field.attribute or name
+    if not attribute.isidentifier():
+        env[f'_field_{local}'] = field
+        return f'_field_{local}.serialize({name!r}, obj)'
+    read = f'({local} := obj.{attribute})'
+
+    if isinstance(field, fields.Nested):
+        env[f'_build_{local}'] = _builder(field.schema)
+        if field.many:
+            return f'(None if {read} is None else [_build_{local}(item) for item in {local}])'
+        return f'(None if {read} is None else _build_{local}({local}))'
+    if isinstance(field, fields.DateTime) and (field.format or 'iso') in ('iso', 'iso8601'):
+        return f'(None if {read} is None else {local}.isoformat())'
+    if isinstance(field, fields.String):
+        return f'(None if {read} is None else str({local}))'
+    if type(field) in (fields.Integer, fields.Boolean, fields.Decimal) and not getattr(field, 'as_string', False):
+        return f'obj.{attribute}'
+
+    # Anything less common keeps marshmallow's own formatting for that field
+    env[f'_field_{local}'] = field
+    return f'_field_{local}._serialize({read}, {name!r}, obj)'
+
+def _builder(schema):
+    key = _schema_key(schema)
+    build = _builders.get(key)
+    if build is not None:
+        return build
+
+    env = {}
+    items = []
+    for index, (name, field) in enumerate(schema.dump_fields.items()):
+        out_key = field.data_key or name
+        items.append(f'        {out_key!r}: {_value_expression(name, field, env, f"_v{index}")},')
+
+    source = '\n'.join(['def build(obj):', '    return {', *items, '    }'])
+    code = compile(source, f'<serializer {type(schema).__name__}>', 'exec')
+    exec(code, env)
+    build = _builders[key] = env['build']
+    return build
+
+def serializer_for(schema):
+    """Compiled serializer for a marshmallow schema instance"""
+    return Serializer(_builder(schema), schema.many, tuple(schema.dump_fields))
+
+# Read-path counterparts of the schemas in app.schemas
+article_serializer = serializer_for(schemas.article_schema)
+articles_serializer = serializer_for(schemas.articles_schema)
+author_serializer = serializer_for(schemas.author_schema)
+authors_serializer = serializer_for(schemas.authors_schema)
+category_serializer = serializer_for(schemas.category_schema)
+categories_serializer = serializer_for(schemas.categories_schema)
+page_serializer = serializer_for(schemas.page_schema)
+pages_serializer = serializer_for(schemas.pages_schema)
+menu_item_serializer = serializer_for(schemas.menu_item_schema)
+menu_items_serializer = serializer_for(schemas.menu_items_schema)
+stock_quote_serializer = serializer_for(schemas.stock_quote_schema)
+stock_quotes_serializer = serializer_for(schemas.stock_quotes_schema)
+site_settings_list_serializer = serializer_for(schemas.site_settings_list_schema)
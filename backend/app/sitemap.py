@@ -0,0 +1,229 @@
+import hashlib
+import threading
+import time
+from datetime import timezone
+from email.utils import format_datetime
+from xml.sax.saxutils import escape
+from sqlalchemy import desc
+from app import db
+from app.background import PeriodicWorker
+from app.cache import response_cache
+from app.conditional import payload_etag
+from app.models import Article
+from app.queries import article_query
+
+SITEMAP_NS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+
+def _w3c(moment):
+    """Naive UTC datetime as a W3C/ISO 8601 timestamp"""
+    return moment.replace(microsecond=0).isoformat() + '+00:00'
+
+class Document:
+    """A prebuilt XML body with its validator and compressed variants"""
+
+    __slots__ = ('body', 'etag', 'lastmod', 'variants')
+
+    def __init__(self, body, lastmod=None):
+        self.body = body
+        self.etag = payload_etag(body)
+        self.lastmod = lastmod
+        self.variants = {}
+
+class Shard:
+    """Up to ``shard_size`` consecutive article URLs and the fingerprint of their (slug, updated_at)"""
+
+    __slots__ = ('number', 'count', 'lastmod', 'fingerprint', 'document')
+
+    def __init__(self, number, count, lastmod, fingerprint, document):
+        self.number = number
+        self.count = count
+        self.lastmod = lastmod
+        self.fingerprint = fingerprint
+        self.document = document
+
+class Sitemaps:
+    """Article sitemap shards and the RSS feed, rebuilt when articles change.
+
+    A rebuild is one scan of ``(slug, updated_at)`` over published articles
+    in (published_at, id) order, served by ``idx_articles_sitemap``. Every
+    ``shard_size`` rows form a shard; a shard whose fingerprint matches the
+    previous build keeps its XML, so an edit re-renders only the shard the
+    article sits in and new articles usually touch only the last one.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.worker = None
+        self.site_url = ''
+        self.locale = 'en'
+        self.shard_size = 50000
+        self.feed_limit = 50
+        self._shards = []
+        self._feed = None
+        self._built_at = None
+        self._rendered = 0
+        self._build_lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.site_url = app.config.get('SITE_URL', '').rstrip('/')
+        self.locale = app.config.get('SITEMAP_LOCALE', 'en')
+        self.shard_size = app.config.get('SITEMAP_SHARD_SIZE', 50000)
+        self.feed_limit = app.config.get('FEED_LIMIT', 50)
+        self.worker = PeriodicWorker('sitemap-rebuild', app.config.get('SITEMAP_REBUILD_INTERVAL', 3600),
+                                     self.rebuild)
+        app.extensions['sitemaps'] = self
+        response_cache.on_invalidate(self._content_changed, tags=('articles',))
+
+    def article_url(self, slug):
+        return f'{self.site_url}/{self.locale}/article/{slug}'
+
+    def shards(self):
+        """Current shards, building them on first use"""
+        self._ensure_built()
+        return self._shards
+
+    def shard(self, number):
+        shards = self.shards()
+        return shards[number - 1] if 1 <= number <= len(shards) else None
+
+    def feed(self):
+        self._ensure_built()
+        return self._feed
+
+    def _ensure_built(self):
+        if self._built_at is None:
+            with self._build_lock:
+                if self._built_at is None:
+                    self.build()
+        self.worker.ensure_started()
+
+    def build(self):
+        """Scan once, keep unchanged shards and render the rest"""
+        previous = {shard.number: shard for shard in self._shards}
+        rows = db.session.query(Article.slug, Article.updated_at).filter(
+            Article.is_published == True,
+            Article.published_at.isnot(None)
+        ).order_by(Article.published_at, Article.id).execution_options(
+            stream_results=True, yield_per=min(self.shard_size, 10000)
+        )
+
+        shards = []
+        rendered = 0
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == self.shard_size:
+                rendered += self._close_shard(shards, batch, previous)
+                batch = []
+        if batch or not shards:
+            rendered += self._close_shard(shards, batch, previous)
+
+        feed = self._build_feed()
+        self._shards, self._feed = shards, feed
+        self._built_at = time.time()
+        self._rendered = rendered
+        return rendered
+
+    def _close_shard(self, shards, rows, previous):
+        number = len(shards) + 1
+        digest = hashlib.sha1()
+        lastmod = None
+        for slug, updated_at in rows:
+            digest.update(f'{slug}\t{updated_at.isoformat() if updated_at else ""}\n'.encode('utf-8'))
+            if updated_at and (lastmod is None or updated_at > lastmod):
+                lastmod = updated_at
+        fingerprint = digest.hexdigest()
+
+        old = previous.get(number)
+        if old is not None and old.fingerprint == fingerprint:
+            shards.append(old)
+            return 0
+        shards.append(Shard(number, len(rows), lastmod, fingerprint, self._render_urlset(rows, lastmod)))
+        return 1
+
+    def _render_urlset(self, rows, lastmod):
+        parts = ['<?xml version="1.0" encoding="UTF-8"?>\n', f'<urlset xmlns="{SITEMAP_NS}">\n']
+        for slug, updated_at in rows:
+            parts.append(f'<url><loc>{escape(self.article_url(slug))}</loc>')
+            if updated_at:
+                parts.append(f'<lastmod>{_w3c(updated_at)}</lastmod>')
+            parts.append('</url>\n')
+        parts.append('</urlset>\n')
+        return Document(''.join(parts).encode('utf-8'), lastmod)
+
+    def render_index(self, shard_url):
+        """Sitemap index pointing at every shard; ``shard_url(number)`` builds the locations"""
+        shards = self.shards()
+        parts = ['<?xml version="1.0" encoding="UTF-8"?>\n', f'<sitemapindex xmlns="{SITEMAP_NS}">\n']
+        for shard in shards:
+            parts.append(f'<sitemap><loc>{escape(shard_url(shard.number))}</loc>')
+            if shard.lastmod:
+                parts.append(f'<lastmod>{_w3c(shard.lastmod)}</lastmod>')
+            parts.append('</sitemap>\n')
+        parts.append('</sitemapindex>\n')
+        lastmods = [shard.lastmod for shard in shards if shard.lastmod]
+        return Document(''.join(parts).encode('utf-8'), max(lastmods) if lastmods else None)
+
+    def _build_feed(self):
+        articles = article_query(('title', 'slug', 'excerpt', 'published_at', 'updated_at', 'category')).filter(
+            Article.is_published == True,
+            Article.published_at.isnot(None)
+        ).order_by(desc(Article.published_at), desc(Article.id)).limit(self.feed_limit).all()
+
+        def rfc822(moment):
+            return format_datetime(moment.replace(tzinfo=timezone.utc), usegmt=True)
+
+        items = []
+        for article in articles:
+            url = escape(self.article_url(article.slug))
+            items.append(''.join([
+                '<item>',
+                f'<title>{escape(article.title)}</title>',
+                f'<link>{url}</link>',
+                f'<guid isPermaLink="true">{url}</guid>',
+                f'<pubDate>{rfc822(article.published_at)}</pubDate>',
+                f'<category>{escape(article.category.name)}</category>' if article.category else '',
+                f'<description>{escape(article.excerpt)}</description>' if article.excerpt else '',
+                '</item>\n'
+            ]))
+
+        lastmod = max((article.updated_at or article.published_at for article in articles), default=None)
+        body = ''.join([
+            '<?xml version="1.0" encoding="UTF-8"?>\n',
+            '<rss version="2.0">\n<channel>\n',
+            '<title>Times Profit</title>\n',
+            f'<link>{escape(self.site_url or "/")}</link>\n',
+            '<description>Latest news and financial updates</description>\n',
+            f'<language>{escape(self.locale)}</language>\n',
+            f'<lastBuildDate>{rfc822(lastmod)}</lastBuildDate>\n' if lastmod else '',
+            *items,
+            '</channel>\n</rss>\n'
+        ])
+        return Document(body.encode('utf-8'), lastmod)
+
+    def rebuild(self):
+        with self.app.app_context():
+            try:
+                with self._build_lock:
+                    return self.build()
+            except Exception:
+                db.session.rollback()
+                self.app.logger.exception('Failed to rebuild sitemaps')
+                return None
+
+    def _content_changed(self, tags):
+        if self._built_at is not None:
+            self.worker.wake()
+
+    def stats(self):
+        return {
+            'shards': len(self._shards),
+            'urls': sum(shard.count for shard in self._shards),
+            'rendered_last_build': self._rendered,
+            'age_seconds': round(time.time() - self._built_at, 3) if self._built_at else None
+        }
+
+sitemaps = Sitemaps()
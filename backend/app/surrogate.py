@@ -0,0 +1,55 @@
+from contextlib import contextmanager
+from flask import g, has_app_context
+from sqlalchemy import event
+from app import db
+from app.models import Article, Category, MenuItem
+
+# Models whose ids appear in Surrogate-Key headers, and their key prefix
+KEY_PREFIXES = {
+    Article: 'article',
+    Category: 'category',
+    MenuItem: 'menu'
+}
+
+# CDNs cap the header size (Fastly at 16 KB); past this, only collection keys are sent
+MAX_SURROGATE_KEYS = 256
+
+def entity_key(kind, ref_id):
+    return f'{kind}-{ref_id}'
+
+def instance_key(instance):
+    prefix = KEY_PREFIXES.get(type(instance))
+    return entity_key(prefix, instance.id) if prefix and instance.id is not None else None
+
+def add_surrogate_keys(*keys):
+    """Tag the response being built with more surrogate keys"""
+    collected = g.get('surrogate_keys') if has_app_context() else None
+    if collected is not None:
+        collected.update(key for key in keys if key)
+
+def surrogate_keys():
+    return frozenset(g.get('surrogate_keys') or ()) if has_app_context() else frozenset()
+
+@contextmanager
+def collect_surrogate_keys():
+    """Collect the keys of what is loaded inside the block into a fresh set.
+
+    Keys still reach the enclosing collector, if any, so prebuilt
+    payloads can carry their own keys without hiding them from the
+    current request.
+    """
+    outer = g.get('surrogate_keys')
+    keys = g.surrogate_keys = set()
+    try:
+        yield keys
+    finally:
+        if outer is not None:
+            outer |= keys
+            g.surrogate_keys = outer
+        else:
+            g.pop('surrogate_keys', None)
+
+@event.listens_for(db.session, 'loaded_as_persistent')
+def _tag_loaded_instance(session, instance):
+    if type(instance) in KEY_PREFIXES:
+        add_surrogate_keys(instance_key(instance))
@@ -0,0 +1,129 @@
+from datetime import datetime, timedelta
+from sqlalchemy import desc, func
+from app import db
+from app.background import PeriodicWorker
+from app.cache import response_cache
+from app.dialects import epoch_seconds, greatest
+from app.models import Article, ArticleViewBucket, TrendingArticle
+from app.queries import article_query
+
+BUCKET_SIZE = timedelta(minutes=15)
+EPOCH = datetime(1970, 1, 1)
+
+# window name -> (how far back views count, half-life of a view's weight)
+WINDOWS = {
+    '1h': (timedelta(hours=1), timedelta(minutes=20)),
+    '24h': (timedelta(hours=24), timedelta(hours=6)),
+    '7d': (timedelta(days=7), timedelta(days=2)),
+}
+DEFAULT_WINDOW = '7d'
+
+def bucket_for(moment):
+    """Start of the view bucket a (naive UTC) timestamp falls into"""
+    return EPOCH + ((moment - EPOCH) // BUCKET_SIZE) * BUCKET_SIZE
+
+def window_for_days(days):
+    """Map the legacy ``days`` argument of /trending onto a window"""
+    if days <= 1:
+        return '24h'
+    return '7d'
+
+def compute_scores(now, span, half_life, top_n):
+    """Top ``top_n`` exponentially decayed view scores for one window.
+
+    Summed, ranked and limited by the database, so only the winners are
+    read back. Each bucket is aged from its midpoint so a fresh bucket
+    does not count as older than it is. SQLite needs its math functions
+    (3.35+) for ``power()``.
+    """
+    bind = db.session.get_bind()
+    midpoint = epoch_seconds(bind, ArticleViewBucket.bucket_start) + (BUCKET_SIZE / 2).total_seconds()
+    age = (now - EPOCH).total_seconds() - midpoint
+    score = func.sum(
+        ArticleViewBucket.views * func.power(0.5, greatest(bind, age, 0) / half_life.total_seconds())
+    ).label('score')
+
+    return db.session.query(ArticleViewBucket.article_id, score).join(
+        Article, Article.id == ArticleViewBucket.article_id
+    ).filter(
+        Article.is_published == True,
+        ArticleViewBucket.bucket_start >= now - span - BUCKET_SIZE / 2
+    ).group_by(ArticleViewBucket.article_id).order_by(
+        desc('score'), ArticleViewBucket.article_id
+    ).limit(top_n).all()
+
+def refresh_trending(top_n=50, now=None):
+    """Recompute every window and swap the materialized rankings in one transaction"""
+    now = now or datetime.utcnow()
+    longest = max(span for span, _ in WINDOWS.values())
+
+    for window, (span, half_life) in WINDOWS.items():
+        ranked = compute_scores(now, span, half_life, top_n)
+        TrendingArticle.query.filter_by(window=window).delete()
+        db.session.add_all([
+            TrendingArticle(window=window, rank=rank, article_id=article_id, score=score, computed_at=now)
+            for rank, (article_id, score) in enumerate(ranked, 1)
+        ])
+
+    # Buckets older than the longest window can no longer contribute
+    ArticleViewBucket.query.filter(
+        ArticleViewBucket.bucket_start < now - longest - BUCKET_SIZE
+    ).delete(synchronize_session=False)
+
+    db.session.commit()
+
+def get_trending_articles(window=DEFAULT_WINDOW, limit=10, since=None, fields=None):
+    """Read the materialized ranking for a window.
+
+    Falls back to lifetime views (optionally limited to articles published
+    after ``since``) until the first refresh has produced a ranking.
+    ``fields`` narrows the loaded columns to a projection.
+    """
+    articles = article_query(fields).join(
+        TrendingArticle, TrendingArticle.article_id == Article.id
+    ).filter(
+        TrendingArticle.window == window,
+        Article.is_published == True
+    ).order_by(TrendingArticle.rank).limit(limit).all()
+
+    if articles:
+        return articles
+
+    query = article_query(fields).filter(Article.is_published == True)
+    if since is not None:
+        query = query.filter(Article.published_at >= since)
+    return query.order_by(desc(Article.views)).limit(limit).all()
+
+class TrendingEngine:
+    """Recomputes the trending tables on a timer in each worker"""
+
+    def __init__(self, app=None):
+        self.app = None
+        self.worker = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.top_n = app.config.get('TRENDING_TOP_N', 50)
+        self.interval = app.config.get('TRENDING_REFRESH_INTERVAL', 300)
+        self.worker = PeriodicWorker('trending-refresh', self.interval, self.refresh)
+        app.extensions['trending'] = self
+        app.before_request(self.worker.ensure_started)
+
+    def refresh(self, force=False):
+        with self.app.app_context():
+            try:
+                # Another worker may have refreshed moments ago
+                last = db.session.query(func.max(TrendingArticle.computed_at)).scalar()
+                if not force and last and datetime.utcnow() - last < timedelta(seconds=self.interval / 2):
+                    return False
+                refresh_trending(self.top_n)
+                response_cache.invalidate('trending')
+                return True
+            except Exception:
+                db.session.rollback()
+                self.app.logger.exception('Failed to refresh trending articles')
+                return False
+
+trending_engine = TrendingEngine()
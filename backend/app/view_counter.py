@@ -0,0 +1,150 @@
+import atexit
+import threading
+import time
+from datetime import datetime
+from sqlalchemy import update, bindparam
+from app import db
+from app.background import PeriodicWorker
+from app.dialects import upsert, supports_upsert
+from app.models import Article, ArticleViewBucket
+from app.trending import bucket_for
+
+class ViewCounter:
+    """Write-behind article view counter.
+
+    Reads only bump an in-memory tally; a background thread per worker
+    folds the tallies into ``articles.views`` with one batched
+    ``UPDATE ... SET views = views + n`` every flush interval, and once
+    more when the worker shuts down. The same flush adds the views to
+    their time buckets in ``article_view_buckets`` for the trending engine.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.interval = 5
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._pending_buckets = {}
+        self._oldest_pending_at = None
+        self._last_flush_at = None
+        self._last_flush_duration = 0.0
+        self._flushed_views = 0
+        self._failed_flushes = 0
+        self.worker = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.interval = app.config.get('VIEW_COUNTER_FLUSH_INTERVAL', 5)
+        self.worker = PeriodicWorker('view-counter-flush', self.interval, self.flush)
+        app.extensions['view_counter'] = self
+        atexit.register(self.shutdown)
+
+    def record(self, article_id, count=1):
+        """Count views for an article without touching the database"""
+        bucket = (article_id, bucket_for(datetime.utcnow()))
+        with self._lock:
+            self._pending[article_id] = self._pending.get(article_id, 0) + count
+            self._pending_buckets[bucket] = self._pending_buckets.get(bucket, 0) + count
+            if self._oldest_pending_at is None:
+                self._oldest_pending_at = time.time()
+        self.worker.ensure_started()
+
+    def pending_for(self, article_id):
+        """Views recorded for an article that have not been flushed yet"""
+        with self._lock:
+            return self._pending.get(article_id, 0)
+
+    def flush(self):
+        """Write all pending increments in one batched UPDATE"""
+        with self._lock:
+            pending = self._pending
+            pending_buckets = self._pending_buckets
+            oldest_pending_at = self._oldest_pending_at
+            self._pending = {}
+            self._pending_buckets = {}
+            self._oldest_pending_at = None
+
+        if not pending:
+            return 0
+
+        started = time.time()
+        table = Article.__table__
+        statement = update(table).where(
+            table.c.id == bindparam('article_id')
+        ).values(
+            views=db.func.coalesce(table.c.views, 0) + bindparam('increment'),
+            # Views are not an edit; keep updated_at (and so Last-Modified) untouched
+            updated_at=table.c.updated_at
+        )
+        params = [{'article_id': article_id, 'increment': count} for article_id, count in pending.items()]
+
+        try:
+            with self.app.app_context():
+                with db.engine.begin() as connection:
+                    connection.execute(statement, params)
+                    self._write_buckets(connection, pending_buckets)
+        except Exception:
+            # Put the increments back so the next flush retries them
+            with self._lock:
+                for article_id, count in pending.items():
+                    self._pending[article_id] = self._pending.get(article_id, 0) + count
+                for bucket, count in pending_buckets.items():
+                    self._pending_buckets[bucket] = self._pending_buckets.get(bucket, 0) + count
+                if self._oldest_pending_at is None or oldest_pending_at < self._oldest_pending_at:
+                    self._oldest_pending_at = oldest_pending_at
+                self._failed_flushes += 1
+            self.app.logger.exception('Failed to flush article view counts')
+            return 0
+
+        with self._lock:
+            self._last_flush_at = time.time()
+            self._last_flush_duration = self._last_flush_at - started
+            self._flushed_views += sum(pending.values())
+        return len(pending)
+
+    def _write_buckets(self, connection, pending_buckets):
+        table = ArticleViewBucket.__table__
+        rows = [{'article_id': article_id, 'bucket_start': bucket_start, 'views': count}
+                for (article_id, bucket_start), count in pending_buckets.items()]
+
+        if supports_upsert(connection):
+            statement = upsert(table, connection)
+            connection.execute(statement.on_conflict_do_update(
+                index_elements=[table.c.article_id, table.c.bucket_start],
+                set_={'views': table.c.views + statement.excluded.views}
+            ), rows)
+            return
+
+        for row in rows:
+            updated = connection.execute(update(table).where(
+                table.c.article_id == row['article_id'],
+                table.c.bucket_start == row['bucket_start']
+            ).values(views=table.c.views + row['views']))
+            if not updated.rowcount:
+                connection.execute(table.insert(), row)
+
+    def shutdown(self):
+        """Stop the flush thread and write whatever is still pending"""
+        if self.worker is not None:
+            self.worker.stop()
+        if self.app is not None:
+            self.flush()
+
+    def stats(self):
+        """Counter health, including how far the database lags behind reads"""
+        with self._lock:
+            now = time.time()
+            return {
+                'pending_articles': len(self._pending),
+                'pending_views': sum(self._pending.values()),
+                'flush_lag_seconds': round(now - self._oldest_pending_at, 3) if self._oldest_pending_at else 0.0,
+                'last_flush_at': self._last_flush_at,
+                'last_flush_duration_seconds': round(self._last_flush_duration, 4),
+                'flushed_views': self._flushed_views,
+                'failed_flushes': self._failed_flushes,
+                'flush_interval_seconds': self.interval
+            }
+
+view_counter = ViewCounter()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Benchmark: vectorized stock analytics at 500 symbols x 5 years of daily bars,
+against per-symbol pure Python loops, plus the load from the database and
+the cached path behind /api/stocks/analytics
+"""
+
+import math
+import os
+import sys
+import tempfile
+import time
+import timeit
+from datetime import datetime, timedelta
+
+# Add the backend directory to the Python path
+backend_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, backend_dir)
+
+import numpy as np
+
+SYMBOLS = 500
+DAYS = 5 * 252
+WINDOW = 20
+
+def make_closes(symbols=SYMBOLS, days=DAYS, seed=7):
+    """Random-walk closes with some late listings and missing days"""
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0.0003, 0.02, size=(symbols, days))
+    closes = 100 * np.exp(np.cumsum(returns, axis=1))
+    closes[rng.random((symbols, days)) < 0.01] = np.nan
+    listed = rng.integers(0, days // 2, size=symbols // 10)
+    for row, first in enumerate(listed):
+        closes[row, :first] = np.nan
+    return closes.round(2)
+
+def best_of(func, repeat=5):
+    """Best per-call time in milliseconds"""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1000
+
+def once(func):
+    started = time.perf_counter()
+    result = func()
+    return result, (time.perf_counter() - started) * 1000
+
+def python_sma(rows, window):
+    result = []
+    for row in rows:
+        out = [None] * (window - 1)
+        for day in range(window - 1, len(row)):
+            total = sum(row[day - window + 1:day + 1])
+            out.append(total / window if total == total else None)
+        result.append(out)
+    return result
+
+def python_ema(rows, window):
+    alpha = 2 / (window + 1)
+    result = []
+    for row in rows:
+        out, current = [], None
+        for value in row:
+            if not math.isnan(value):
+                current = value if current is None else current + alpha * (value - current)
+            out.append(current)
+        result.append(out)
+    return result
+
+def python_volatility(rows, window):
+    result = []
+    for row in rows:
+        returns = [math.log(b / a) for a, b in zip(row, row[1:])]
+        out = [None] * window
+        for day in range(window, len(row)):
+            chunk = returns[day - window:day]
+            mean = sum(chunk) / window
+            out.append(math.sqrt(sum((r - mean) ** 2 for r in chunk) / (window - 1) * 252))
+        result.append(out)
+    return result
+
+def compare(name, python_ms, numpy_ms):
+    print(f"{name:>22} {python_ms:>12.1f} {numpy_ms:>10.2f} {python_ms / numpy_ms:>8.0f}x")
+
+def bench_compute():
+    from app.analytics import (forward_fill, simple_returns, log_returns, sma, ema, rolling_volatility,
+                               correlation_matrix, Analysis)
+
+    closes = forward_fill(make_closes())
+    returns = log_returns(closes)
+    rows = closes.tolist()
+
+    print(f"📊 Indicators over {SYMBOLS} symbols x {DAYS} days, window {WINDOW} (ms)")
+    print(f"{'':>22} {'python loops':>12} {'numpy':>10} {'speedup':>8}")
+
+    expected, python_ms = once(lambda: python_sma(rows, WINDOW))
+    assert np.allclose(np.array(expected, dtype=float), sma(closes, WINDOW), equal_nan=True)
+    compare('SMA', python_ms, best_of(lambda: sma(closes, WINDOW)))
+
+    expected, python_ms = once(lambda: python_ema(rows, WINDOW))
+    assert np.allclose(np.array(expected, dtype=float), ema(closes, WINDOW), equal_nan=True)
+    compare('EMA', python_ms, best_of(lambda: ema(closes, WINDOW)))
+
+    expected, python_ms = once(lambda: python_volatility(rows, WINDOW))
+    assert np.allclose(np.array(expected, dtype=float), rolling_volatility(returns, WINDOW), equal_nan=True)
+    compare('rolling volatility', python_ms, best_of(lambda: rolling_volatility(returns, WINDOW)))
+
+    print(f"\n{'':>22} {'numpy (ms)':>12}")
+    print(f"{'forward fill':>22} {best_of(lambda: forward_fill(closes)):>12.2f}")
+    print(f"{'returns':>22} {best_of(lambda: simple_returns(closes)):>12.2f}")
+    complete = returns[:, 1:][~np.isnan(returns[:, 1:]).any(axis=1)]
+    assert np.allclose(correlation_matrix(complete), np.corrcoef(complete))
+    print(f"{'correlation (corrcoef)':>22} {best_of(lambda: np.corrcoef(complete), repeat=3):>12.2f}"
+          f"  ({len(complete)} gap-free symbols)")
+    print(f"{'correlation (masked)':>22} {best_of(lambda: correlation_matrix(returns), repeat=3):>12.2f}")
+    symbols = tuple(f'S{i:03d}' for i in range(SYMBOLS))
+    dates = np.arange(DAYS).astype('datetime64[D]')
+    raw = make_closes()
+    print(f"{'full analysis':>22} {best_of(lambda: Analysis(symbols, WINDOW, dates, raw, 60), repeat=3):>12.2f}")
+
+def bench_endpoint():
+    from app import create_app, db
+    from app.analytics import load_closes, stock_analytics
+    from app.models import PriceBar
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        closes = make_closes()
+        symbols = [f'S{i:03d}' for i in range(SYMBOLS)]
+        today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        start = today - timedelta(days=DAYS - 1)
+        rows = [
+            {'period': '1d', 'symbol': symbol, 'bucket_start': start + timedelta(days=day),
+             'open': close, 'high': close, 'low': close, 'close': close, 'volume': 1000}
+            for symbol, row in zip(symbols, closes.tolist())
+            for day, close in enumerate(row) if not math.isnan(close)
+        ]
+        _, insert_ms = once(lambda: (db.session.execute(PriceBar.__table__.insert(), rows), db.session.commit()))
+        print(f"\n📊 /api/stocks/analytics on SQLite ({len(rows)} daily bars, loaded in {insert_ms / 1000:.1f} s)")
+
+        _, load_ms = once(lambda: load_closes(symbols, start, today + timedelta(days=1)))
+        analysis, miss_ms = once(lambda: stock_analytics.analyze(symbols, WINDOW, DAYS))
+        hit_ms = best_of(lambda: stock_analytics.analyze(symbols, WINDOW, DAYS))
+        payload_ms = best_of(lambda: analysis.payload(), repeat=3)
+        client = app.test_client()
+        response_ms = best_of(lambda: client.get(f'/api/stocks/analytics?symbols={",".join(symbols)}'
+                                                 f'&window={WINDOW}&days={DAYS}'), repeat=3)
+        print(f"{'load closes':>22} {load_ms:>12.1f}")
+        print(f"{'analyze (miss)':>22} {miss_ms:>12.1f}")
+        print(f"{'analyze (hit)':>22} {hit_ms:>12.4f}")
+        print(f"{'payload':>22} {payload_ms:>12.1f}")
+        print(f"{'GET (cached analysis)':>22} {response_ms:>12.1f}")
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as directory:
+        # Set before the config is imported, so the bars never reach the development database
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(directory, 'bench.sqlite')}"
+        bench_compute()
+        bench_endpoint()
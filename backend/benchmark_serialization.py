@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: marshmallow + stdlib json versus compiled serializers + orjson
+for article list payloads of 10, 100 and 1000 articles
+"""
+
+import os
+import sys
+import timeit
+import uuid
+from datetime import datetime, timedelta
+
+# Add the backend directory to the Python path
+backend_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, backend_dir)
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from app.models import Article, Author, Category, Tag
+from app.schemas import ArticleSchema
+from app.serializers import serializer_for
+from app.json_provider import OrjsonProvider, orjson
+from app.projections import ARTICLE_PROJECTIONS
+
+SIZES = (10, 100, 1000)
+
+def make_articles(count):
+    """Unsaved articles with an author, category and two tags each"""
+    now = datetime.utcnow()
+    authors = [Author(id=uuid.uuid4(), name=f'Author {i}', email=f'author{i}@example.com',
+                      bio='Writes about markets', created_at=now) for i in range(10)]
+    categories = [Category(id=uuid.uuid4(), name=f'Category {i}', slug=f'category-{i}',
+                           description='Section', created_at=now) for i in range(5)]
+    tags = [Tag(id=uuid.uuid4(), name=f'Tag {i}', slug=f'tag-{i}', created_at=now) for i in range(8)]
+
+    articles = []
+    for i in range(count):
+        article = Article(
+            id=uuid.uuid4(), title=f'Article {i} about the economy', slug=f'article-{i}',
+            content='<p>' + 'Lorem ipsum dolor sit amet. ' * 40 + '</p>',
+            excerpt='A short summary of the article.', image_url=f'https://example.com/{i}.jpg',
+            image_alt='Illustration', published_at=now - timedelta(hours=i), created_at=now,
+            updated_at=now, is_published=True, views=i * 7
+        )
+        article.author = authors[i % len(authors)]
+        article.category = categories[i % len(categories)]
+        article.tags = [tags[i % len(tags)], tags[(i + 3) % len(tags)]]
+        articles.append(article)
+    return articles
+
+def best_of(func, repeat=5):
+    """Best per-call time in milliseconds"""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1000
+
+def run():
+    if orjson is None:
+        print("❌ orjson is not installed; pip install -r requirements.txt")
+        return
+
+    app = Flask(__name__)
+    default_json = DefaultJSONProvider(app)
+    fast_json = OrjsonProvider(app)
+
+    print("📊 Article list serialization (best of 5, ms per payload)")
+    for projection in ('full', 'card'):
+        fields = ARTICLE_PROJECTIONS[projection]
+        schema = ArticleSchema(many=True, only=fields)
+        serializer = serializer_for(schema)
+
+        print(f"\n🔎 Projection: {projection}")
+        print(f"{'articles':>10} {'marshmallow':>12} {'compiled':>10} {'stdlib json':>12} {'orjson':>8} "
+              f"{'old total':>10} {'new total':>10} {'speedup':>8}")
+        for size in SIZES:
+            articles = make_articles(size)
+            assert serializer.dump(articles) == schema.dump(articles)
+            dumped = schema.dump(articles)
+
+            dump_old = best_of(lambda: schema.dump(articles))
+            dump_new = best_of(lambda: serializer.dump(articles))
+            encode_old = best_of(lambda: default_json.dumps(dumped))
+            encode_new = best_of(lambda: fast_json.dumps_bytes(dumped))
+            total_old = best_of(lambda: default_json.dumps(schema.dump(articles)).encode('utf-8'))
+            total_new = best_of(lambda: fast_json.dumps_bytes(serializer.dump(articles)))
+
+            print(f"{size:>10} {dump_old:>12.3f} {dump_new:>10.3f} {encode_old:>12.3f} {encode_new:>8.3f} "
+                  f"{total_old:>10.3f} {total_new:>10.3f} {total_old / total_new:>7.1f}x")
+
+if __name__ == "__main__":
+    run()
@@ -23,15 +23,117 @@ class Config:
     # Performance settings
     COMPRESS_MIMETYPES = [
         'text/html', 'text/css', 'text/xml', 'application/json',
-        'application/javascript', 'text/javascript', 'application/xml'
+        'application/javascript', 'text/javascript', 'application/xml',
+        'application/rss+xml'
     ]
     COMPRESS_LEVEL = 6
     COMPRESS_MIN_SIZE = 500
+    COMPRESS_BR_LEVEL = 4
+    COMPRESS_ALGORITHM = ['br', 'gzip']
+    COMPRESS_ENABLED = os.environ.get('COMPRESS_ENABLED', 'true').lower() == 'true'
+    
+    # Seconds between batched writes of buffered article view counts
+    VIEW_COUNTER_FLUSH_INTERVAL = int(os.environ.get('VIEW_COUNTER_FLUSH_INTERVAL', 5))
+    
+    # Seconds between trending recomputations, and how many articles each window keeps
+    TRENDING_REFRESH_INTERVAL = int(os.environ.get('TRENDING_REFRESH_INTERVAL', 300))
+    TRENDING_TOP_N = 50
+    
+    # In-process response cache for public GET endpoints
+    RESPONSE_CACHE_ENABLED = os.environ.get('RESPONSE_CACHE_ENABLED', 'true').lower() == 'true'
+    RESPONSE_CACHE_BACKEND = 'lru'
+    RESPONSE_CACHE_MAX_ENTRIES = 1024
+    RESPONSE_CACHE_DEFAULT_TTL = 60
+    
+    # How invalidations reach the other workers: 'auto' (LISTEN/NOTIFY on
+    # PostgreSQL, polling the cache_tag_versions table otherwise), 'notify', 'poll' or 'off'
+    INVALIDATION_BUS = os.environ.get('INVALIDATION_BUS', 'auto')
+    INVALIDATION_POLL_INTERVAL = float(os.environ.get('INVALIDATION_POLL_INTERVAL', 1))
+    
+    # Identical concurrent GETs share one computation; waiters give up and compute after the timeout
+    COALESCE_ENABLED = os.environ.get('COALESCE_ENABLED', 'true').lower() == 'true'
+    COALESCE_TIMEOUT = float(os.environ.get('COALESCE_TIMEOUT', 10))
+    
+    # CDN caching: Cache-Control per named policy (seconds), picked per route
+    # with @cache_policy(name) or per blueprint with http_cache.blueprint_policy
+    HTTP_CACHE_ENABLED = os.environ.get('HTTP_CACHE_ENABLED', 'true').lower() == 'true'
+    HTTP_CACHE_POLICIES = {
+        'article': {'max_age': 60, 's_maxage': 300, 'stale_while_revalidate': 600, 'stale_if_error': 86400},
+        'listing': {'max_age': 30, 's_maxage': 60, 'stale_while_revalidate': 300, 'stale_if_error': 86400},
+        'navigation': {'max_age': 300, 's_maxage': 3600, 'stale_while_revalidate': 86400, 'stale_if_error': 604800},
+        'feed': {'max_age': 300, 's_maxage': 900, 'stale_while_revalidate': 3600, 'stale_if_error': 86400},
+        'quotes': {'max_age': 5, 's_maxage': 10, 'stale_while_revalidate': 30, 'stale_if_error': 300}
+    }
+    # Where purged surrogate keys go: 'none', or 'log' (JSON lines in HTTP_CACHE_PURGE_LOG, else the app log)
+    HTTP_CACHE_PURGER = os.environ.get('HTTP_CACHE_PURGER', 'none')
+    HTTP_CACHE_PURGE_LOG = os.environ.get('HTTP_CACHE_PURGE_LOG')
+    
+    # Locales the site serves (the frontend's i18n list); others get the first
+    SUPPORTED_LOCALES = [locale.strip() for locale in os.environ.get('SUPPORTED_LOCALES', 'en').split(',')
+                         if locale.strip()]
+    
+    # Seconds between rebuilds of the prebuilt homepage payloads
+    HOMEPAGE_SNAPSHOT_INTERVAL = int(os.environ.get('HOMEPAGE_SNAPSHOT_INTERVAL', 60))
+    
+    # Lines per transaction for NDJSON article imports
+    IMPORT_BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE', 500))
+    
+    # Most quotes accepted by one POST /api/stocks/bulk
+    STOCKS_BULK_LIMIT = int(os.environ.get('STOCKS_BULK_LIMIT', 1000))
+    
+    # Price history: most bars one /history response may hold, and days kept
+    # per level (1h and 1d bars without an entry are kept forever)
+    HISTORY_MAX_POINTS = 1500
+    PRICE_HISTORY_RETENTION_DAYS = {'tick': 7, '1m': 7, '5m': 90}
+    
+    # Request threads per gunicorn worker; the Procfile passes the same
+    # WEB_THREADS to --threads
+    WEB_THREADS = int(os.environ.get('WEB_THREADS', 100))
+    
+    # /api/stocks/stream: seconds between heartbeats on an idle stream and
+    # symbols one stream may watch. Each open stream holds a request thread,
+    # so a worker accepts at most WEB_THREADS - STREAM_RESERVED_THREADS of
+    # them; STREAM_MAX_CLIENTS can only lower that
+    STREAM_HEARTBEAT_SECONDS = int(os.environ.get('STREAM_HEARTBEAT_SECONDS', 15))
+    STREAM_RESERVED_THREADS = int(os.environ.get('STREAM_RESERVED_THREADS', 25))
+    STREAM_MAX_CLIENTS = int(os.environ['STREAM_MAX_CLIENTS']) if os.environ.get('STREAM_MAX_CLIENTS') else None
+    STREAM_MAX_SYMBOLS = 100
+    
+    # /api/stocks/analytics: request limits, and how long and how many
+    # computed analyses each worker keeps
+    ANALYTICS_MAX_SYMBOLS = 500
+    ANALYTICS_MAX_DAYS = 5 * 366
+    ANALYTICS_CACHE_TTL = int(os.environ.get('ANALYTICS_CACHE_TTL', 300))
+    ANALYTICS_CACHE_SIZE = 64
+    
+    # Rows fetched per server-side cursor round trip by the export endpoints
+    EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', 1000))
+    
+    # Public site the sitemap and feed link to, and how the sitemap is sharded
+    SITE_URL = os.environ.get('SITE_URL', 'http://localhost:3000')
+    SITEMAP_LOCALE = 'en'
+    SITEMAP_SHARD_SIZE = 50000
+    SITEMAP_REBUILD_INTERVAL = int(os.environ.get('SITEMAP_REBUILD_INTERVAL', 3600))
+    FEED_LIMIT = 50
+    
+    # Related-article neighbor lists: list length and seconds between full rebuilds
+    RELATED_TOP_N = 10
+    RELATED_REBUILD_INTERVAL = int(os.environ.get('RELATED_REBUILD_INTERVAL', 3600))
+    
+    # JSON encoder for responses: 'orjson' (when installed) or 'default' for Flask's own
+    JSON_PROVIDER = os.environ.get('JSON_PROVIDER', 'orjson')
 
 class DevelopmentConfig(Config):
     DEBUG = True
     CORS_ORIGINS = ['http://localhost:3000', 'http://127.0.0.1:3000']
 
+class TestingConfig(Config):
+    TESTING = True
+    # Responses must come from the database for query-count assertions
+    RESPONSE_CACHE_ENABLED = False
+    COALESCE_ENABLED = False
+    INVALIDATION_BUS = 'off'
+
 class ProductionConfig(Config):
     DEBUG = False
     TESTING = False
@@ -42,5 +144,6 @@ class ProductionConfig(Config):
 config = {
     'development': DevelopmentConfig,
     'production': ProductionConfig,
+    'testing': TestingConfig,
     'default': DevelopmentConfig
 }
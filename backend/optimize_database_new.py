@@ -89,11 +89,23 @@ def add_database_indexes():
                 ON menu_items(parent_id)
             """))
             
-            # Create indexes for Stock Quotes table
+            # One row per symbol: keep the latest duplicate, then enforce it
+            # (bulk quote upserts use this index as their conflict target)
             db.session.execute(text("""
-                CREATE INDEX IF NOT EXISTS idx_stock_quotes_symbol 
+                DELETE FROM stock_quotes WHERE id IN (
+                    SELECT id FROM (
+                        SELECT id, ROW_NUMBER() OVER (
+                            PARTITION BY symbol ORDER BY updated_at DESC, id
+                        ) AS duplicate
+                        FROM stock_quotes
+                    ) ranked WHERE duplicate > 1
+                )
+            """))
+            db.session.execute(text("""
+                CREATE UNIQUE INDEX IF NOT EXISTS uq_stock_quotes_symbol 
                 ON stock_quotes(symbol)
             """))
+            db.session.execute(text("DROP INDEX IF EXISTS idx_stock_quotes_symbol"))
             
             # Create indexes for Site Settings table
             db.session.execute(text("""
@@ -107,9 +119,31 @@ def add_database_indexes():
                 ON articles(status, published_at DESC)
             """))
             
+            # Keyset (cursor) pagination indexes
+            db.session.execute(text("""
+                CREATE INDEX IF NOT EXISTS idx_articles_published_keyset 
+                ON articles(is_published, published_at, id)
+            """))
+            
+            db.session.execute(text("""
+                CREATE INDEX IF NOT EXISTS idx_articles_category_keyset 
+                ON articles(category_id, is_published, published_at, id)
+            """))
+            
+            # Covering index for the sitemap scan of (slug, updated_at)
+            db.session.execute(text("""
+                CREATE INDEX IF NOT EXISTS idx_articles_sitemap 
+                ON articles(is_published, published_at, id, slug, updated_at)
+            """))
+            
             db.session.commit()
             print("✅ All database indexes created successfully!")
             
+            # Full-text search index (tsvector + GIN on PostgreSQL, FTS5 on SQLite)
+            from app.search import ensure_search_index
+            if ensure_search_index():
+                print("✅ Full-text search index installed and backfilled!")
+            
             # Get table row counts
             tables = ['articles', 'categories', 'authors', 'quizzes', 'questions', 
                      'answers', 'pages', 'menu_items', 'stock_quotes', 'site_settings']
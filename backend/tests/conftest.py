@@ -0,0 +1,44 @@
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+import pytest
+
+# The config reads DATABASE_URL at import, so point it at a scratch database first
+_database_dir = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_database_dir, 'test.sqlite')}"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db
+from app.models import Article, Author, Category, Tag
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def articles(app):
+    """Twelve published articles over two authors, two categories and two tags"""
+    authors = [Author(name=f'Author {i}', email=f'author{i}@example.com') for i in range(2)]
+    categories = [Category(name=f'Category {i}', slug=f'category-{i}') for i in range(2)]
+    tags = [Tag(name=f'Tag {i}', slug=f'tag-{i}') for i in range(2)]
+    db.session.add_all(authors + categories + tags)
+    created = []
+    for i in range(12):
+        created.append(Article(
+            title=f'Article {i}', slug=f'article-{i}', content=f'<p>Body {i}</p>', excerpt=f'Excerpt {i}',
+            author=authors[i % 2], category=categories[i % 2], tags=tags[:i % 3],
+            is_published=True, published_at=datetime(2024, 1, 1) + timedelta(hours=i)
+        ))
+    db.session.add_all(created)
+    db.session.commit()
+    return created
@@ -0,0 +1,84 @@
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+import pytest
+from sqlalchemy import event
+from app import db
+from app import homepage_snapshot
+from app.homepage_snapshot import homepage_snapshots
+from app.models import ArticleViewBucket
+from app.trending import bucket_for, refresh_trending
+
+@contextmanager
+def count_statements():
+    """Count the SQL statements this thread executes inside the block.
+
+    Background workers share the engine, so their statements are skipped.
+    """
+    statements = []
+    thread = threading.get_ident()
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if threading.get_ident() == thread:
+            statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+def statements_for(client, url, **kwargs):
+    with count_statements() as statements:
+        response = client.open(url, **kwargs)
+    assert response.status_code == 200
+    return len(statements)
+
+@pytest.fixture
+def ranked(articles):
+    """Materialized trending rankings covering every article"""
+    now = datetime.utcnow()
+    db.session.add_all(ArticleViewBucket(article_id=article.id, bucket_start=bucket_for(now), views=i + 1)
+                       for i, article in enumerate(articles))
+    db.session.commit()
+    refresh_trending(now=now)
+    return articles
+
+@pytest.mark.parametrize('url', [
+    '/api/articles/?per_page={size}',
+    '/api/articles/?per_page={size}&fields=card',
+    '/api/articles/?per_page={size}&cursor=',
+    '/api/articles/?per_page={size}&category=category-1',
+    '/api/articles/recent?limit={size}',
+    '/api/articles/recent-with-main?first={size}',
+    '/api/articles/by-category-slug?categorySlug=category-0&first={size}',
+    '/api/articles/trending?limit={size}',
+    '/api/articles/trending?limit={size}&window=24h&fields=card',
+    '/api/articles/search?q=body&per_page={size}',
+    '/api/articles/search?q=body&per_page={size}&fields=card',
+])
+def test_list_query_count_does_not_grow_with_page_size(client, ranked, url):
+    # Warm up once so one-off work (counters, first-request hooks) is not counted
+    client.get(url.format(size=1))
+    counts = {size: statements_for(client, url.format(size=size)) for size in (2, 5, 10)}
+    assert len(set(counts.values())) == 1, counts
+
+def test_by_slugs_query_count_does_not_grow_with_slug_count(client, articles):
+    def request(size):
+        return {'method': 'POST', 'json': {'slugs': [article.slug for article in articles[:size]]}}
+
+    client.open('/api/articles/by-slugs', **request(1))
+    counts = {size: statements_for(client, '/api/articles/by-slugs', **request(size)) for size in (2, 5, 10)}
+    assert len(set(counts.values())) == 1, counts
+
+def test_homepage_query_count_does_not_grow_with_section_size(client, ranked, monkeypatch):
+    def build(size):
+        # Every section sized alike, and built from scratch rather than served from the snapshot
+        for name in ('RECENT_LIMIT', 'FEATURED_LIMIT', 'TRENDING_LIMIT', 'CATEGORY_LIMIT'):
+            monkeypatch.setattr(homepage_snapshot, name, size)
+        monkeypatch.setattr(homepage_snapshots, '_snapshots', {})
+        return statements_for(client, '/api/homepage')
+
+    build(1)
+    counts = {size: build(size) for size in (2, 5, 10)}
+    assert len(set(counts.values())) == 1, counts
@@ -0,0 +1,38 @@
+import uuid
+from datetime import datetime
+from app import db
+from app.models import Category, ChangeLog
+
+def poll(client, token):
+    response = client.get(f'/api/changes?since={token}&types=categories')
+    assert response.status_code == 200
+    return response.get_json()
+
+def keys(data):
+    return [change['key'] for change in data['changes']['categories']['created']]
+
+def log_change(key, id=None):
+    """A committed change row, optionally with an id handed out before others committed"""
+    db.session.execute(ChangeLog.__table__.insert(), {
+        'id': id, 'entity': 'categories', 'ref_id': uuid.uuid4(), 'key': key,
+        'action': 'created', 'changed_at': datetime.utcnow()
+    })
+    db.session.commit()
+
+def test_starting_token_skips_nothing_after_it(client, app):
+    token = client.get('/api/changes').get_json()['next_token']
+    db.session.add(Category(name='World', slug='world'))
+    db.session.commit()
+    data = poll(client, token)
+    assert keys(data) == ['world'] and data['next_token'] > token
+
+def test_late_commit_of_a_lower_id_is_not_skipped(client, app):
+    log_change('first', id=10)
+    data = poll(client, 0)
+    assert keys(data) == ['first']
+
+    # Took id 5 before 'first' but committed after the client moved past it
+    log_change('late', id=5)
+    data = poll(client, data['next_token'])
+    assert keys(data) == ['late']
+    assert poll(client, data['next_token'])['changes']['categories']['created'] == []
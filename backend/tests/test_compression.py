@@ -0,0 +1,19 @@
+import logging
+import brotli
+import pytest
+from app import compression
+from app.compression import Compressor
+
+@pytest.mark.parametrize('accept, encoding', [('br, gzip', 'br'), ('gzip', 'gzip'), ('identity', None)])
+def test_negotiates_the_best_accepted_encoding(client, articles, accept, encoding):
+    response = client.get('/api/articles/?per_page=10', headers={'Accept-Encoding': accept})
+    assert response.headers.get('Content-Encoding') == encoding
+    if encoding == 'br':
+        assert brotli.decompress(response.get_data()).startswith(b'{')
+
+def test_warns_about_unavailable_algorithms(app, monkeypatch, caplog):
+    monkeypatch.setattr(compression, 'brotli', None)
+    with caplog.at_level(logging.WARNING):
+        compressor = Compressor(app)
+    assert compressor.algorithms == ('gzip',)
+    assert 'install Brotli' in caplog.text
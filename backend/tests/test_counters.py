@@ -0,0 +1,22 @@
+from app import db
+from app.counters import GLOBAL_ID, counter_seeder, get_count, seed_counters
+from app.models import ContentCounter
+
+def test_seed_builds_missing_counters_once(app, articles):
+    ContentCounter.query.delete()
+    db.session.commit()
+    assert get_count() == 0
+
+    assert seed_counters()
+    assert get_count() == len(articles)
+    assert get_count('category', articles[0].category_id) == len(articles) // 2
+    assert not seed_counters()
+
+def test_first_request_seeds_an_unseeded_database(client, articles, monkeypatch):
+    ContentCounter.query.delete()
+    db.session.commit()
+    monkeypatch.setattr(counter_seeder, 'seeded', False)
+
+    client.get('/api/health')
+    assert counter_seeder.seeded
+    assert db.session.get(ContentCounter, ('global', GLOBAL_ID)).count == len(articles)
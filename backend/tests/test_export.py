@@ -0,0 +1,39 @@
+import json
+import pytest
+from flask_jwt_extended import create_access_token
+from app import db
+
+@pytest.fixture
+def auth_headers(app):
+    return {'Authorization': f'Bearer {create_access_token(identity="admin")}'}
+
+def test_table_export_requires_a_token(client, articles):
+    assert client.get('/api/admin/export/articles').status_code == 401
+
+@pytest.mark.parametrize('table', ['users', 'authors', 'stock_quotes', 'missing'])
+def test_only_content_tables_are_exportable(client, auth_headers, table):
+    assert client.get(f'/api/admin/export/{table}', headers=auth_headers).status_code == 404
+
+def test_content_table_export(client, auth_headers, articles):
+    response = client.get('/api/admin/export/articles?format=ndjson', headers=auth_headers)
+    assert response.status_code == 200
+    rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert sorted(row['slug'] for row in rows) == sorted(article.slug for article in articles)
+
+def test_ndjson_export_keeps_iso_timestamps(client, auth_headers, articles):
+    response = client.get('/api/admin/export/articles?format=ndjson', headers=auth_headers)
+    rows = {row['slug']: row for row in map(json.loads, response.get_data(as_text=True).splitlines())}
+    assert rows['article-0']['published_at'] == '2024-01-01T00:00:00'
+
+def test_article_export_needs_a_token_for_drafts(client, auth_headers, articles):
+    articles[0].is_published = False
+    db.session.commit()
+
+    def slugs(response):
+        return {json.loads(line)['slug'] for line in response.get_data(as_text=True).splitlines()}
+
+    public = client.get('/api/articles/export?format=ndjson')
+    assert public.status_code == 200 and 'article-0' not in slugs(public)
+    assert client.get('/api/articles/export?format=ndjson&published=false').status_code == 401
+    drafts = client.get('/api/articles/export?format=ndjson&published=false', headers=auth_headers)
+    assert drafts.status_code == 200 and 'article-0' in slugs(drafts)
@@ -0,0 +1,15 @@
+import re
+from app.sitemap import sitemaps
+
+def locations(client):
+    response = client.get('/sitemap.xml')
+    assert response.status_code == 200
+    return re.findall(r'<loc>(.*?)</loc>', response.get_data(as_text=True))
+
+def test_sitemap_index_points_at_site_url(client, articles, monkeypatch):
+    monkeypatch.setattr(sitemaps, 'site_url', 'https://news.example.com')
+    assert locations(client) == ['https://news.example.com/sitemap-1.xml']
+
+def test_sitemap_index_falls_back_to_request_host(client, articles, monkeypatch):
+    monkeypatch.setattr(sitemaps, 'site_url', '')
+    assert locations(client) == ['http://localhost/sitemap-1.xml']
@@ -0,0 +1,12 @@
+from app.homepage_snapshot import homepage_snapshots
+
+def test_unsupported_locales_share_the_default_snapshot(client, articles, monkeypatch):
+    built = []
+    build = homepage_snapshots.build
+    monkeypatch.setattr(homepage_snapshots, 'build', lambda locale: built.append(locale) or build(locale))
+    monkeypatch.setattr(homepage_snapshots, '_snapshots', {})
+
+    responses = [client.get(f'/api/homepage?locale={locale}') for locale in ('en', 'xyz', 'zz-top', '')]
+    assert all(response.status_code == 200 for response in responses)
+    assert len({response.get_data() for response in responses}) == 1
+    assert built == ['en'] and list(homepage_snapshots.stats()) == ['en']
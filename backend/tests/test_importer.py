@@ -0,0 +1,59 @@
+import json
+from datetime import datetime
+from flask_jwt_extended import create_access_token
+from app.importer import ArticleImporter
+from app.models import Article
+
+def run(lines):
+    return list(ArticleImporter().run(json.dumps(line) for line in lines))
+
+def test_reimport_keeps_columns_the_line_leaves_out(app, articles):
+    article = articles[0]
+    published_at, category_id = article.published_at, article.category_id
+    results = run([{'slug': article.slug, 'title': 'Retitled', 'content': '<p>New</p>',
+                    'author_email': article.author.email}])
+    assert results[0]['status'] == 'updated'
+
+    article = Article.query.filter_by(slug=article.slug).one()
+    assert article.title == 'Retitled'
+    assert article.is_published and article.published_at == published_at
+    assert article.category_id == category_id and article.excerpt == 'Excerpt 0'
+
+def test_reimport_sets_columns_the_line_sends(app, articles):
+    article = articles[0]
+    run([{'slug': article.slug, 'title': article.title, 'content': article.content,
+          'author_email': article.author.email, 'is_published': False, 'category': None}])
+    article = Article.query.filter_by(slug=article.slug).one()
+    assert not article.is_published and article.category_id is None
+
+def test_new_articles_get_insert_defaults(app, articles):
+    before = datetime.utcnow()
+    results = run([{'slug': 'imported', 'title': 'Imported', 'content': '<p>Body</p>',
+                    'author_email': articles[0].author.email}])
+    assert results[0]['status'] == 'created'
+    article = Article.query.filter_by(slug='imported').one()
+    assert not article.is_published and article.category_id is None and article.excerpt is None
+    assert article.published_at >= before.replace(microsecond=0)
+
+def test_reimport_with_explicit_publication(app, articles):
+    article = articles[0]
+    results = run([{'slug': article.slug, 'title': article.title, 'content': article.content,
+                    'author_email': article.author.email, 'published_at': '2023-05-01T00:00:00',
+                    'is_published': True}])
+    assert results[0]['status'] == 'updated'
+    assert Article.query.filter_by(slug=article.slug).one().published_at == datetime(2023, 5, 1)
+
+def test_import_endpoint_requires_a_token(client, articles):
+    line = json.dumps({'slug': articles[0].slug, 'title': 'Hijacked', 'content': '<p>x</p>',
+                       'author_email': articles[0].author.email})
+    response = client.post('/api/articles/import', data=line, content_type='application/x-ndjson')
+    assert response.status_code == 401
+    assert Article.query.filter_by(slug=articles[0].slug).one().title == articles[0].title
+
+def test_import_endpoint_with_a_token(client, articles):
+    headers = {'Authorization': f'Bearer {create_access_token(identity="admin")}'}
+    line = json.dumps({'slug': 'imported', 'title': 'Imported', 'content': '<p>x</p>',
+                       'author_email': articles[0].author.email})
+    response = client.post('/api/articles/import', data=line, content_type='application/x-ndjson', headers=headers)
+    assert response.status_code == 200
+    assert [json.loads(row) for row in response.get_data(as_text=True).splitlines()][0]['status'] == 'created'
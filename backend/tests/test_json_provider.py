@@ -0,0 +1,21 @@
+import uuid
+from datetime import date, datetime, timezone
+from decimal import Decimal
+import pytest
+from flask import jsonify
+from flask.json.provider import DefaultJSONProvider
+
+@pytest.mark.parametrize('value', [
+    datetime(2024, 1, 2, 3, 4, 5),
+    datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+    date(2024, 1, 2),
+    uuid.UUID('12345678-1234-5678-1234-567812345678'),
+    Decimal('1.50'),
+])
+def test_encodes_like_flask_provider(app, value):
+    assert app.json.loads(app.json.dumps({'value': value})) == \
+        DefaultJSONProvider(app).loads(DefaultJSONProvider(app).dumps({'value': value}))
+
+def test_jsonify_keeps_http_dates(app):
+    with app.test_request_context():
+        assert jsonify(at=datetime(2024, 1, 2, 3, 4, 5)).get_json() == {'at': 'Tue, 02 Jan 2024 03:04:05 GMT'}
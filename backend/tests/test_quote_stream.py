@@ -0,0 +1,16 @@
+import pytest
+from app.quote_stream import QuoteStream, quote_stream
+
+@pytest.mark.parametrize('threads, reserved, configured, expected', [
+    (100, 25, None, 75),
+    (100, 25, 500, 75),
+    (100, 25, 10, 10),
+    (1, 25, None, 0),
+])
+def test_client_limit_leaves_threads_for_the_api(app, threads, reserved, configured, expected):
+    app.config.update(WEB_THREADS=threads, STREAM_RESERVED_THREADS=reserved, STREAM_MAX_CLIENTS=configured)
+    assert QuoteStream._client_limit(app) == expected
+
+def test_stream_refused_when_no_thread_is_spare(client, monkeypatch):
+    monkeypatch.setattr(quote_stream, 'max_clients', 0)
+    assert client.get('/api/stocks/stream').status_code == 503
@@ -0,0 +1,52 @@
+from datetime import datetime
+import numpy as np
+from app import db
+from app import related
+from app.models import Article, RelatedArticle
+from app.related import NeighborIndex, load_index, rebuild_related, update_related
+
+ARTICLES = [
+    ('a', 'central bank raises interest rates', 'markets'),
+    ('b', 'interest rates weigh on bank shares', 'markets'),
+    ('c', 'new phone release date announced', 'tech'),
+    ('d', 'phone makers cut prices', 'tech'),
+]
+TAG_PAIRS = [('a', 'rates'), ('b', 'rates'), ('c', 'phones'), ('d', 'phones')]
+
+def test_update_with_unchanged_content_keeps_scores():
+    index = NeighborIndex(ARTICLES, TAG_PAIRS)
+    before = {article_id: index.scores(article_id) for article_id, _, _ in ARTICLES}
+    index.update(ARTICLES[1:2], [pair for pair in TAG_PAIRS if pair[0] == 'b'])
+    for article_id, scores in before.items():
+        assert np.allclose(index.scores(article_id), scores)
+
+def test_update_adds_and_removes_articles():
+    index = NeighborIndex(ARTICLES, TAG_PAIRS)
+    index.update([('e', 'bank shares rally as rates hold', 'markets')], [('e', 'rates')], removed_ids=['c'])
+    assert 'c' not in index and 'e' in index and len(index) == 4
+    assert [related_id for related_id, _ in index.neighbors('e', 2)] == ['b', 'a']
+    assert 'c' not in [related_id for related_id, _ in index.neighbors('d', 3)]
+
+def test_update_related_rereads_only_changed_articles(app, articles, monkeypatch):
+    rebuild_related(top_n=3)
+    index = load_index()
+    loaded = []
+    load_articles = related.load_articles
+    monkeypatch.setattr(related, 'load_articles', lambda ids=None: loaded.append(ids) or load_articles(ids))
+
+    edited, unpublished = articles[1], articles[2]
+    edited.title = 'Quarterly earnings beat forecasts'
+    unpublished.is_published = False
+    added = Article(title='Earnings beat forecasts again', slug='article-new', content='<p>New</p>',
+                    author=edited.author, category=edited.category, tags=list(edited.tags),
+                    is_published=True, published_at=datetime(2024, 2, 1))
+    db.session.add(added)
+    db.session.commit()
+
+    update_related(index, {edited.id, unpublished.id, added.id}, top_n=3)
+    assert loaded and all(set(ids) <= {edited.id, unpublished.id, added.id} for ids in loaded)
+
+    assert RelatedArticle.query.filter_by(article_id=unpublished.id).count() == 0
+    assert RelatedArticle.query.filter_by(related_id=unpublished.id).count() == 0
+    assert RelatedArticle.query.filter_by(article_id=added.id, rank=1).one().related_id == edited.id
+    assert RelatedArticle.query.filter_by(article_id=edited.id, rank=1).one().related_id == added.id
@@ -0,0 +1,46 @@
+from sqlalchemy import text
+from app import db
+from app.search import MARK_END, MARK_START, _highlight, ensure_search_index, search_articles
+
+def titles(query):
+    results, _ = search_articles(query)
+    return [article.title for article, _, _, _ in results]
+
+def test_search_follows_updates_and_deletes(app, articles):
+    articles[3].title = 'Harbour bridge reopens'
+    db.session.delete(articles[4])
+    db.session.commit()
+    assert titles('harbour') == ['Harbour bridge reopens']
+    assert titles('"Article 4"') == [] and titles('Body 5') == ['Article 5']
+
+def test_search_survives_vacuum(app, articles):
+    # SQLite allows VACUUM to renumber the implicit articles rowid, most likely after deletes
+    for article in articles[:6]:
+        db.session.delete(article)
+    db.session.commit()
+    with db.engine.connect() as connection:
+        connection.execution_options(isolation_level='AUTOCOMMIT').execute(text('VACUUM'))
+    articles[9].title = 'Harbour bridge reopens'
+    db.session.commit()
+    assert titles('harbour') == ['Harbour bridge reopens']
+    assert titles('Body 11') == ['Article 11']
+
+def test_backfill_rebuilds_the_index(app, articles):
+    db.session.execute(text('DELETE FROM articles_fts'))
+    db.session.commit()
+    assert titles('Body 7') == []
+    assert ensure_search_index()
+    assert titles('Body 7') == ['Article 7']
+
+def test_highlights_are_escaped_text(app, articles):
+    articles[2].title = 'Profits & <losses> harbour'
+    articles[2].content = '<p class="harbour">The <b>harbour</b> & docks</p><img src="x.png" alt="harbour">'
+    db.session.commit()
+    results, _ = search_articles('harbour')
+    (_, _, title, snippet), = results
+    assert title == 'Profits &amp; &lt;losses&gt; <mark>harbour</mark>'
+    assert snippet == 'The <mark>harbour</mark> &amp; docks'
+
+def test_snippet_cut_inside_a_tag_drops_the_fragments():
+    snippet = f'ef="/{MARK_START}harbour{MARK_END}">Old {MARK_START}harbour{MARK_END} walk</a> <img al'
+    assert _highlight(snippet, stored_html=True) == 'Old <mark>harbour</mark> walk'
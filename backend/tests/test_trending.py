@@ -0,0 +1,43 @@
+import random
+from datetime import datetime, timedelta
+import pytest
+from app import db
+from app.models import ArticleViewBucket, TrendingArticle
+from app.trending import BUCKET_SIZE, WINDOWS, bucket_for, refresh_trending
+
+NOW = datetime(2024, 3, 1, 12, 7)
+
+def expected_scores(buckets, published, span, half_life):
+    """Reference decayed scores, aging each bucket from its midpoint"""
+    scores = {}
+    for article_id, bucket_start, views in buckets:
+        age = NOW - (bucket_start + BUCKET_SIZE / 2)
+        if article_id in published and age <= span:
+            weight = 0.5 ** (max(age.total_seconds(), 0) / half_life.total_seconds())
+            scores[article_id] = scores.get(article_id, 0) + views * weight
+    return scores
+
+@pytest.mark.parametrize('window', list(WINDOWS))
+def test_refresh_ranks_by_decayed_views(app, articles, window):
+    articles[-1].is_published = False
+    rng = random.Random(3)
+    buckets = {}
+    for article in articles:
+        for _ in range(20):
+            start = bucket_for(NOW - timedelta(minutes=rng.randrange(0, 8 * 24 * 60)))
+            buckets[article.id, start] = rng.randrange(1, 50)
+    db.session.add_all(ArticleViewBucket(article_id=article_id, bucket_start=start, views=views)
+                       for (article_id, start), views in buckets.items())
+    db.session.commit()
+
+    refresh_trending(top_n=5, now=NOW)
+
+    span, half_life = WINDOWS[window]
+    published = {article.id for article in articles if article.is_published}
+    scores = expected_scores([(a, s, v) for (a, s), v in buckets.items()], published, span, half_life)
+    top = sorted(scores.items(), key=lambda item: -item[1])[:5]
+    ranked = TrendingArticle.query.filter_by(window=window).order_by(TrendingArticle.rank).all()
+    assert [row.article_id for row in ranked] == [article_id for article_id, _ in top]
+    assert [row.score for row in ranked] == pytest.approx([score for _, score in top], rel=1e-6)
+    # Buckets older than the longest window are pruned
+    assert ArticleViewBucket.query.filter(ArticleViewBucket.bucket_start < NOW - timedelta(days=7, minutes=15)).count() == 0